@@ -0,0 +1,17 @@
+# Gunicorn configuration for serving MechLocator over ASGI with uvicorn workers
+# Run with: gunicorn -c gunicorn_asgi_config.py mechlocator.asgi:application
+#
+# Each uvicorn worker runs an event loop, so the async JSON APIs of one process
+# serve many slow mobile clients at once; fewer workers are needed than with
+# the sync profile in gunicorn_config.py, whose settings and hooks are reused.
+
+import multiprocessing
+
+from gunicorn_config import *  # noqa: F401,F403
+
+worker_class = "uvicorn.workers.UvicornWorker"
+workers = multiprocessing.cpu_count() + 1
+
+raw_env = raw_env + [  # noqa: F405
+    "ASYNC_API_VIEWS=True",
+]
@@ -22,6 +22,9 @@ keepalive = 2
 max_requests = 1000
 max_requests_jitter = 50
 
+# Log each worker's RSS/PSS/shared memory every this many requests
+memory_report_requests = int(os.environ.get("MEMORY_REPORT_REQUESTS", 250))
+
 # Logging
 accesslog = "-"
 errorlog = "-"
@@ -65,13 +68,30 @@ def pre_exec(server):
     server.log.info("Forked child, re-executing.")
 
 def when_ready(server):
+    # Build shared state in the preloaded master so workers inherit it copy-on-write
+    if server.cfg.preload_app:
+        from mechlocator.warmup import format_memory, memory_usage, warm_up
+        for name, result, seconds in warm_up():
+            server.log.info("Warm-up %s: %s in %.2fs", name, result, seconds)
+        server.log.info("Master memory after warm-up: %s", format_memory(memory_usage()))
     server.log.info("Server is ready. Spawning workers")
 
 def worker_int(worker):
     worker.log.info("worker received INT or QUIT signal")
 
+def worker_exit(server, worker):
+    # Write out buffered activity logs before the worker goes away
+    from mechanics.writers import flush_all
+    flush_all()
+
+    from mechlocator.warmup import format_memory, memory_usage
+    server.log.info("Worker %s exiting: %s", worker.pid, format_memory(memory_usage()))
+
 def pre_request(worker, req):
     worker.log.info("%s %s" % (req.method, req.path))
 
 def post_request(worker, req, environ, resp):
     worker.log.info("%s %s - %s" % (req.method, req.path, resp.status))
+    if worker.nr % memory_report_requests == 0:
+        from mechlocator.warmup import format_memory, memory_usage
+        worker.log.info("Worker %s after %s requests: %s", worker.pid, worker.nr, format_memory(memory_usage()))
@@ -1,19 +1,37 @@
 from django.contrib import admin
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ERROR_FLAG
 from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.models import User
-from django.db import models
 from django.utils.html import format_html
 from django.urls import path, reverse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.http import JsonResponse
-from django.db.models import Count, Avg, Q
+from django.db.models import Count, Avg, Q, Sum
+from django.db.models.functions import ExtractHour, TruncDate
 from django.utils import timezone
 from datetime import timedelta
 from django.conf import settings
+from django.core.exceptions import PermissionDenied
+import copy
 import json
 
-from .models import Mechanic, UserProfile, ActivityLog, SearchQuery
+from .models import (
+    Mechanic, UserProfile, ActivityLog, SearchQuery, ActivityRollup, ActivityUserRollup, SearchRollup
+)
+from .cache import cache_stats
+from .rollups import refresh_rollups
+from .signals import mechanics_bulk_updated
+from .stats import dashboard_stats
+from .tiles import TILE_STATUSES, get_tile, is_valid_tile
+
+
+def chart_json(rows, date_field):
+    """Serialize per-day ``count`` rows for the Chart.js templates."""
+    return json.dumps([
+        {'date': row[date_field].isoformat(), 'count': row['count']} for row in rows
+    ])
 
 # Custom Admin Site (keeping for reference)
 class MechLocatorAdminSite(admin.AdminSite):
@@ -64,7 +82,8 @@ class MechanicAdmin(admin.ModelAdmin):
     
     ordering = ['-created_at']
     
-    actions = ['activate_mechanics', 'deactivate_mechanics', 'bulk_update_rating', 'export_mechanics']
+    actions = ['activate_mechanics', 'deactivate_mechanics', 'bulk_update_rating', 'export_mechanics', 'export_mechanics_gzip']
+    change_list_template = 'admin/mechanics/mechanic/change_list.html'
     
     def address_display(self, obj):
         if obj.address:
@@ -106,11 +125,13 @@ class MechanicAdmin(admin.ModelAdmin):
     
     def activate_mechanics(self, request, queryset):
         updated = queryset.update(is_active=True)
+        mechanics_bulk_updated()
         self.message_user(request, f'{updated} mechanics have been activated.')
     activate_mechanics.short_description = "Activate selected mechanics"
     
     def deactivate_mechanics(self, request, queryset):
         updated = queryset.update(is_active=False)
+        mechanics_bulk_updated()
         self.message_user(request, f'{updated} mechanics have been deactivated.')
     deactivate_mechanics.short_description = "Deactivate selected mechanics"
     
@@ -119,6 +140,7 @@ class MechanicAdmin(admin.ModelAdmin):
             new_rating = request.POST.get('rating')
             if new_rating:
                 updated = queryset.update(rating=new_rating)
+                mechanics_bulk_updated()
                 self.message_user(request, f'{updated} mechanics have been updated with rating {new_rating}.')
                 return redirect('.')
         
@@ -128,112 +150,166 @@ class MechanicAdmin(admin.ModelAdmin):
         })
     bulk_update_rating.short_description = "Update rating for selected mechanics"
     
-    def export_mechanics(self, request, queryset):
+    EXPORT_HEADER = ['Name', 'Address', 'Contact', 'Rating', 'Latitude', 'Longitude', 'Status', 'Created']
+    EXPORT_FIELDS = ['name', 'address', 'contact', 'rating', 'latitude', 'longitude', 'is_active', 'created_at']
+    EXPORT_CHUNK_SIZE = 2000
+    
+    def stream_export(self, queryset, compress=False):
+        """Stream mechanics as CSV rows read in chunks, optionally gzip-compressed."""
         import csv
-        from django.http import HttpResponse
+        import zlib
+        from django.http import StreamingHttpResponse
+        
+        class Echo:
+            def write(self, value):
+                return value
         
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="mechanics_export.csv"'
+        writer = csv.writer(Echo())
+        rows = queryset.order_by('id').values_list(*self.EXPORT_FIELDS).iterator(chunk_size=self.EXPORT_CHUNK_SIZE)
         
-        writer = csv.writer(response)
-        writer.writerow(['Name', 'Address', 'Contact', 'Rating', 'Latitude', 'Longitude', 'Status', 'Created'])
+        def csv_lines():
+            yield writer.writerow(self.EXPORT_HEADER)
+            for name, address, contact, rating, latitude, longitude, is_active, created_at in rows:
+                yield writer.writerow([
+                    name, address, contact, rating, latitude, longitude,
+                    'Active' if is_active else 'Inactive',
+                    created_at.strftime('%Y-%m-%d %H:%M:%S'),
+                ])
         
-        for mechanic in queryset:
-            writer.writerow([
-                mechanic.name,
-                mechanic.address,
-                mechanic.contact,
-                mechanic.rating,
-                mechanic.latitude,
-                mechanic.longitude,
-                'Active' if mechanic.is_active else 'Inactive',
-                mechanic.created_at.strftime('%Y-%m-%d %H:%M:%S')
-            ])
+        def gzip_chunks():
+            compressor = zlib.compressobj(wbits=31)  # gzip container
+            buffer = []
+            size = 0
+            for line in csv_lines():
+                buffer.append(line.encode('utf-8'))
+                size += len(buffer[-1])
+                if size >= 64 * 1024:
+                    yield compressor.compress(b''.join(buffer))
+                    buffer, size = [], 0
+            yield compressor.compress(b''.join(buffer)) + compressor.flush()
         
+        if compress:
+            response = StreamingHttpResponse(gzip_chunks(), content_type='application/gzip')
+            response['Content-Disposition'] = 'attachment; filename="mechanics_export.csv.gz"'
+        else:
+            response = StreamingHttpResponse(csv_lines(), content_type='text/csv')
+            response['Content-Disposition'] = 'attachment; filename="mechanics_export.csv"'
         return response
+    
+    def export_mechanics(self, request, queryset):
+        return self.stream_export(queryset)
     export_mechanics.short_description = "Export selected mechanics to CSV"
     
+    def export_mechanics_gzip(self, request, queryset):
+        return self.stream_export(queryset, compress=True)
+    export_mechanics_gzip.short_description = "Export selected mechanics to gzipped CSV"
+    
+    def export_filtered(self, request):
+        """Export every mechanic matching the changelist's current filters and search."""
+        if not self.has_view_or_change_permission(request):
+            raise PermissionDenied
+        # The changelist reads its filters from request.GET, so hand it a copy
+        # of the request without our own parameter
+        params = request.GET.copy()
+        compress = params.pop('format', [''])[0] == 'gzip'
+        changelist_request = copy.copy(request)
+        changelist_request.GET = params
+        try:
+            changelist = self.get_changelist_instance(changelist_request)
+            queryset = changelist.get_queryset(changelist_request)
+        except IncorrectLookupParameters:
+            # Same as changelist_view: send the user back to the unfiltered list
+            return redirect(reverse('admin:mechanics_mechanic_changelist') + '?' + ERROR_FLAG + '=1')
+        return self.stream_export(queryset, compress=compress)
+    
     def get_urls(self):
         urls = super().get_urls()
         custom_urls = [
             path('dashboard/', self.admin_site.admin_view(self.mechanic_dashboard), name='mechanics_mechanic_dashboard'),
             path('map-view/', self.admin_site.admin_view(self.mechanic_map_view), name='mechanics_mechanic_map'),
+            path('map-tiles/<int:zoom>/<int:x>/<int:y>/', self.admin_site.admin_view(self.mechanic_map_tiles), name='mechanics_mechanic_map_tiles'),
             path('analytics/', self.admin_site.admin_view(self.mechanic_analytics), name='mechanics_mechanic_analytics'),
+            path('export/', self.admin_site.admin_view(self.export_filtered), name='mechanics_mechanic_export'),
         ]
         return custom_urls + urls
     
     def mechanic_dashboard(self, request):
-        # Get statistics
-        total_mechanics = Mechanic.objects.count()
-        active_mechanics = Mechanic.objects.filter(is_active=True).count()
-        inactive_mechanics = total_mechanics - active_mechanics
-        
-        # Rating distribution
-        rating_stats = Mechanic.objects.values('rating').annotate(count=Count('id')).order_by('rating')
-        
-        # Recent activity
-        recent_mechanics = Mechanic.objects.order_by('-created_at')[:5]
-        
-        # Monthly growth
-        from django.db.models.functions import TruncMonth
-        monthly_growth = Mechanic.objects.annotate(
-            month=TruncMonth('created_at')
-        ).values('month').annotate(count=Count('id')).order_by('month')
+        # Statistics come from a cached snapshot refreshed in the background
+        stats = dashboard_stats.get()
         
         context = {
-            'total_mechanics': total_mechanics,
-            'active_mechanics': active_mechanics,
-            'inactive_mechanics': inactive_mechanics,
-            'rating_stats': rating_stats,
-            'recent_mechanics': recent_mechanics,
-            'monthly_growth': monthly_growth,
+            'total_mechanics': stats['total_mechanics'],
+            'active_mechanics': stats['active_mechanics'],
+            'inactive_mechanics': stats['inactive_mechanics'],
+            'rating_levels': len(stats['rating_stats']),
+            'rating_stats': json.dumps(stats['rating_stats']),
+            'recent_mechanics': stats['recent_mechanics'],
+            'monthly_growth': json.dumps(stats['monthly_growth']),
+            'stats_computed_at': stats['computed_at'],
+            'list_cache_stats': cache_stats('list'),
+            'home_cache_stats': cache_stats('home'),
+            'search_cache_stats': cache_stats('search'),
+            'tile_cache_stats': cache_stats('tiles'),
             'title': 'Mechanic Dashboard',
             'opts': self.model._meta,
         }
         return render(request, 'admin/mechanics/mechanic/dashboard.html', context)
     
     def mechanic_map_view(self, request):
-        mechanics = Mechanic.objects.filter(is_active=True)
+        # Markers are fetched per tile by the page, so nothing is rendered inline
         context = {
-            'mechanics': mechanics,
             'title': 'Mechanic Map View',
             'opts': self.model._meta,
             'google_maps_api_key': getattr(settings, 'GOOGLE_MAPS_API_KEY', ''),
         }
         return render(request, 'admin/mechanics/mechanic/map_view.html', context)
     
+    def mechanic_map_tiles(self, request, zoom, x, y):
+        # Unlike the public tiles, the admin map also shows inactive shops
+        if not self.has_view_or_change_permission(request):
+            raise PermissionDenied
+        if not is_valid_tile(zoom, x, y):
+            return JsonResponse({'error': 'Invalid tile'}, status=400)
+        status = request.GET.get('status') or 'all'
+        if status not in TILE_STATUSES:
+            return JsonResponse({'error': 'Invalid status'}, status=400)
+        try:
+            rating = float(request.GET.get('rating') or 0)
+        except ValueError:
+            return JsonResponse({'error': 'Invalid rating'}, status=400)
+        return JsonResponse(get_tile(zoom, x, y, rating, status))
+    
     def mechanic_analytics(self, request):
+        refresh_rollups()
         # Get date range from request
         days = int(request.GET.get('days', 30))
         end_date = timezone.now()
         start_date = end_date - timedelta(days=days)
         
-        # Activity over time
-        daily_activity = ActivityLog.objects.filter(
-            timestamp__range=(start_date, end_date)
+        # Activity over time, read from the hourly rollup
+        daily_activity = ActivityRollup.objects.filter(
+            bucket__range=(start_date, end_date)
         ).annotate(
-            date=models.DateField('timestamp')
+            date=TruncDate('bucket')
         ).values('date').annotate(
-            count=Count('id')
+            count=Sum('count')
         ).order_by('date')
         
         # Search queries over time
-        search_queries = SearchQuery.objects.filter(
-            timestamp__range=(start_date, end_date)
-        ).annotate(
-            date=models.DateField('timestamp')
-        ).values('date').annotate(
-            count=Count('id')
-        ).order_by('date')
+        search_queries = SearchRollup.objects.filter(
+            day__range=(start_date.date(), end_date.date())
+        ).values('day').annotate(
+            count=Sum('count')
+        ).order_by('day')
         
         # Top searched locations
-        top_locations = SearchQuery.objects.values('user_location').annotate(
-            count=Count('id')
+        top_locations = SearchRollup.objects.values('user_location').annotate(
+            count=Sum('count')
         ).order_by('-count')[:10]
         
         context = {
-            'daily_activity': daily_activity,
-            'search_queries': search_queries,
+            'daily_activity': chart_json(daily_activity, 'date'),
+            'search_queries': chart_json(search_queries, 'day'),
             'top_locations': top_locations,
             'days': days,
             'title': 'Mechanic Analytics',
@@ -288,10 +364,10 @@ class CustomUserAdmin(UserAdmin):
 # Enhanced Activity Log Admin
 @admin.register(ActivityLog)
 class ActivityLogAdmin(admin.ModelAdmin):
-    list_display = ['user_display', 'action_display', 'details_display', 'ip_address', 'timestamp_display']
+    list_display = ['user_display', 'action_display', 'description_display', 'ip_address', 'timestamp_display']
     list_filter = ['action', 'timestamp', 'ip_address']
-    search_fields = ['user__username', 'user__email', 'details', 'ip_address']
-    readonly_fields = ['user', 'action', 'details', 'ip_address', 'timestamp']
+    search_fields = ['user__username', 'user__email', 'description', 'ip_address']
+    readonly_fields = ['user', 'action', 'description', 'ip_address', 'user_agent', 'timestamp']
     list_per_page = 50
     date_hierarchy = 'timestamp'
     
@@ -318,16 +394,16 @@ class ActivityLogAdmin(admin.ModelAdmin):
             'profile_update': 'info',
             'admin_action': 'danger'
         }
-        color = action_colors.get(obj.action, 'secondary')
-        return format_html('<span class="badge bg-{}">{}</span>', color, obj.action.title())
+        color = action_colors.get(obj.action_name, 'secondary')
+        return format_html('<span class="badge bg-{}">{}</span>', color, obj.get_action_display())
     action_display.short_description = 'Action'
     
-    def details_display(self, obj):
-        if obj.details:
+    def description_display(self, obj):
+        if obj.description:
             return format_html('<span title="{}">{}</span>', 
-                             obj.details, obj.details[:50] + '...' if len(obj.details) > 50 else obj.details)
+                             obj.description, obj.description[:50] + '...' if len(obj.description) > 50 else obj.description)
         return "No details"
-    details_display.short_description = 'Details'
+    description_display.short_description = 'Details'
     
     def timestamp_display(self, obj):
         return obj.timestamp.strftime('%Y-%m-%d %H:%M:%S')
@@ -341,36 +417,40 @@ class ActivityLogAdmin(admin.ModelAdmin):
         return custom_urls + urls
     
     def activity_summary(self, request):
+        refresh_rollups()
         # Get date range from request
         days = int(request.GET.get('days', 7))
         end_date = timezone.now()
         start_date = end_date - timedelta(days=days)
         
         # Activity by type
-        activity_by_type = ActivityLog.objects.filter(
-            timestamp__range=(start_date, end_date)
-        ).values('action').annotate(
-            count=Count('id')
-        ).order_by('-count')
+        activity_by_type = [
+            {'action': ActivityLog.Action(row['action']).name.lower(), 'count': row['count']}
+            for row in ActivityRollup.objects.filter(
+                bucket__range=(start_date, end_date)
+            ).values('action').annotate(
+                count=Sum('count')
+            ).order_by('-count')
+        ]
         
         # Activity by user
-        activity_by_user = ActivityLog.objects.filter(
-            timestamp__range=(start_date, end_date)
+        activity_by_user = ActivityUserRollup.objects.filter(
+            day__range=(start_date.date(), end_date.date())
         ).values('user__username').annotate(
-            count=Count('id')
+            count=Sum('count')
         ).order_by('-count')[:10]
         
         # Hourly activity
-        hourly_activity = ActivityLog.objects.filter(
-            timestamp__range=(start_date, end_date)
-        ).extra(
-            select={'hour': 'EXTRACT(hour FROM timestamp)'}
+        hourly_activity = ActivityRollup.objects.filter(
+            bucket__range=(start_date, end_date)
+        ).annotate(
+            hour=ExtractHour('bucket')
         ).values('hour').annotate(
-            count=Count('id')
+            count=Sum('count')
         ).order_by('hour')
         
         context = {
-            'activity_by_type': activity_by_type,
+            'activity_by_type': json.dumps(activity_by_type),
             'activity_by_user': activity_by_user,
             'hourly_activity': hourly_activity,
             'days': days,
@@ -436,40 +516,40 @@ class SearchQueryAdmin(admin.ModelAdmin):
         return custom_urls + urls
     
     def search_analytics(self, request):
+        refresh_rollups()
         # Get date range from request
         days = int(request.GET.get('days', 30))
         end_date = timezone.now()
         start_date = end_date - timedelta(days=days)
         
         # Search queries over time
-        daily_searches = SearchQuery.objects.filter(
-            timestamp__range=(start_date, end_date)
-        ).annotate(
-            date=models.DateField('timestamp')
-        ).values('date').annotate(
-            count=Count('id')
-        ).order_by('date')
+        daily_searches = SearchRollup.objects.filter(
+            day__range=(start_date.date(), end_date.date())
+        ).values('day').annotate(
+            count=Sum('count')
+        ).order_by('day')
         
         # Popular search locations
-        popular_locations = SearchQuery.objects.values('user_location').annotate(
-            count=Count('id')
+        popular_locations = SearchRollup.objects.values('user_location').annotate(
+            count=Sum('count')
         ).order_by('-count')[:15]
         
         # Radius distribution
-        radius_distribution = SearchQuery.objects.values('radius').annotate(
-            count=Count('id')
+        radius_distribution = SearchRollup.objects.values('radius').annotate(
+            count=Sum('count')
         ).order_by('radius')
         
         # Query type distribution
-        query_type_distribution = SearchQuery.objects.values('query_type').annotate(
-            count=Count('id')
-        ).order_by('-count')
+        query_type_distribution = list(SearchRollup.objects.values('query_type').annotate(
+            count=Sum('count')
+        ).order_by('-count'))
         
         context = {
-            'daily_searches': daily_searches,
+            'daily_searches': chart_json(daily_searches, 'day'),
             'popular_locations': popular_locations,
             'radius_distribution': radius_distribution,
             'query_type_distribution': query_type_distribution,
+            'query_type_data': json.dumps(query_type_distribution),
             'days': days,
             'title': 'Search Analytics',
             'opts': self.model._meta,
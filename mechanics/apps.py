@@ -5,3 +5,6 @@ class MechanicsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'mechanics'
     verbose_name = 'Mechanic Shops Management'
+
+    def ready(self):
+        from . import signals  # noqa: F401
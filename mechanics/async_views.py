@@ -0,0 +1,173 @@
+import json
+import logging
+import random
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse
+
+from .models import ActivityLog, Mechanic, SearchQuery
+from .geo import is_valid_location
+from .pagination import InvalidCursor
+from .spatial_index import get_spatial_backend
+from .tiles import get_tile, is_valid_tile
+from .views import (
+    activity_fields, mechanic_payload, paginate_matches, radius_matches,
+    request_user_id, search_fields, search_response,
+)
+from .writers import activity_log_writer, search_query_writer
+
+logger = logging.getLogger(__name__)
+
+
+async def write_row(writer, model, fields):
+    """Queue a row on a buffered writer, or insert it right away when buffering is off."""
+    if writer.enabled:
+        writer.add(**fields)
+    else:
+        await model.objects.acreate(**fields)
+
+
+async def log_activity(request, user_id, action, description):
+    """Record a user activity log entry without blocking the event loop."""
+    try:
+        await write_row(activity_log_writer, ActivityLog, activity_fields(request, user_id, action, description))
+    except Exception as e:
+        logger.error(f"Failed to log activity: {str(e)}")
+
+
+async def log_search(user_id, query_type, lat, lng, radius, results_count):
+    """Record a sampled search query without blocking the event loop."""
+    if random.random() >= settings.SEARCH_LOG_SAMPLE_RATE:
+        return
+    try:
+        await write_row(
+            search_query_writer, SearchQuery,
+            search_fields(user_id, query_type, lat, lng, radius, results_count),
+        )
+    except Exception as e:
+        logger.error(f"Failed to log search: {str(e)}")
+
+
+async def search_mechanics(request):
+    """API endpoint for searching mechanics."""
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+    try:
+        data = json.loads(request.body)
+        user_lat = data.get('latitude')
+        user_lng = data.get('longitude')
+        radius = float(data.get('radius', 10))
+        rating = float(data.get('rating', 0))
+
+        if user_lat is None or user_lng is None:
+            return JsonResponse({'error': 'Location required'}, status=400)
+        user_lat, user_lng = float(user_lat), float(user_lng)
+        if not is_valid_location(user_lat, user_lng):
+            return JsonResponse({'error': 'Location out of range'}, status=400)
+
+        matches = await sync_to_async(radius_matches)(user_lat, user_lng, radius, rating)
+        page, page_matches = paginate_matches(
+            matches, data, scope=f'search:{user_lat}:{user_lng}:{radius}:{rating}'
+        )
+
+        mechanics = await Mechanic.objects.filter(is_active=True).ain_bulk(
+            [mechanic_id for mechanic_id, _ in page_matches]
+        )
+        nearby_mechanics = [
+            mechanic_payload(mechanics[mechanic_id], distance)
+            for mechanic_id, distance in page_matches
+            if mechanic_id in mechanics
+        ]
+
+        user_id = await sync_to_async(request_user_id)(request)
+        await log_activity(request, user_id, 'search', f'Mechanic search: {len(nearby_mechanics)} results')
+        await log_search(user_id, 'rating' if rating else 'distance', user_lat, user_lng, radius, len(matches))
+
+        return JsonResponse(search_response(nearby_mechanics, matches, page))
+
+    except InvalidCursor as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    except (json.JSONDecodeError, ValueError, TypeError) as e:
+        logger.error(f"Search mechanics error: {str(e)}")
+        return JsonResponse({'error': 'Invalid request data'}, status=400)
+
+
+async def nearest_mechanics(request):
+    """API endpoint returning the k nearest mechanics, however far away they are."""
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+    try:
+        data = json.loads(request.body)
+        user_lat = data.get('latitude')
+        user_lng = data.get('longitude')
+        k = min(max(int(data.get('k', 10)), 1), 50)
+        rating = float(data.get('rating', 0))
+        max_radius = data.get('max_radius')
+        max_radius = float(max_radius) if max_radius else None
+
+        if user_lat is None or user_lng is None:
+            return JsonResponse({'error': 'Location required'}, status=400)
+        user_lat, user_lng = float(user_lat), float(user_lng)
+        if not is_valid_location(user_lat, user_lng):
+            return JsonResponse({'error': 'Location out of range'}, status=400)
+
+        matches = await sync_to_async(get_spatial_backend().query_nearest)(
+            user_lat, user_lng, k, min_rating=rating, max_radius_km=max_radius
+        )
+        ids = [mechanic_id for mechanic_id, _ in matches]
+        mechanics = {
+            mechanic.id: mechanic
+            async for mechanic in Mechanic.objects.filter(is_active=True, id__in=ids).aiterator()
+        }
+        nearest = [
+            mechanic_payload(mechanics[mechanic_id], distance)
+            for mechanic_id, distance in matches
+            if mechanic_id in mechanics
+        ]
+
+        user_id = await sync_to_async(request_user_id)(request)
+        await log_activity(request, user_id, 'search', f'Nearest mechanics search: {len(nearest)} results')
+        await log_search(user_id, 'nearest', user_lat, user_lng, max_radius or 0, len(nearest))
+
+        return JsonResponse({
+            'mechanics': nearest,
+            'count': len(nearest)
+        })
+
+    except (json.JSONDecodeError, ValueError, TypeError) as e:
+        logger.error(f"Nearest mechanics error: {str(e)}")
+        return JsonResponse({'error': 'Invalid request data'}, status=400)
+
+
+async def map_tiles(request, zoom, x, y):
+    """API endpoint returning the clustered markers of one map tile."""
+    if not is_valid_tile(zoom, x, y):
+        return JsonResponse({'error': 'Invalid tile'}, status=400)
+    try:
+        rating = float(request.GET.get('rating') or 0)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid rating'}, status=400)
+
+    return JsonResponse(await sync_to_async(get_tile)(zoom, x, y, rating))
+
+
+async def log_call_api(request):
+    """API endpoint to log mechanic call events."""
+    if request.method != 'POST':
+        return JsonResponse({'status': 'error', 'message': 'Method not allowed'}, status=405)
+    try:
+        data = json.loads(request.body)
+        mechanic_id = data.get('mechanic_id')
+        mechanic_name = data.get('mechanic_name')
+
+        if not mechanic_id or not mechanic_name:
+            return JsonResponse({'status': 'error', 'message': 'Missing mechanic information'}, status=400)
+
+        user_id = await sync_to_async(request_user_id)(request)
+        await log_activity(request, user_id, 'call', f'Called mechanic: {mechanic_name} (ID: {mechanic_id})')
+        return JsonResponse({'status': 'success', 'message': 'Call logged successfully'})
+
+    except (json.JSONDecodeError, KeyError) as e:
+        logger.error(f"Log call API error: {str(e)}")
+        return JsonResponse({'status': 'error', 'message': 'Invalid request data'}, status=400)
@@ -0,0 +1,120 @@
+import hashlib
+import logging
+import math
+
+import numpy as np
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Page, Paginator
+
+from .geo import distance_km, distances_km
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'mechanics:version'
+
+
+def mechanics_version():
+    """Current generation of the mechanic data; part of every cache key."""
+    return cache.get_or_set(VERSION_KEY, 1, None)
+
+
+def invalidate_mechanic_caches():
+    """Bump the generation so every cached mechanic result is ignored."""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 2, None)
+
+
+def make_key(namespace, *parts):
+    """Build a versioned cache key from request parameters."""
+    raw = '|'.join(str(part) for part in parts)
+    digest = hashlib.md5(raw.encode('utf-8')).hexdigest()
+    return f'mechanics:{namespace}:v{mechanics_version()}:{digest}'
+
+
+def record(namespace, hit):
+    """Count a cache hit or miss for ``namespace``."""
+    key = f'mechanics:stats:{namespace}:{"hits" if hit else "misses"}'
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+
+def cache_stats(namespace):
+    """Return hit/miss counters and the hit ratio for ``namespace``."""
+    hits = cache.get(f'mechanics:stats:{namespace}:hits', 0)
+    misses = cache.get(f'mechanics:stats:{namespace}:misses', 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / total, 3) if total else 0.0,
+    }
+
+
+def get_cached_page(namespace, queryset, page_number, per_page, key_parts):
+    """Paginate ``queryset`` through the cache.
+
+    The page's objects and the total count are stored together, so a hit
+    serves the page without any COUNT or SELECT.
+    """
+    key = make_key(namespace, page_number, per_page, *key_parts)
+    entry = cache.get(key)
+    paginator = Paginator(queryset, per_page)
+
+    if entry is None:
+        record(namespace, hit=False)
+        page = paginator.get_page(page_number)
+        entry = {
+            'objects': list(page.object_list),
+            'number': page.number,
+            'count': paginator.count,
+        }
+        cache.set(key, entry, getattr(settings, 'LIST_CACHE_TIMEOUT', 300))
+    else:
+        record(namespace, hit=True)
+        # Paginator.count is a cached_property; seeding it skips the COUNT query
+        paginator.count = entry['count']
+
+    return Page(entry['objects'], entry['number'], paginator)
+
+
+def cached_radius_search(lat, lng, radius_km, min_rating=0):
+    """Radius search through a cache shared by every point in the same grid cell.
+
+    Locations are snapped to cells of ``SEARCH_CACHE_CELL_SIZE`` degrees.
+    On a miss the spatial backend fills the cell with the shops within
+    ``radius_km`` plus the cell's half-diagonal of the cell centre, a
+    superset of the matches for any point in the cell. Each request then
+    measures its exact distances over that short list. Returns
+    ``(mechanic_id, distance_km)`` pairs, nearest first.
+    """
+    from .spatial_index import get_spatial_backend
+
+    size = getattr(settings, 'SEARCH_CACHE_CELL_SIZE', 0.01)
+    row, col = math.floor(lat / size), math.floor(lng / size)
+    key = make_key('search', row, col, radius_km, min_rating)
+    entry = cache.get(key)
+    record('search', hit=entry is not None)
+
+    if entry is None:
+        center_lat, center_lng = (row + 0.5) * size, (col + 0.5) * size
+        # The corner nearer the equator is the furthest from the centre
+        corner_lat = row * size if abs(row * size) < abs((row + 1) * size) else (row + 1) * size
+        margin = distance_km(center_lat, center_lng, corner_lat, col * size) * 1.01
+        backend = get_spatial_backend()
+        matches = backend.query_radius(center_lat, center_lng, radius_km + margin, min_rating=min_rating)
+        ids, lats, lngs = backend.coordinates([mechanic_id for mechanic_id, _ in matches])
+        entry = {'ids': ids, 'lats': lats, 'lngs': lngs}
+        cache.set(key, entry, getattr(settings, 'SEARCH_CACHE_TIMEOUT', 300))
+
+    distances = distances_km(lat, lng, entry['lats'], entry['lngs'])
+    within = distances <= radius_km
+    ids, distances = entry['ids'][within], distances[within]
+    order = np.lexsort((ids, distances))
+    return list(zip(ids[order].tolist(), distances[order].tolist()))
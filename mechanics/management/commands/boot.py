@@ -0,0 +1,185 @@
+import hashlib
+import io
+import json
+import os
+import time
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.staticfiles.finders import get_finders
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.loader import MigrationLoader
+
+STEPS = ['makemigrations', 'migrate', 'superuser', 'sample_data', 'collectstatic']
+
+# The site still serves requests without these, so a failure only warns
+OPTIONAL_STEPS = {'superuser', 'sample_data', 'collectstatic'}
+
+
+def digest(*parts):
+    sha = hashlib.sha256()
+    for part in parts:
+        sha.update(str(part).encode('utf-8'))
+        sha.update(b'\0')
+    return sha.hexdigest()
+
+
+def file_digest(path, sha=None):
+    sha = sha or hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            sha.update(chunk)
+    return sha
+
+
+class Command(BaseCommand):
+    help = 'Prepare the database and static files in one process, skipping steps whose inputs are unchanged'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Run every step even if its fingerprint is unchanged'
+        )
+        parser.add_argument(
+            '--skip',
+            action='append',
+            choices=STEPS,
+            default=[],
+            help='Step to leave out (repeatable)'
+        )
+        parser.add_argument(
+            '--state-file',
+            default=getattr(settings, 'BOOT_STATE_FILE', '.boot_state.json'),
+            help='JSON file holding the fingerprint of each completed step'
+        )
+
+    def handle(self, *args, **options):
+        state_file = Path(options['state_file'])
+        state = self.read_state(state_file)
+        started = time.monotonic()
+
+        for name in STEPS:
+            step_started = time.monotonic()
+            if name in options['skip']:
+                self.stdout.write(f'{name}: skipped (--skip)')
+                continue
+
+            fingerprint = getattr(self, f'fingerprint_{name}')()
+            if fingerprint is None:
+                self.stdout.write(f'{name}: nothing to do ({time.monotonic() - step_started:.2f}s)')
+                continue
+            if not options['force'] and state.get(name) == fingerprint:
+                self.stdout.write(f'{name}: unchanged, skipped ({time.monotonic() - step_started:.2f}s)')
+                continue
+
+            try:
+                getattr(self, f'run_{name}')()
+            except Exception as e:
+                if name not in OPTIONAL_STEPS:
+                    raise CommandError(f'{name} failed: {str(e)}')
+                # Not recorded, so the step is retried on the next boot
+                self.stderr.write(self.style.WARNING(f'{name} failed, continuing: {str(e)}'))
+                continue
+            # Fingerprint again: the step itself changes what it depends on
+            state[name] = getattr(self, f'fingerprint_{name}')()
+            self.write_state(state_file, state)
+            self.stdout.write(self.style.SUCCESS(f'{name}: done in {time.monotonic() - step_started:.2f}s'))
+
+        self.stdout.write(self.style.SUCCESS(f'Boot completed in {time.monotonic() - started:.2f}s'))
+
+    def read_state(self, state_file):
+        try:
+            with open(state_file, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def write_state(self, state_file, state):
+        temp_path = f'{state_file}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=2)
+        os.replace(temp_path, state_file)
+
+    def project_apps(self):
+        """App configs that live in this repository, not in site-packages."""
+        base_dir = str(settings.BASE_DIR)
+        return [config for config in apps.get_app_configs() if config.path.startswith(base_dir)]
+
+    def migration_loader(self):
+        return MigrationLoader(connections[DEFAULT_DB_ALIAS], ignore_no_migrations=True)
+
+    def fingerprint_makemigrations(self):
+        """Models source of the project apps plus the migration files that exist."""
+        sha = hashlib.sha256()
+        for config in self.project_apps():
+            if config.models_module is not None:
+                file_digest(config.models_module.__file__, sha)
+        sha.update(digest(*sorted(self.migration_loader().graph.nodes)).encode('utf-8'))
+        return sha.hexdigest()
+
+    def run_makemigrations(self):
+        call_command('makemigrations', interactive=False, verbosity=0)
+
+    def fingerprint_migrate(self):
+        """The migration graph and the migrations recorded as applied in the database."""
+        loader = self.migration_loader()
+        return digest(
+            settings.DATABASES[DEFAULT_DB_ALIAS]['NAME'],
+            *sorted(loader.graph.nodes),
+            '|',
+            *sorted(loader.applied_migrations),
+        )
+
+    def run_migrate(self):
+        call_command('migrate', interactive=False, verbosity=0)
+
+    def fingerprint_superuser(self):
+        """Only needed when no superuser exists yet and credentials are configured."""
+        from django.contrib.auth import get_user_model
+
+        if get_user_model().objects.filter(is_superuser=True).exists():
+            return None
+        # createsuperuser --noinput needs every one of these
+        names = ['DJANGO_SUPERUSER_USERNAME', 'DJANGO_SUPERUSER_EMAIL', 'DJANGO_SUPERUSER_PASSWORD']
+        if not all(os.environ.get(name) for name in names):
+            return None
+        return 'missing'
+
+    def run_superuser(self):
+        # Reads DJANGO_SUPERUSER_USERNAME, DJANGO_SUPERUSER_EMAIL and DJANGO_SUPERUSER_PASSWORD
+        call_command('createsuperuser', interactive=False, verbosity=0)
+
+    def fingerprint_sample_data(self):
+        """The loader's source, and whether the database already holds mechanics."""
+        from mechanics.management.commands import populate_sample_data
+        from mechanics.models import Mechanic
+
+        return digest(
+            settings.DATABASES[DEFAULT_DB_ALIAS]['NAME'],
+            file_digest(populate_sample_data.__file__).hexdigest(),
+            Mechanic.objects.exists(),
+        )
+
+    def run_sample_data(self):
+        call_command('populate_sample_data', stdout=io.StringIO())
+
+    def fingerprint_collectstatic(self):
+        """Content of every static source file, and whether STATIC_ROOT exists."""
+        sha = hashlib.sha256()
+        sha.update(digest(settings.STATIC_ROOT, os.path.isdir(settings.STATIC_ROOT)).encode('utf-8'))
+        # The first finder to list a path wins, as in collectstatic
+        sources = {}
+        for finder in get_finders():
+            for path, storage in finder.list(['CVS', '.*', '*~']):
+                sources.setdefault(path, storage)
+        for path in sorted(sources):
+            sha.update(path.encode('utf-8'))
+            file_digest(sources[path].path(path), sha)
+        return sha.hexdigest()
+
+    def run_collectstatic(self):
+        call_command('collectstatic', interactive=False, verbosity=0)
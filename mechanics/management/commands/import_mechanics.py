@@ -0,0 +1,217 @@
+import csv
+import json
+import os
+import sys
+import time
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from mechanics.models import Mechanic
+from mechanics.search import rebuild_search_index
+from mechanics.signals import mechanics_bulk_updated
+
+# Column aliases, so files written by the admin CSV export can be re-imported
+COLUMN_ALIASES = {
+    'status': 'is_active',
+    'lat': 'latitude',
+    'lng': 'longitude',
+    'lon': 'longitude',
+    'phone': 'contact',
+    'hours': 'working_hours',
+}
+
+UPDATE_FIELDS = ['latitude', 'longitude', 'contact', 'rating', 'working_hours', 'is_active', 'updated_at']
+
+
+class Command(BaseCommand):
+    help = 'Import mechanic shops from CSV or NDJSON, upserting on name + address'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Input file, or '-' for stdin")
+        parser.add_argument(
+            '--format',
+            choices=['csv', 'ndjson'],
+            help='Input format (default: guessed from the file extension)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows per bulk upsert (default: 1000)'
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='File recording the last committed row, for resuming an interrupted import'
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Skip the rows already committed according to --checkpoint'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        batch_size = options['batch_size']
+        checkpoint = options['checkpoint']
+        input_format = options['format'] or ('ndjson' if path.endswith(('.ndjson', '.jsonl')) else 'csv')
+
+        if batch_size < 1:
+            raise CommandError('--batch-size must be at least 1')
+        if options['resume'] and not checkpoint:
+            raise CommandError('--resume requires --checkpoint')
+
+        skip = self.read_checkpoint(checkpoint, path) if options['resume'] else 0
+        if skip:
+            self.stdout.write(f'Resuming after row {skip}')
+
+        stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        try:
+            records = self.read_records(stream, input_format)
+            stats = self.import_records(records, batch_size, skip, checkpoint, path)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        # bulk_create sends no signals, so refresh derived data once at the end
+        if stats['imported']:
+            rebuild_search_index()
+            mechanics_bulk_updated(coordinates=True)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {stats['imported']} mechanics, skipped {stats['invalid']} invalid rows "
+                f"in {stats['elapsed']:.1f}s"
+            )
+        )
+
+    def read_records(self, stream, input_format):
+        """Yield ``(row_number, dict)`` pairs from the input stream."""
+        if input_format == 'ndjson':
+            for row_number, line in enumerate(stream, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield row_number, json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield row_number, e
+        else:
+            for row_number, row in enumerate(csv.DictReader(stream), start=1):
+                yield row_number, row
+
+    def clean_record(self, record):
+        """Validate one input record and return a ``Mechanic`` or raise ``ValueError``."""
+        if isinstance(record, Exception):
+            raise ValueError(f'malformed JSON: {record}')
+
+        data = {}
+        for key, value in record.items():
+            if key is None:
+                continue
+            key = key.strip().lower().replace(' ', '_')
+            data[COLUMN_ALIASES.get(key, key)] = value.strip() if isinstance(value, str) else value
+
+        name = data.get('name') or ''
+        address = data.get('address') or ''
+        if not name or not address:
+            raise ValueError('name and address are required')
+        if len(name) > 200:
+            raise ValueError('name is longer than 200 characters')
+
+        try:
+            latitude = Decimal(str(data.get('latitude'))).quantize(Decimal('0.000001'))
+            longitude = Decimal(str(data.get('longitude'))).quantize(Decimal('0.000001'))
+            rating = Decimal(str(data.get('rating') or 0)).quantize(Decimal('0.01'))
+        except (InvalidOperation, ValueError):
+            raise ValueError('latitude, longitude and rating must be numbers')
+        if not all(value.is_finite() for value in (latitude, longitude, rating)):
+            raise ValueError('latitude, longitude and rating must be finite')
+        if not -90 <= latitude <= 90 or not -180 <= longitude <= 180:
+            raise ValueError(f'coordinates out of range: {latitude}, {longitude}')
+        if not 0 <= rating <= 5:
+            raise ValueError(f'rating out of range: {rating}')
+
+        is_active = data.get('is_active', True)
+        if isinstance(is_active, str):
+            is_active = is_active.lower() not in ('0', 'false', 'no', 'inactive', '')
+
+        return Mechanic(
+            name=name,
+            address=address,
+            contact=str(data.get('contact') or '')[:20],
+            latitude=latitude,
+            longitude=longitude,
+            rating=rating,
+            working_hours=data.get('working_hours') or '',
+            is_active=bool(is_active),
+        )
+
+    def import_records(self, records, batch_size, skip, checkpoint, path):
+        started = time.monotonic()
+        stats = {'imported': 0, 'invalid': 0}
+        batch = {}
+        last_row = skip
+
+        for row_number, record in records:
+            if row_number <= skip:
+                continue
+            try:
+                mechanic = self.clean_record(record)
+            except ValueError as e:
+                stats['invalid'] += 1
+                if stats['invalid'] <= 20:
+                    self.stderr.write(f'Row {row_number}: {e}')
+                continue
+
+            # The last occurrence of a name + address within a batch wins
+            batch[(mechanic.name, mechanic.address)] = mechanic
+            last_row = row_number
+            if len(batch) >= batch_size:
+                stats['imported'] += self.flush(batch, checkpoint, path, last_row)
+                self.report(stats, last_row, started)
+                batch = {}
+
+        if batch:
+            stats['imported'] += self.flush(batch, checkpoint, path, last_row)
+            self.report(stats, last_row, started)
+
+        stats['elapsed'] = time.monotonic() - started
+        return stats
+
+    def flush(self, batch, checkpoint, path, last_row):
+        """Upsert one batch and record the checkpoint in the same step."""
+        with transaction.atomic():
+            Mechanic.objects.bulk_create(
+                batch.values(),
+                update_conflicts=True,
+                unique_fields=['name', 'address'],
+                update_fields=UPDATE_FIELDS,
+            )
+        self.write_checkpoint(checkpoint, path, last_row)
+        return len(batch)
+
+    def report(self, stats, last_row, started):
+        elapsed = time.monotonic() - started
+        rate = stats['imported'] / elapsed if elapsed else 0
+        self.stdout.write(
+            f"Row {last_row}: {stats['imported']} imported, {stats['invalid']} invalid ({rate:.0f} rows/s)"
+        )
+
+    def read_checkpoint(self, checkpoint, path):
+        if not os.path.exists(checkpoint):
+            return 0
+        with open(checkpoint, encoding='utf-8') as f:
+            state = json.load(f)
+        if state.get('source') != os.path.abspath(path):
+            raise CommandError(f"Checkpoint {checkpoint} belongs to {state.get('source')}")
+        return int(state.get('row', 0))
+
+    def write_checkpoint(self, checkpoint, path, last_row):
+        if not checkpoint:
+            return
+        temp_path = f'{checkpoint}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'source': os.path.abspath(path), 'row': last_row}, f)
+        os.replace(temp_path, checkpoint)
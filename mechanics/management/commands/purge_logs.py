@@ -0,0 +1,78 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from mechanics.retention import POLICIES, purge, report
+from mechanics.rollups import update_rollups
+
+
+class Command(BaseCommand):
+    help = 'Archive expired log rows to gzipped NDJSON and delete them in small batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many rows each policy would purge'
+        )
+        parser.add_argument(
+            '--model',
+            action='append',
+            dest='models',
+            help='Limit to a model label such as mechanics.ActivityLog (repeatable)'
+        )
+        parser.add_argument(
+            '--archive-dir',
+            default=getattr(settings, 'RETENTION_ARCHIVE_DIR', 'archives'),
+            help='Directory for the archive files'
+        )
+        parser.add_argument(
+            '--no-archive',
+            action='store_true',
+            help='Delete without writing archive files'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=getattr(settings, 'RETENTION_BATCH_SIZE', 1000),
+            help='Rows archived and deleted per transaction'
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0.0,
+            help='Seconds to sleep between batches to let other writers in'
+        )
+
+    def handle(self, *args, **options):
+        policies = POLICIES
+        if options['models']:
+            wanted = {label.lower() for label in options['models']}
+            policies = [policy for policy in POLICIES if policy.model_label.lower() in wanted]
+            if len(policies) != len(wanted):
+                known = ', '.join(policy.model_label for policy in POLICIES)
+                raise CommandError(f'Unknown model; choose from: {known}')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        if options['dry_run']:
+            for policy, count in report(policies):
+                self.stdout.write(
+                    f'{policy.model_label}: {count} rows older than {policy.days} days would be purged'
+                )
+            return
+
+        # Fold the raw logs into the analytics rollups before they disappear
+        update_rollups()
+
+        archive_dir = None if options['no_archive'] else options['archive_dir']
+        for policy in policies:
+            deleted, path = purge(
+                policy,
+                archive_dir=archive_dir,
+                batch_size=options['batch_size'],
+                pause=options['pause'],
+            )
+            message = f'{policy.model_label}: purged {deleted} rows'
+            if path:
+                message += f', archived to {path}'
+            self.stdout.write(self.style.SUCCESS(message))
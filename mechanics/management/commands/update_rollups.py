@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from mechanics.rollups import rebuild_rollups, update_rollups
+
+
+class Command(BaseCommand):
+    help = 'Aggregate new activity logs and search queries into the analytics rollup tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Recompute every rollup row whose raw logs have not been purged yet'
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        if options['rebuild']:
+            written = rebuild_rollups()
+        else:
+            written = update_rollups()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Wrote {written['activity']} activity and {written['search']} search rollup rows "
+                f"in {time.monotonic() - started:.1f}s"
+            )
+        )
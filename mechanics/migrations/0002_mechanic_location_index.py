@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mechanics', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='mechanic',
+            index=models.Index(fields=['is_active', 'latitude', 'longitude'], name='mechanic_active_lat_lng_idx'),
+        ),
+    ]
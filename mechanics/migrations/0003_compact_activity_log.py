@@ -0,0 +1,82 @@
+from django.db import migrations, models
+
+
+ACTION_CODES = {
+    'search': 1,
+    'view': 2,
+    'call': 3,
+    'filter': 4,
+    'login': 5,
+    'logout': 6,
+    'admin_action': 7,
+    'register': 8,
+    'contact': 9,
+    'profile_update': 10,
+}
+
+
+def encode_actions(apps, schema_editor):
+    ActivityLog = apps.get_model('mechanics', 'ActivityLog')
+    for name, code in ACTION_CODES.items():
+        ActivityLog.objects.filter(action=name).update(action_code=code)
+
+
+def decode_actions(apps, schema_editor):
+    ActivityLog = apps.get_model('mechanics', 'ActivityLog')
+    ActivityLog.objects.update(action='other')
+    for name, code in ACTION_CODES.items():
+        ActivityLog.objects.filter(action_code=code).update(action=name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mechanics', '0002_mechanic_location_index'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='activitylog',
+            old_name='details',
+            new_name='description',
+        ),
+        migrations.AddField(
+            model_name='activitylog',
+            name='user_agent',
+            field=models.CharField(blank=True, help_text="User's browser user agent", max_length=255),
+        ),
+        migrations.AddField(
+            model_name='activitylog',
+            name='action_code',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        # Give the old column a default so it can be re-added when migrating backwards
+        migrations.AlterField(
+            model_name='activitylog',
+            name='action',
+            field=models.CharField(default='other', max_length=20),
+        ),
+        migrations.RunPython(encode_actions, decode_actions),
+        migrations.RemoveField(
+            model_name='activitylog',
+            name='action',
+        ),
+        migrations.RenameField(
+            model_name='activitylog',
+            old_name='action_code',
+            new_name='action',
+        ),
+        migrations.AlterField(
+            model_name='activitylog',
+            name='action',
+            field=models.PositiveSmallIntegerField(choices=[(0, 'Other'), (1, 'Search for mechanics'), (2, 'View page'), (3, 'Call mechanic'), (4, 'Apply filters'), (5, 'User login'), (6, 'User logout'), (7, 'Admin action'), (8, 'User registration'), (9, 'Contact form submission'), (10, 'Profile update')], default=0, help_text='Type of action performed'),
+        ),
+        migrations.AddIndex(
+            model_name='activitylog',
+            index=models.Index(fields=['timestamp'], name='activitylog_timestamp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='activitylog',
+            index=models.Index(fields=['action', 'timestamp'], name='activitylog_action_ts_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS mechanics_mechanic_fts "
+            "USING fts5(name, address, contact, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        schema_editor.execute(
+            "INSERT INTO mechanics_mechanic_fts (rowid, name, address, contact) "
+            "SELECT id, name, address, contact FROM mechanics_mechanic"
+        )
+    elif vendor == 'postgresql':
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS mechanic_search_document_idx ON mechanics_mechanic USING GIN (("
+            "setweight(to_tsvector('simple', COALESCE(\"name\", '')), 'A') || "
+            "setweight(to_tsvector('simple', COALESCE(\"address\", '')), 'B') || "
+            "setweight(to_tsvector('simple', COALESCE(\"contact\", '')), 'C')))"
+        )
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS mechanic_name_trgm_idx ON mechanics_mechanic "
+            "USING GIN (\"name\" gin_trgm_ops)"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS mechanics_mechanic_fts")
+    elif vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS mechanic_search_document_idx")
+        schema_editor.execute("DROP INDEX IF EXISTS mechanic_name_trgm_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mechanics', '0003_compact_activity_log'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:42
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def check_duplicate_mechanics(apps, schema_editor):
+    """Refuse to add the constraint while shops share a name and address.
+
+    Nothing is deleted here: which row of a group to keep, and what to do
+    with the others, is left to an operator. Rename or remove the listed
+    shops (e.g. in the admin) and run migrate again.
+    """
+    Mechanic = apps.get_model('mechanics', 'Mechanic')
+    duplicates = Mechanic.objects.values('name', 'address').annotate(rows=Count('id')).filter(rows__gt=1)
+    groups = []
+    for duplicate in duplicates.order_by('name', 'address'):
+        ids = Mechanic.objects.filter(name=duplicate['name'], address=duplicate['address']).order_by('id')
+        ids = ', '.join(str(mechanic_id) for mechanic_id in ids.values_list('id', flat=True))
+        groups.append(f"  {duplicate['name']!r} at {duplicate['address']!r}: ids {ids}")
+    if groups:
+        raise RuntimeError(
+            'Cannot add unique_mechanic_name_address: these mechanics share a name and address. '
+            'Resolve them and run migrate again.\n' + '\n'.join(groups)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mechanics', '0004_mechanic_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicate_mechanics, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='mechanic',
+            constraint=models.UniqueConstraint(fields=('name', 'address'), name='unique_mechanic_name_address'),
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:50
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('mechanics', '0005_mechanic_unique_name_address'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField(help_text='Start of the hour')),
+                ('action', models.PositiveSmallIntegerField(choices=[(0, 'Other'), (1, 'Search for mechanics'), (2, 'View page'), (3, 'Call mechanic'), (4, 'Apply filters'), (5, 'User login'), (6, 'User logout'), (7, 'Admin action'), (8, 'User registration'), (9, 'Contact form submission'), (10, 'Profile update')])),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Activity Rollup',
+                'verbose_name_plural': 'Activity Rollups',
+                'ordering': ['-bucket'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ActivityUserRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(db_index=True)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Activity User Rollup',
+                'verbose_name_plural': 'Activity User Rollups',
+                'ordering': ['-day'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SearchRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(db_index=True)),
+                ('query_type', models.CharField(max_length=50)),
+                ('radius', models.IntegerField()),
+                ('user_location', models.CharField(max_length=100)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Search Rollup',
+                'verbose_name_plural': 'Search Rollups',
+                'ordering': ['-day'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='searchquery',
+            index=models.Index(fields=['timestamp'], name='searchquery_timestamp_idx'),
+        ),
+        migrations.AddField(
+            model_name='activityuserrollup',
+            name='user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='activityrollup',
+            constraint=models.UniqueConstraint(fields=('bucket', 'action'), name='unique_activity_rollup'),
+        ),
+    ]
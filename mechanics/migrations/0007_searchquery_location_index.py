@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mechanics', '0006_analytics_rollups'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='searchquery',
+            index=models.Index(fields=['user_location'], name='searchquery_location_idx'),
+        ),
+    ]
@@ -3,6 +3,21 @@ from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
 
+from .geo import bounding_box, distance_km
+
+
+class MechanicQuerySet(models.QuerySet):
+    """Query helpers for mechanic shops."""
+
+    def within_bbox(self, lat, lng, radius_km):
+        """Narrow to shops inside the bounding box of a search circle."""
+        min_lat, max_lat, min_lng, max_lng = bounding_box(float(lat), float(lng), radius_km)
+        queryset = self.filter(latitude__gte=min_lat, latitude__lte=max_lat)
+        if min_lng <= max_lng:
+            return queryset.filter(longitude__gte=min_lng, longitude__lte=max_lng)
+        # The box wraps around the antimeridian
+        return queryset.filter(models.Q(longitude__gte=min_lng) | models.Q(longitude__lte=max_lng))
+
 
 class Mechanic(models.Model):
     """Model for storing mechanic shop information."""
@@ -39,22 +54,25 @@ class Mechanic(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = MechanicQuerySet.as_manager()
+
     class Meta:
         ordering = ['-rating', 'name']
         verbose_name = "Mechanic Shop"
         verbose_name_plural = "Mechanic Shops"
+        indexes = [
+            models.Index(fields=['is_active', 'latitude', 'longitude'], name='mechanic_active_lat_lng_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['name', 'address'], name='unique_mechanic_name_address'),
+        ]
 
     def __str__(self):
         return f"{self.name} - {self.address}"
 
     def get_distance_from(self, lat, lng):
-        """Calculate distance from given coordinates using Haversine formula."""
-        from geopy.distance import geodesic
-        
-        shop_coords = (float(self.latitude), float(self.longitude))
-        user_coords = (float(lat), float(lng))
-        
-        return round(geodesic(shop_coords, user_coords).kilometers, 2)
+        """Calculate distance from given coordinates in kilometers."""
+        return round(distance_km(lat, lng, self.latitude, self.longitude), 2)
 
 
 class UserProfile(models.Model):
@@ -75,15 +93,19 @@ class UserProfile(models.Model):
 
 class ActivityLog(models.Model):
     """Model for storing user activity logs."""
-    ACTION_CHOICES = [
-        ('search', 'Search for mechanics'),
-        ('view', 'View mechanic details'),
-        ('call', 'Call mechanic'),
-        ('filter', 'Apply filters'),
-        ('login', 'User login'),
-        ('logout', 'User logout'),
-        ('admin_action', 'Admin action'),
-    ]
+
+    class Action(models.IntegerChoices):
+        OTHER = 0, 'Other'
+        SEARCH = 1, 'Search for mechanics'
+        VIEW = 2, 'View page'
+        CALL = 3, 'Call mechanic'
+        FILTER = 4, 'Apply filters'
+        LOGIN = 5, 'User login'
+        LOGOUT = 6, 'User logout'
+        ADMIN_ACTION = 7, 'Admin action'
+        REGISTER = 8, 'User registration'
+        CONTACT = 9, 'Contact form submission'
+        PROFILE_UPDATE = 10, 'Profile update'
 
     user = models.ForeignKey(
         User, 
@@ -92,20 +114,42 @@ class ActivityLog(models.Model):
         blank=True,
         help_text="User who performed the action (null for anonymous users)"
     )
-    action = models.CharField(max_length=20, choices=ACTION_CHOICES, help_text="Type of action performed")
-    details = models.TextField(blank=True, help_text="Additional details about the action")
+    action = models.PositiveSmallIntegerField(
+        choices=Action.choices,
+        default=Action.OTHER,
+        help_text="Type of action performed"
+    )
+    description = models.TextField(blank=True, help_text="Additional details about the action")
     ip_address = models.GenericIPAddressField(null=True, blank=True, help_text="User's IP address")
+    user_agent = models.CharField(max_length=255, blank=True, help_text="User's browser user agent")
     timestamp = models.DateTimeField(default=timezone.now, help_text="When the action occurred")
 
     class Meta:
         ordering = ['-timestamp']
         verbose_name = "Activity Log"
         verbose_name_plural = "Activity Logs"
+        indexes = [
+            models.Index(fields=['timestamp'], name='activitylog_timestamp_idx'),
+            models.Index(fields=['action', 'timestamp'], name='activitylog_action_ts_idx'),
+        ]
 
     def __str__(self):
         user_info = self.user.username if self.user else "Anonymous"
         return f"{user_info} - {self.get_action_display()} at {self.timestamp}"
 
+    @classmethod
+    def action_code(cls, action):
+        """Map an action name such as ``'search'`` to its stored code."""
+        try:
+            return cls.Action[action.upper()]
+        except KeyError:
+            return cls.Action.OTHER
+
+    @property
+    def action_name(self):
+        """Lower-case name of the action, e.g. ``'search'``."""
+        return self.Action(self.action).name.lower()
+
 
 class SearchQuery(models.Model):
     """Model for storing search queries for analytics."""
@@ -125,6 +169,60 @@ class SearchQuery(models.Model):
         ordering = ['-timestamp']
         verbose_name = "Search Query"
         verbose_name_plural = "Search Queries"
+        indexes = [
+            models.Index(fields=['timestamp'], name='searchquery_timestamp_idx'),
+            models.Index(fields=['user_location'], name='searchquery_location_idx'),
+        ]
 
     def __str__(self):
         return f"{self.query_type} search at {self.timestamp}"
+
+
+class ActivityRollup(models.Model):
+    """Hourly count of activity log rows per action."""
+    bucket = models.DateTimeField(help_text="Start of the hour")
+    action = models.PositiveSmallIntegerField(choices=ActivityLog.Action.choices)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-bucket']
+        verbose_name = "Activity Rollup"
+        verbose_name_plural = "Activity Rollups"
+        constraints = [
+            models.UniqueConstraint(fields=['bucket', 'action'], name='unique_activity_rollup'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_action_display()} at {self.bucket}: {self.count}"
+
+
+class ActivityUserRollup(models.Model):
+    """Daily count of activity log rows per user (null for anonymous users)."""
+    day = models.DateField(db_index=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-day']
+        verbose_name = "Activity User Rollup"
+        verbose_name_plural = "Activity User Rollups"
+
+    def __str__(self):
+        return f"{self.user_id or 'Anonymous'} on {self.day}: {self.count}"
+
+
+class SearchRollup(models.Model):
+    """Daily count of search queries per type, radius and location."""
+    day = models.DateField(db_index=True)
+    query_type = models.CharField(max_length=50)
+    radius = models.IntegerField()
+    user_location = models.CharField(max_length=100)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-day']
+        verbose_name = "Search Rollup"
+        verbose_name_plural = "Search Rollups"
+
+    def __str__(self):
+        return f"{self.query_type} searches on {self.day}: {self.count}"
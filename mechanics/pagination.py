@@ -0,0 +1,143 @@
+import bisect
+from decimal import Decimal
+
+from django.core import signing
+from django.db.models import Q
+
+CURSOR_SALT = 'mechanics.pagination.cursor'
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination token is malformed or was tampered with."""
+
+
+def encode_cursor(values, direction, scope=''):
+    """Pack a sort-key position into an opaque, signed token."""
+    values = [str(value) if isinstance(value, Decimal) else value for value in values]
+    return signing.dumps({'v': values, 'd': direction, 's': scope}, salt=CURSOR_SALT, compress=True)
+
+
+def decode_cursor(token, scope=''):
+    """Return ``(values, direction)`` from a token made by :func:`encode_cursor`."""
+    try:
+        data = signing.loads(token, salt=CURSOR_SALT)
+    except signing.BadSignature:
+        raise InvalidCursor('Invalid cursor')
+    if data.get('s') != scope or data.get('d') not in ('next', 'prev'):
+        raise InvalidCursor('Cursor does not match this query')
+    return data['v'], data['d']
+
+
+class KeysetPage:
+    """One page of keyset results with tokens for the neighbouring pages."""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        # Like Django's Page, so templates can index and |slice a page
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """Seek pagination over a queryset ordered by a unique set of fields.
+
+    ``ordering`` must end with a unique field (normally ``id``) so every
+    row has a distinct position. Pages are fetched with a ``WHERE`` on the
+    last seen key instead of ``OFFSET``, and no COUNT is issued.
+    """
+
+    def __init__(self, queryset, per_page, ordering, scope=''):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = list(ordering)
+        self.fields = [field.lstrip('-') for field in self.ordering]
+        self.scope = scope
+
+    def _seek(self, values, forward):
+        """Filter for rows strictly after (or before) ``values`` in sort order."""
+        condition = Q()
+        for index, field in enumerate(self.ordering):
+            descending = field.startswith('-')
+            name = field.lstrip('-')
+            lookup = 'gt' if descending != forward else 'lt'
+            step = Q(**{f'{name}__{lookup}': values[index]})
+            for previous, value in zip(self.fields[:index], values[:index]):
+                step &= Q(**{previous: value})
+            condition |= step
+        return condition
+
+    def _position(self, obj):
+        return [getattr(obj, field) for field in self.fields]
+
+    def page(self, cursor=None):
+        """Return the page after/before ``cursor``, or the first page."""
+        queryset = self.queryset
+        direction = 'next'
+        if cursor:
+            values, direction = decode_cursor(cursor, self.scope)
+            if len(values) != len(self.fields):
+                raise InvalidCursor('Cursor does not match this ordering')
+            queryset = queryset.filter(self._seek(values, forward=direction == 'next'))
+
+        if direction == 'next':
+            rows = list(queryset.order_by(*self.ordering)[:self.per_page + 1])
+        else:
+            reverse = [field[1:] if field.startswith('-') else f'-{field}' for field in self.ordering]
+            rows = list(queryset.order_by(*reverse)[:self.per_page + 1])
+
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if direction == 'prev':
+            rows.reverse()
+
+        has_next = has_more if direction == 'next' else bool(cursor)
+        has_previous = bool(cursor) if direction == 'next' else has_more
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = encode_cursor(self._position(rows[-1]), 'next', self.scope)
+        if rows and has_previous:
+            previous_cursor = encode_cursor(self._position(rows[0]), 'prev', self.scope)
+        return KeysetPage(rows, next_cursor, previous_cursor)
+
+
+def paginate_sorted(items, key, per_page, cursor=None, scope=''):
+    """Keyset-paginate an in-memory list already sorted by ``key``.
+
+    Used for computed orderings such as distance, where the sort key does
+    not exist as a column.
+    """
+    keys = [list(key(item)) for item in items]
+    start = 0
+    if cursor:
+        values, direction = decode_cursor(cursor, scope)
+        if direction == 'next':
+            start = bisect.bisect_right(keys, values)
+        else:
+            start = max(bisect.bisect_left(keys, values) - per_page, 0)
+
+    end = start + per_page
+    page_items = items[start:end]
+    next_cursor = previous_cursor = None
+    if page_items and end < len(items):
+        next_cursor = encode_cursor(keys[end - 1], 'next', scope)
+    if page_items and start > 0:
+        previous_cursor = encode_cursor(keys[start], 'prev', scope)
+    return KeysetPage(page_items, next_cursor, previous_cursor)
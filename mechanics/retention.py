@@ -0,0 +1,99 @@
+import gzip
+import json
+import os
+import time
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Now
+from django.utils import timezone
+
+
+class RetentionPolicy:
+    """How long rows of one model are kept, and which of them may be purged."""
+
+    def __init__(self, model_label, timestamp_field, days, condition=None):
+        self.model_label = model_label
+        self.timestamp_field = timestamp_field
+        self.days = days
+        self.condition = condition
+
+    @property
+    def model(self):
+        return apps.get_model(self.model_label)
+
+    def expired(self, now=None):
+        """Queryset of the rows past their retention period."""
+        cutoff = (now or timezone.now()) - timedelta(days=self.days)
+        queryset = self.model.objects.filter(**{f'{self.timestamp_field}__lt': cutoff})
+        if self.condition is not None:
+            queryset = queryset.filter(self.condition)
+        return queryset.order_by(self.timestamp_field, 'pk')
+
+
+POLICIES = [
+    RetentionPolicy('mechanics.ActivityLog', 'timestamp', getattr(settings, 'RETENTION_ACTIVITY_LOG_DAYS', 90)),
+    RetentionPolicy('mechanics.SearchQuery', 'timestamp', getattr(settings, 'RETENTION_SEARCH_QUERY_DAYS', 180)),
+    RetentionPolicy('otp_auth.LoginAttempt', 'attempt_time', getattr(settings, 'RETENTION_LOGIN_ATTEMPT_DAYS', 90)),
+    RetentionPolicy('otp_auth.UserSession', 'login_time', getattr(settings, 'RETENTION_USER_SESSION_DAYS', 90)),
+    # Only spent codes: used, or past their expiry
+    RetentionPolicy(
+        'otp_auth.OTPCode', 'created_at', getattr(settings, 'RETENTION_OTP_CODE_DAYS', 1),
+        condition=Q(is_used=True) | Q(expires_at__lt=Now()),
+    ),
+    # Only delivered or abandoned mail; pending rows wait for the outbox worker
+    RetentionPolicy(
+        'otp_auth.OutboundEmail', 'created_at', getattr(settings, 'RETENTION_OUTBOUND_EMAIL_DAYS', 7),
+        condition=Q(status__in=['sent', 'failed']),
+    ),
+]
+
+
+def report(policies=POLICIES, now=None):
+    """Return ``(policy, expired_count)`` pairs without touching any row."""
+    return [(policy, policy.expired(now).count()) for policy in policies]
+
+
+def purge(policy, archive_dir=None, batch_size=1000, pause=0.0, now=None):
+    """Archive and delete the expired rows of one policy, one batch at a time.
+
+    Each batch is appended to a gzipped NDJSON file before it is deleted in
+    its own short transaction, so a crash never loses rows that were not
+    archived and no write lock is held for longer than one batch. Returns
+    ``(deleted, archive_path)``.
+    """
+    model = policy.model
+    expired = policy.expired(now)
+    archive = path = None
+    if archive_dir:
+        os.makedirs(archive_dir, exist_ok=True)
+        stamp = timezone.now().strftime('%Y%m%dT%H%M%S')
+        path = os.path.join(archive_dir, f'{policy.model_label.lower()}-{stamp}.ndjson.gz')
+        archive = gzip.open(path, 'wt', encoding='utf-8')
+
+    deleted = 0
+    try:
+        while True:
+            ids = list(expired.values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                break
+            if archive is not None:
+                for row in model.objects.filter(pk__in=ids).order_by('pk').values():
+                    archive.write(json.dumps(row, cls=DjangoJSONEncoder) + '\n')
+                archive.flush()
+            with transaction.atomic():
+                deleted += model.objects.filter(pk__in=ids).delete()[0]
+            if pause:
+                time.sleep(pause)
+    finally:
+        if archive is not None:
+            archive.close()
+
+    if path and not deleted:
+        os.remove(path)
+        path = None
+    return deleted, path
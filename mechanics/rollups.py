@@ -0,0 +1,163 @@
+import logging
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, transaction
+from django.db.models import Count, Max, Min
+from django.db.models.functions import TruncDate, TruncHour
+from django.utils import timezone
+
+from .models import ActivityLog, ActivityRollup, ActivityUserRollup, SearchQuery, SearchRollup
+
+logger = logging.getLogger(__name__)
+
+
+def _start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _late_margin():
+    """How long after its timestamp a buffered row may still reach the table.
+
+    Writers flush every ``ACTIVITY_LOG_FLUSH_INTERVAL`` seconds; twice that
+    plus a minute leaves room for a slow or retried flush.
+    """
+    return timedelta(seconds=getattr(settings, 'ACTIVITY_LOG_FLUSH_INTERVAL', 5.0) * 2 + 60)
+
+
+def _retained_since(model_label, now):
+    """Start of the first day whose raw rows ``purge_logs`` has not touched yet."""
+    from .retention import POLICIES
+
+    days = next(policy.days for policy in POLICIES if policy.model_label == model_label)
+    cutoff = timezone.localtime(now - timedelta(days=days))
+    # The cutoff's own day may already be partly purged
+    return _start_of_day(cutoff.date() + timedelta(days=1))
+
+
+def _refresh(rollup, bucket_field, start, rows):
+    """Replace the rollup rows from ``start`` on with freshly aggregated ``rows``."""
+    with transaction.atomic():
+        rollup.objects.filter(**{f'{bucket_field}__gte': start}).delete()
+        created = rollup.objects.bulk_create([rollup(**row) for row in rows], batch_size=1000)
+    return len(created)
+
+
+def update_activity_rollups(now=None, since=None):
+    """Aggregate new activity log rows into the hourly and daily rollups.
+
+    Only the buckets from the latest rolled-up hour (or day), less the time
+    a buffered row may take to be flushed, are recomputed. Each run reads the
+    rows logged since the previous run plus the buckets late rows can still
+    land in. ``since`` forces the recount to start at that time instead.
+    """
+    now = now or timezone.now()
+    written = 0
+
+    start = since
+    if start is None:
+        latest = ActivityRollup.objects.aggregate(latest=Max('bucket'))['latest']
+        if latest is not None:
+            start = latest - _late_margin()
+        else:
+            start = ActivityLog.objects.aggregate(earliest=Min('timestamp'))['earliest']
+    if start is not None:
+        start = timezone.localtime(start).replace(minute=0, second=0, microsecond=0)
+        rows = ActivityLog.objects.filter(timestamp__gte=start, timestamp__lt=now).annotate(
+            bucket=TruncHour('timestamp')
+        ).values('bucket', 'action').annotate(count=Count('id')).order_by()
+        written += _refresh(ActivityRollup, 'bucket', start, rows)
+
+    day = timezone.localtime(since).date() if since else None
+    if day is None:
+        latest = ActivityUserRollup.objects.aggregate(latest=Max('day'))['latest']
+        if latest is not None:
+            day = timezone.localtime(_start_of_day(latest) - _late_margin()).date()
+        else:
+            earliest = ActivityLog.objects.aggregate(earliest=Min('timestamp'))['earliest']
+            day = timezone.localtime(earliest).date() if earliest else None
+    if day is not None:
+        rows = ActivityLog.objects.filter(timestamp__gte=_start_of_day(day), timestamp__lt=now).annotate(
+            day=TruncDate('timestamp')
+        ).values('day', 'user_id').annotate(count=Count('id')).order_by()
+        written += _refresh(ActivityUserRollup, 'day', day, rows)
+
+    return written
+
+
+def update_search_rollups(now=None, since=None):
+    """Aggregate new search queries into the daily search rollup."""
+    now = now or timezone.now()
+    day = timezone.localtime(since).date() if since else None
+    if day is None:
+        latest = SearchRollup.objects.aggregate(latest=Max('day'))['latest']
+        if latest is not None:
+            day = timezone.localtime(_start_of_day(latest) - _late_margin()).date()
+        else:
+            earliest = SearchQuery.objects.aggregate(earliest=Min('timestamp'))['earliest']
+            if earliest is None:
+                return 0
+            day = timezone.localtime(earliest).date()
+
+    rows = SearchQuery.objects.filter(timestamp__gte=_start_of_day(day), timestamp__lt=now).annotate(
+        day=TruncDate('timestamp')
+    ).values('day', 'query_type', 'radius', 'user_location').annotate(count=Count('id')).order_by()
+    return _refresh(SearchRollup, 'day', day, rows)
+
+
+def update_rollups(now=None):
+    """Bring every analytics rollup up to date; returns the rows written per table."""
+    now = now or timezone.now()
+    return {
+        'activity': update_activity_rollups(now),
+        'search': update_search_rollups(now),
+    }
+
+
+def refresh_rollups(max_age=None):
+    """Update the rollups unless another request did so in the last ``max_age`` seconds.
+
+    The analytics pages call this before reading, so they include the rows
+    logged since the last run without a scheduled ``update_rollups`` job.
+    Returns the rows written, or ``None`` when the rollups were fresh enough.
+    """
+    if max_age is None:
+        max_age = getattr(settings, 'ROLLUP_REFRESH_SECONDS', 300)
+    if max_age and not cache.add('mechanics:rollups:refreshed', True, max_age):
+        return None
+    try:
+        return update_rollups()
+    except DatabaseError as e:
+        # A concurrent refresh rewrote the same buckets; its rows are just as fresh
+        logger.error(f"Failed to refresh rollups: {str(e)}")
+        return None
+
+
+def rebuild_rollups(now=None):
+    """Recompute the rollups from the raw logs that are still complete.
+
+    ``purge_logs`` deletes raw rows once their retention period is over,
+    so only the days inside it are recomputed; older rollup rows are kept
+    as they are, since they can no longer be rebuilt. Tables without any
+    such older rows are rebuilt from the earliest raw row.
+    """
+    now = now or timezone.now()
+
+    since = _retained_since('mechanics.ActivityLog', now)
+    keep = (
+        ActivityRollup.objects.filter(bucket__lt=since).exists()
+        or ActivityUserRollup.objects.filter(day__lt=since.date()).exists()
+    )
+    if not keep:
+        ActivityRollup.objects.all().delete()
+        ActivityUserRollup.objects.all().delete()
+    activity = update_activity_rollups(now, since=since if keep else None)
+
+    since = _retained_since('mechanics.SearchQuery', now)
+    keep = SearchRollup.objects.filter(day__lt=since.date()).exists()
+    if not keep:
+        SearchRollup.objects.all().delete()
+    search = update_search_rollups(now, since=since if keep else None)
+
+    return {'activity': activity, 'search': search}
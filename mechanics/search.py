@@ -0,0 +1,131 @@
+import logging
+import re
+
+from django.db import OperationalError, connection
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = 'mechanics_mechanic_fts'
+
+# Column weights for bm25/ts_rank: name matters most, then address, then contact
+SQLITE_RANK = f'bm25({FTS_TABLE}, 10.0, 5.0, 1.0)'
+POSTGRES_DOCUMENT = (
+    "setweight(to_tsvector('simple', COALESCE(\"mechanics_mechanic\".\"name\", '')), 'A') || "
+    "setweight(to_tsvector('simple', COALESCE(\"mechanics_mechanic\".\"address\", '')), 'B') || "
+    "setweight(to_tsvector('simple', COALESCE(\"mechanics_mechanic\".\"contact\", '')), 'C')"
+)
+
+_fts_available = False
+
+
+def _no_rank():
+    return RawSQL('0', (), output_field=FloatField())
+
+
+def _terms(query):
+    return re.findall(r'\w+', query.lower())
+
+
+def fts_available():
+    """Whether the SQLite FTS5 shadow table exists in this database."""
+    global _fts_available
+    if connection.vendor != 'sqlite':
+        return False
+    # Only a positive answer is cached; the table may appear once migrations run
+    if not _fts_available:
+        _fts_available = FTS_TABLE in connection.introspection.table_names()
+    return _fts_available
+
+
+def rank_ordering():
+    """Ordering that puts the best text matches first."""
+    if connection.vendor == 'postgresql':
+        return ('-rank', 'id')
+    if fts_available():
+        return ('rank', 'id')
+    return ('name', 'id')
+
+
+def text_search(queryset, query):
+    """Filter ``queryset`` to mechanics matching ``query`` and annotate ``rank``.
+
+    Every term is matched as a prefix against name, address and contact.
+    SQLite uses the FTS5 shadow table, PostgreSQL a weighted ``tsvector``
+    plus trigram similarity on the name, and other backends fall back to
+    ``icontains``.
+    """
+    terms = _terms(query)
+    if not terms:
+        return queryset.annotate(rank=_no_rank())
+
+    if connection.vendor == 'postgresql':
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        match = RawSQL(
+            f"({POSTGRES_DOCUMENT}) @@ to_tsquery('simple', %s) "
+            "OR \"mechanics_mechanic\".\"name\" %% %s",
+            (tsquery, query),
+            output_field=BooleanField(),
+        )
+        rank = RawSQL(
+            f"ts_rank({POSTGRES_DOCUMENT}, to_tsquery('simple', %s)) "
+            "+ similarity(\"mechanics_mechanic\".\"name\", %s)",
+            (tsquery, query),
+            output_field=FloatField(),
+        )
+        return queryset.filter(match).annotate(rank=rank)
+
+    if fts_available():
+        match = ' '.join(f'"{term}"*' for term in terms)
+        ids = RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', (match,))
+        rank = RawSQL(
+            f'SELECT {SQLITE_RANK} FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND rowid = "mechanics_mechanic"."id"',
+            (match,),
+            output_field=FloatField(),
+        )
+        return queryset.filter(id__in=ids).annotate(rank=rank)
+
+    condition = Q()
+    for term in terms:
+        condition &= Q(name__icontains=term) | Q(address__icontains=term) | Q(contact__icontains=term)
+    return queryset.filter(condition).annotate(rank=_no_rank())
+
+
+def index_mechanic(mechanic):
+    """Insert or refresh one mechanic in the SQLite shadow table."""
+    if not fts_available():
+        return
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [mechanic.id])
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, name, address, contact) VALUES (%s, %s, %s, %s)',
+                [mechanic.id, mechanic.name, mechanic.address, mechanic.contact],
+            )
+    except OperationalError as e:
+        logger.error(f"Failed to index mechanic {mechanic.id} for search: {str(e)}")
+
+
+def unindex_mechanic(mechanic_id):
+    """Remove one mechanic from the SQLite shadow table."""
+    if not fts_available():
+        return
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [mechanic_id])
+    except OperationalError as e:
+        logger.error(f"Failed to remove mechanic {mechanic_id} from search: {str(e)}")
+
+
+def rebuild_search_index():
+    """Repopulate the SQLite shadow table from the mechanic table."""
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, name, address, contact) '
+            'SELECT id, name, address, contact FROM mechanics_mechanic'
+        )
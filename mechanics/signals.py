@@ -0,0 +1,38 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from .cache import invalidate_mechanic_caches
+from .models import Mechanic
+from .search import index_mechanic, unindex_mechanic
+from .spatial_index import mechanic_index
+from .stats import dashboard_stats
+
+
+# Sent after bulk writes; ``coordinates`` is true when shops may have moved
+mechanics_changed = Signal()
+
+
+def mechanics_bulk_updated(coordinates=False):
+    """Refresh derived data after ``queryset.update()``, which sends no signals."""
+    mechanic_index.invalidate()
+    invalidate_mechanic_caches()
+    dashboard_stats.changed()
+    mechanics_changed.send(sender=Mechanic, coordinates=coordinates)
+
+
+@receiver(post_save, sender=Mechanic)
+def refresh_on_save(sender, instance, **kwargs):
+    """Keep the spatial index, text index, cached results and dashboard stats in sync."""
+    mechanic_index.update(instance)
+    index_mechanic(instance)
+    invalidate_mechanic_caches()
+    dashboard_stats.changed()
+
+
+@receiver(post_delete, sender=Mechanic)
+def refresh_on_delete(sender, instance, **kwargs):
+    """Drop deleted mechanics from the spatial index, text index and cached results."""
+    mechanic_index.remove(instance.id)
+    unindex_mechanic(instance.id)
+    invalidate_mechanic_caches()
+    dashboard_stats.changed()
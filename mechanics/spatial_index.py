@@ -0,0 +1,310 @@
+import logging
+import math
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+
+from .geo import EARTH_RADIUS_KM, bounding_box, distances_km
+
+logger = logging.getLogger(__name__)
+
+
+class MechanicIndex:
+    """Per-process grid index over the coordinates of active mechanic shops.
+
+    Shops are bucketed into square cells of ``cell_size`` degrees so a radius
+    query only measures the shops in the cells overlapping the search circle.
+    Coordinates are kept as float64 arrays sorted by cell, so the distances of
+    all candidates are computed in one vectorized call. Single-row updates are
+    applied to a dict and the arrays are recompiled lazily on the next query.
+    """
+
+    def __init__(self, cell_size=0.1, ttl=None):
+        self.cell_size = cell_size
+        self.ttl = ttl
+        self._columns = int(math.ceil(360 / cell_size))
+        self._lock = threading.RLock()
+        self._points = {}
+        self._built_at = None
+        self._compile()
+
+    def _cell(self, lat, lng):
+        row = int(math.floor((lat + 90) / self.cell_size))
+        col = int(math.floor((lng + 180) / self.cell_size)) % self._columns
+        return row, col
+
+    def _compile(self):
+        """Rebuild the cell-sorted coordinate arrays from the point dict."""
+        count = len(self._points)
+        ids = np.fromiter(self._points.keys(), dtype=np.int64, count=count)
+        values = np.array(list(self._points.values()), dtype=np.float64).reshape(count, 3)
+        rows = np.floor((values[:, 0] + 90) / self.cell_size).astype(np.int64)
+        cols = np.floor((values[:, 1] + 180) / self.cell_size).astype(np.int64) % self._columns
+        keys = rows * self._columns + cols
+
+        order = np.argsort(keys, kind='stable')
+        self.ids = ids[order]
+        self.lats = values[order, 0]
+        self.lngs = values[order, 1]
+        self.ratings = values[order, 2]
+
+        cell_keys, starts, counts = np.unique(keys[order], return_index=True, return_counts=True)
+        self._slices = {
+            key: (start, start + size)
+            for key, start, size in zip(cell_keys.tolist(), starts.tolist(), counts.tolist())
+        }
+        self._dirty = False
+
+    def _is_stale(self):
+        if self._built_at is None:
+            return True
+        return self.ttl is not None and time.monotonic() - self._built_at > self.ttl
+
+    def build(self):
+        """(Re)load every active mechanic from the database."""
+        from .models import Mechanic
+
+        rows = Mechanic.objects.filter(is_active=True).values_list(
+            'id', 'latitude', 'longitude', 'rating'
+        )
+        with self._lock:
+            self._points = {
+                mechanic_id: (float(lat), float(lng), float(rating))
+                for mechanic_id, lat, lng, rating in rows
+            }
+            self._compile()
+            self._built_at = time.monotonic()
+        logger.info(f"Spatial index built with {len(self._points)} mechanics")
+
+    def invalidate(self):
+        """Force a rebuild on the next query."""
+        with self._lock:
+            self._built_at = None
+
+    def update(self, mechanic):
+        """Apply a single saved mechanic to the index."""
+        with self._lock:
+            if self._built_at is None:
+                return
+            self._points.pop(mechanic.id, None)
+            if mechanic.is_active:
+                self._points[mechanic.id] = (
+                    float(mechanic.latitude),
+                    float(mechanic.longitude),
+                    float(mechanic.rating),
+                )
+            self._dirty = True
+
+    def remove(self, mechanic_id):
+        """Drop a deleted mechanic from the index."""
+        with self._lock:
+            if self._built_at is not None and self._points.pop(mechanic_id, None) is not None:
+                self._dirty = True
+
+    def _candidate_cells(self, lat, lng, radius_km):
+        """Yield the cells overlapping the bounding box of the search circle."""
+        min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius_km)
+        min_row, min_col = self._cell(min_lat, min_lng)
+        max_row, max_col = self._cell(max_lat, max_lng)
+        if min_lng == -180.0 and max_lng == 180.0:
+            columns = range(self._columns)
+        else:
+            span = (max_col - min_col) % self._columns
+            columns = [(min_col + offset) % self._columns for offset in range(span + 1)]
+
+        for row in range(min_row, max_row + 1):
+            for col in columns:
+                yield row, col
+
+    def _ensure_ready(self):
+        if self._is_stale():
+            self.build()
+        elif self._dirty:
+            self._compile()
+
+    def candidates(self, lat, lng, radius_km):
+        """Return array positions of the shops in the cells around the circle."""
+        slices = []
+        for row, col in self._candidate_cells(lat, lng, radius_km):
+            cell_slice = self._slices.get(row * self._columns + col)
+            if cell_slice is not None:
+                slices.append(np.arange(*cell_slice))
+        if not slices:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(slices)
+
+    def query_radius(self, lat, lng, radius_km, min_rating=0, mode=None):
+        """Return ``(mechanic_id, distance_km)`` pairs within the radius, nearest first."""
+        with self._lock:
+            self._ensure_ready()
+            positions = self.candidates(lat, lng, radius_km)
+            if min_rating:
+                positions = positions[self.ratings[positions] >= min_rating]
+            distances = distances_km(lat, lng, self.lats[positions], self.lngs[positions], mode=mode)
+            ids = self.ids[positions]
+
+        within = distances <= radius_km
+        ids, distances = ids[within], distances[within]
+        order = np.argsort(distances, kind='stable')
+        return list(zip(ids[order].tolist(), distances[order].tolist()))
+
+    def coordinates(self, mechanic_ids):
+        """Return ``(ids, lats, lngs)`` arrays for those of ``mechanic_ids`` in the index."""
+        with self._lock:
+            self._ensure_ready()
+            points = [(mechanic_id, self._points[mechanic_id]) for mechanic_id in mechanic_ids
+                      if mechanic_id in self._points]
+        return (
+            np.array([mechanic_id for mechanic_id, _ in points], dtype=np.int64),
+            np.array([point[0] for _, point in points], dtype=np.float64),
+            np.array([point[1] for _, point in points], dtype=np.float64),
+        )
+
+    def query_bbox(self, min_lat, max_lat, min_lng, max_lng, min_rating=0):
+        """Return ``(ids, lats, lngs)`` arrays of the shops inside a lat/lng box.
+
+        Small boxes are answered from the cells they cover; boxes spanning
+        more cells than there are shops scan the arrays directly.
+        """
+        with self._lock:
+            self._ensure_ready()
+            min_row, min_col = self._cell(min_lat, min_lng)
+            max_row = self._cell(max_lat, max_lng)[0]
+            # No wrap-around here: a box ending at 180 degrees ends in the last column
+            max_col = min(int(math.floor((max_lng + 180) / self.cell_size)), self._columns - 1)
+            cells = (max_row - min_row + 1) * (max_col - min_col + 1)
+            if cells > self.ids.size:
+                positions = np.arange(self.ids.size)
+            else:
+                slices = []
+                for row in range(min_row, max_row + 1):
+                    for col in range(min_col, max_col + 1):
+                        cell_slice = self._slices.get(row * self._columns + col)
+                        if cell_slice is not None:
+                            slices.append(np.arange(*cell_slice))
+                positions = np.concatenate(slices) if slices else np.empty(0, dtype=np.int64)
+
+            lats, lngs = self.lats[positions], self.lngs[positions]
+            inside = (lats >= min_lat) & (lats <= max_lat) & (lngs >= min_lng) & (lngs <= max_lng)
+            if min_rating:
+                inside &= self.ratings[positions] >= min_rating
+            return self.ids[positions][inside], lats[inside], lngs[inside]
+
+    def _ring(self, row, col, radius):
+        """Return ``(rows, cols)`` arrays of the cells exactly ``radius`` cells from a cell."""
+        if radius == 0:
+            return np.array([row]), np.array([col])
+        span = np.arange(-radius, radius + 1)
+        sides = np.arange(-radius + 1, radius)
+        rows = np.concatenate([
+            np.full(span.size, row - radius), np.full(span.size, row + radius), row + sides, row + sides,
+        ])
+        cols = np.concatenate([
+            col + span, col + span, np.full(sides.size, col - radius), np.full(sides.size, col + radius),
+        ])
+        valid = (rows >= 0) & (rows * self.cell_size <= 180)
+        return rows[valid], cols[valid] % self._columns
+
+    def _cell_bounds(self, lat, lng, rows, cols):
+        """Lower bound in km on the distance from a point to anything in each cell.
+
+        The bound is the larger of the latitude gap along a meridian and the
+        cross-track distance to the nearest cell meridian, shrunk by 1% so it
+        also holds for the ellipsoidal distance modes.
+        """
+        size = self.cell_size
+        south = rows * size - 90
+        lat_gap = np.maximum(np.maximum(south - lat, lat - (south + size)), 0)
+
+        west = cols * size - 180
+        east_gap = (west - lng) % 360
+        west_gap = (lng - (west + size)) % 360
+        inside = (lng - west) % 360 <= size
+        lng_gap = np.where(inside, 0, np.minimum(east_gap, west_gap))
+        far_gap = np.minimum(lng_gap + size, 180)
+
+        phi = math.radians(lat)
+        cross_track = np.minimum(
+            np.arcsin(np.clip(math.cos(phi) * np.sin(np.radians(lng_gap)), 0, 1)),
+            np.arcsin(np.clip(math.cos(phi) * np.sin(np.radians(far_gap)), 0, 1)),
+        )
+        bound = np.maximum(np.radians(lat_gap), cross_track) * EARTH_RADIUS_KM
+        return bound * 0.99
+
+    def query_nearest(self, lat, lng, k, min_rating=0, max_radius_km=None, mode=None):
+        """Return the ``k`` nearest ``(mechanic_id, distance_km)`` pairs, nearest first.
+
+        Cells are visited in square rings around the origin cell. After each
+        ring the search stops once ``k`` shops are known and no cell in the
+        next ring can hold anything closer than the k-th of them, so the work
+        depends on how far away the k-th shop is, not on the table size.
+        """
+        if k < 1:
+            return []
+        origin_row, origin_col = self._cell(lat, lng)
+        total_rows = int(math.ceil(180 / self.cell_size))
+        last_ring = max(origin_row, total_rows - 1 - origin_row, self._columns // 2)
+
+        with self._lock:
+            self._ensure_ready()
+            available = int(np.count_nonzero(self.ratings >= min_rating))
+            limit = min(k, available)
+            if not limit:
+                return []
+            best_ids = np.empty(0, dtype=np.int64)
+            best_distances = np.empty(0, dtype=np.float64)
+            seen = set()
+
+            for radius in range(last_ring + 1):
+                rows, cols = self._ring(origin_row, origin_col, radius)
+                slices = []
+                for key in (rows * self._columns + cols).tolist():
+                    cell_slice = self._slices.get(key)
+                    if cell_slice is not None and key not in seen:
+                        seen.add(key)
+                        slices.append(np.arange(*cell_slice))
+
+                if slices:
+                    positions = np.concatenate(slices)
+                    if min_rating:
+                        positions = positions[self.ratings[positions] >= min_rating]
+                    distances = distances_km(lat, lng, self.lats[positions], self.lngs[positions], mode=mode)
+                    best_ids = np.concatenate([best_ids, self.ids[positions]])
+                    best_distances = np.concatenate([best_distances, distances])
+                    if best_ids.size > limit:
+                        keep = np.argpartition(best_distances, limit - 1)[:limit]
+                        best_ids, best_distances = best_ids[keep], best_distances[keep]
+
+                if radius == last_ring:
+                    break
+                next_rows, next_cols = self._ring(origin_row, origin_col, radius + 1)
+                frontier = self._cell_bounds(lat, lng, next_rows, next_cols).min()
+                if max_radius_km is not None and frontier > max_radius_km:
+                    break
+                if best_ids.size >= limit and frontier > best_distances.max():
+                    break
+
+        if max_radius_km is not None:
+            within = best_distances <= max_radius_km
+            best_ids, best_distances = best_ids[within], best_distances[within]
+        order = np.lexsort((best_ids, best_distances))
+        return list(zip(best_ids[order].tolist(), best_distances[order].tolist()))
+
+    def __len__(self):
+        return len(self._points)
+
+
+mechanic_index = MechanicIndex(
+    cell_size=getattr(settings, 'SPATIAL_INDEX_CELL_SIZE', 0.1),
+    ttl=getattr(settings, 'SPATIAL_INDEX_TTL', 300),
+)
+
+
+def get_spatial_backend():
+    """Index for radius and nearest queries: the database when ``GEO_BACKEND`` is set."""
+    if getattr(settings, 'GEO_BACKEND', ''):
+        from mechanics_geo.queries import database_index
+        return database_index
+    return mechanic_index
@@ -0,0 +1,137 @@
+import logging
+import threading
+import time
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.db.models import Count, Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_KEY = 'mechanics:dashboard-stats'
+GROWTH_MONTHS = 12
+
+
+def _month_starts(now, months):
+    """Starts of the last ``months`` months, oldest first, then the start of next month."""
+    current = now.year * 12 + now.month - 1
+    return [
+        timezone.make_aware(datetime(index // 12, index % 12 + 1, 1))
+        for index in range(current - months + 1, current + 2)
+    ]
+
+
+def compute_stats():
+    """Compute every dashboard figure in one conditional-aggregation query.
+
+    Ratings are bucketed by whole stars and growth is counted for the last
+    twelve months, so all buckets are known up front and become filtered
+    COUNTs over a single scan. Only the five newest shops need a second query.
+    """
+    from .models import Mechanic
+
+    now = timezone.localtime()
+    months = _month_starts(now, GROWTH_MONTHS)
+
+    aggregates = {
+        'total': Count('id'),
+        'active': Count('id', filter=Q(is_active=True)),
+    }
+    for stars in range(5):
+        aggregates[f'rating_{stars}'] = Count('id', filter=Q(rating__gte=stars, rating__lt=stars + 1))
+    aggregates['rating_5'] = Count('id', filter=Q(rating__gte=5))
+    for index, (start, end) in enumerate(zip(months, months[1:])):
+        aggregates[f'month_{index}'] = Count('id', filter=Q(created_at__gte=start, created_at__lt=end))
+
+    row = Mechanic.objects.aggregate(**aggregates)
+    recent = list(
+        Mechanic.objects.order_by('-created_at').values('name', 'address', 'rating', 'created_at')[:5]
+    )
+
+    return {
+        'total_mechanics': row['total'],
+        'active_mechanics': row['active'],
+        'inactive_mechanics': row['total'] - row['active'],
+        'rating_stats': [
+            {'rating': stars, 'count': row[f'rating_{stars}']}
+            for stars in range(6) if row[f'rating_{stars}']
+        ],
+        'monthly_growth': [
+            {'month': months[index].date().isoformat(), 'count': row[f'month_{index}']}
+            for index in range(GROWTH_MONTHS)
+        ],
+        'recent_mechanics': recent,
+    }
+
+
+class StatsSnapshot:
+    """Dashboard statistics served from the cache and refreshed off the request path.
+
+    Reads return the stored snapshot, scheduling a refresh once it is older
+    than ``ttl`` seconds. Mechanic writes schedule a refresh too. Refreshes
+    run on a background thread, and writes arriving during a refresh queue
+    exactly one more. Only the very first read computes synchronously.
+    """
+
+    def __init__(self, ttl=60, background=True):
+        self.ttl = ttl
+        self.background = background
+        self._lock = threading.Lock()
+        self._running = False
+        self._pending = False
+
+    def get(self):
+        entry = cache.get(SNAPSHOT_KEY)
+        if entry is None:
+            return self.refresh()
+        if time.time() - entry['computed_at'] > self.ttl:
+            self.schedule()
+        return entry['stats']
+
+    def refresh(self):
+        stats = compute_stats()
+        stats['computed_at'] = timezone.now()
+        cache.set(SNAPSHOT_KEY, {'stats': stats, 'computed_at': time.time()}, None)
+        return stats
+
+    def changed(self):
+        """Mechanic data changed: refresh the snapshot if anyone has taken one."""
+        if cache.get(SNAPSHOT_KEY) is not None:
+            self.schedule()
+
+    def schedule(self):
+        """Refresh the snapshot soon, without blocking the caller."""
+        if not self.background:
+            self.refresh()
+            return
+        with self._lock:
+            if self._running:
+                self._pending = True
+                return
+            self._running = True
+        threading.Thread(target=self._run, name='dashboard-stats', daemon=True).start()
+
+    def _run(self):
+        try:
+            while True:
+                close_old_connections()
+                try:
+                    self.refresh()
+                except Exception as e:
+                    logger.error(f"Failed to refresh dashboard stats: {str(e)}")
+                with self._lock:
+                    if not self._pending:
+                        self._running = False
+                        return
+                    self._pending = False
+        finally:
+            close_old_connections()
+
+
+dashboard_stats = StatsSnapshot(
+    ttl=getattr(settings, 'DASHBOARD_STATS_TTL', 60),
+    background=getattr(settings, 'DASHBOARD_STATS_BACKGROUND', True),
+)
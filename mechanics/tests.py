@@ -0,0 +1,889 @@
+import csv
+import gzip
+import io
+import json
+import math
+import os
+import random
+import tempfile
+import time
+from datetime import timedelta
+from unittest import mock
+from urllib.parse import quote
+
+from asgiref.sync import sync_to_async
+from django.contrib import admin
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db.models import Count
+from django.db.models.functions import TruncMonth
+from django.test import AsyncRequestFactory, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from geopy.distance import geodesic
+
+from . import async_views, views
+from .cache import cache_stats, cached_radius_search, get_cached_page, mechanics_version
+from .geo import bounding_box, distance_km, distances_km
+from .management.commands.boot import Command as BootCommand
+from .models import ActivityLog, ActivityRollup, ActivityUserRollup, Mechanic, SearchQuery
+from .pagination import InvalidCursor, KeysetPaginator, paginate_sorted
+from .retention import POLICIES, purge
+from .rollups import rebuild_rollups, refresh_rollups, update_rollups
+from .search import fts_available, rank_ordering, text_search
+from .signals import mechanics_bulk_updated
+from .stats import StatsSnapshot, compute_stats, dashboard_stats
+from .spatial_index import mechanic_index
+from .views import activity_fields
+from .writers import WRITERS, BufferedWriter
+
+
+def point_at(origin, km, bearing):
+    """``(lat, lng)`` of the point ``km`` from ``origin`` along ``bearing`` degrees."""
+    destination = geodesic(kilometers=km).destination(origin, bearing)
+    return destination.latitude, destination.longitude
+
+
+def reset_search_state():
+    cache.clear()
+    mechanic_index.invalidate()
+
+
+def write_synchronously(testcase):
+    """Make every buffered writer insert on the calling thread for this test."""
+    for writer in WRITERS:
+        patcher = mock.patch.object(writer, 'enabled', False)
+        patcher.start()
+        testcase.addCleanup(patcher.stop)
+
+
+class DistanceEngineTests(SimpleTestCase):
+    """Check the vectorized distance engine against geopy's geodesic."""
+
+    def setUp(self):
+        rng = random.Random(42)
+        self.origin = (40.7128, -74.0060)
+        self.points = [
+            (self.origin[0] + rng.uniform(-2, 2), self.origin[1] + rng.uniform(-2, 2))
+            for _ in range(500)
+        ]
+        self.expected = [geodesic(self.origin, point).kilometers for point in self.points]
+
+    def assert_within(self, mode, max_relative_error):
+        lats = [lat for lat, _ in self.points]
+        lngs = [lng for _, lng in self.points]
+        result = distances_km(self.origin[0], self.origin[1], lats, lngs, mode=mode)
+        for actual, expected in zip(result, self.expected):
+            self.assertLessEqual(abs(actual - expected), expected * max_relative_error + 1e-6)
+
+    def test_lambert_matches_geodesic(self):
+        self.assert_within('lambert', 1e-4)
+
+    def test_haversine_matches_geodesic(self):
+        self.assert_within('haversine', 5e-3)
+
+    def test_scalar_distance(self):
+        self.assertEqual(distance_km(10, 20, 10, 20), 0.0)
+        self.assertAlmostEqual(
+            distance_km(51.5074, -0.1278, 48.8566, 2.3522),
+            geodesic((51.5074, -0.1278), (48.8566, 2.3522)).kilometers,
+            places=2,
+        )
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            distances_km(0, 0, [1], [1], mode='flat')
+
+
+class BoundingBoxTests(SimpleTestCase):
+    """The search box must enclose the whole search circle."""
+
+    def test_box_encloses_circle(self):
+        for origin in [(1, 10), (40.7, -74.0), (-33.9, 151.2), (64.1, -21.9)]:
+            min_lat, max_lat, min_lng, max_lng = bounding_box(origin[0], origin[1], 10)
+            for bearing in range(0, 360, 15):
+                lat, lng = point_at(origin, 9.99, bearing)
+                self.assertTrue(min_lat <= lat <= max_lat, (origin, bearing))
+                self.assertTrue(min_lng <= lng <= max_lng, (origin, bearing))
+
+    def test_box_wraps_antimeridian(self):
+        min_lat, max_lat, min_lng, max_lng = bounding_box(0, 179.95, 20)
+        self.assertGreater(min_lng, max_lng)
+
+
+class SearchApiTests(TestCase):
+    def setUp(self):
+        reset_search_state()
+        write_synchronously(self)
+
+    def create_mechanic(self, name, lat, lng, rating=4.0):
+        return Mechanic.objects.create(
+            name=name, address=f'{name} street', contact='555', latitude=round(lat, 6),
+            longitude=round(lng, 6), rating=rating, working_hours='9-5',
+        )
+
+    def search(self, **body):
+        response = self.client.post('/api/search/', json.dumps(body), content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_shop_near_the_edge_of_the_radius_is_found(self):
+        lat, lng = point_at((1, 10), 9.98, 0)
+        self.create_mechanic('Edge', lat, lng)
+        self.create_mechanic('Outside', *point_at((1, 10), 10.5, 90))
+
+        data = self.search(latitude=1, longitude=10, radius=10)
+        self.assertEqual([mechanic['name'] for mechanic in data['mechanics']], ['Edge'])
+
+    def test_results_are_sorted_and_filtered_by_rating(self):
+        self.create_mechanic('Far', *point_at((1, 10), 6, 45), rating=4.5)
+        self.create_mechanic('Near', *point_at((1, 10), 2, 180), rating=3.0)
+        self.create_mechanic('Mid', *point_at((1, 10), 4, 270), rating=5.0)
+
+        data = self.search(latitude=1, longitude=10, radius=10)
+        self.assertEqual([mechanic['name'] for mechanic in data['mechanics']], ['Near', 'Mid', 'Far'])
+        data = self.search(latitude=1, longitude=10, radius=10, rating=4)
+        self.assertEqual([mechanic['name'] for mechanic in data['mechanics']], ['Mid', 'Far'])
+
+    def test_zero_coordinates_are_a_location(self):
+        self.create_mechanic('Null Island', *point_at((0, 0), 1, 45))
+
+        data = self.search(latitude=0, longitude=0, radius=5)
+        self.assertEqual([mechanic['name'] for mechanic in data['mechanics']], ['Null Island'])
+        response = self.client.post(
+            '/api/nearest/', json.dumps({'latitude': 0, 'longitude': 0}), content_type='application/json'
+        )
+        self.assertEqual([mechanic['name'] for mechanic in response.json()['mechanics']], ['Null Island'])
+
+    def test_missing_or_out_of_range_location_is_rejected(self):
+        for path in ('/api/search/', '/api/nearest/'):
+            for body in ({'longitude': 10}, {'latitude': 91, 'longitude': 10}, {'latitude': 1, 'longitude': -180.5}):
+                response = self.client.post(path, json.dumps(body), content_type='application/json')
+                self.assertEqual(response.status_code, 400, (path, body))
+
+    @override_settings(SEARCH_LOG_SAMPLE_RATE=1, SEARCH_LOG_CELL_SIZE=0.01)
+    def test_every_search_is_logged_with_a_snapped_location(self):
+        self.create_mechanic('Near', *point_at((1.23456, 10.98765), 1, 0))
+
+        self.search(latitude=1.23456, longitude=10.98765, radius=5)
+        self.search(latitude=1.23456, longitude=10.98765, radius=5, rating=4)
+
+        rows = SearchQuery.objects.order_by('id').values_list('query_type', 'user_location', 'radius', 'results_count')
+        self.assertEqual(list(rows), [('distance', '1.235,10.985', 5, 1), ('rating', '1.235,10.985', 5, 1)])
+
+    @override_settings(SEARCH_LOG_SAMPLE_RATE=0)
+    def test_no_search_is_logged_at_a_zero_sample_rate(self):
+        self.search(latitude=1, longitude=10, radius=5)
+
+        self.assertFalse(SearchQuery.objects.exists())
+
+    def test_cache_miss_is_filled_from_the_spatial_backend(self):
+        for km in (1, 3, 5, 9):
+            self.create_mechanic(f'Shop {km}', *point_at((1, 10), km, km * 40))
+        expected = mechanic_index.query_radius(1.0012, 10.0034, 6)
+
+        with mock.patch.object(mechanic_index, 'query_radius', wraps=mechanic_index.query_radius) as query_radius:
+            self.assertEqual(cached_radius_search(1.0012, 10.0034, 6), expected)
+            self.assertEqual(cached_radius_search(1.0013, 10.0035, 6)[0][0], expected[0][0])
+        self.assertEqual(query_radius.call_count, 1)
+
+
+class PageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        write_synchronously(self)
+        for n in range(3):
+            Mechanic.objects.create(
+                name=f'Shop {n}', address=f'{n} Main St', contact='555', latitude=1, longitude=1,
+                rating=4, working_hours='9-5',
+            )
+
+    def page(self):
+        return get_cached_page('list', Mechanic.objects.order_by('name'), 1, 2, key_parts=('', '', 'name'))
+
+    def test_second_request_is_served_from_the_cache(self):
+        first = self.page()
+
+        with self.assertNumQueries(0):
+            second = self.page()
+            names = [mechanic.name for mechanic in second]
+        self.assertEqual(names, [mechanic.name for mechanic in first])
+        self.assertEqual(second.paginator.count, 3)
+        self.assertEqual(cache_stats('list'), {'hits': 1, 'misses': 1, 'hit_ratio': 0.5})
+
+    def test_list_view_reuses_the_cached_page(self):
+        self.client.get(reverse('mechanics:mechanic_list'))
+        self.client.get(reverse('mechanics:mechanic_list'))
+
+        self.assertEqual(cache_stats('list')['hits'], 1)
+
+    def test_saving_a_mechanic_invalidates_the_page(self):
+        self.page()
+        version = mechanics_version()
+        mechanic = Mechanic.objects.get(name='Shop 0')
+        mechanic.name = 'Renamed'
+        mechanic.save()
+
+        self.assertGreater(mechanics_version(), version)
+        self.assertEqual([mechanic.name for mechanic in self.page()], ['Renamed', 'Shop 1'])
+
+    def test_deleting_a_mechanic_invalidates_the_page(self):
+        self.page()
+        version = mechanics_version()
+        Mechanic.objects.get(name='Shop 0').delete()
+
+        self.assertGreater(mechanics_version(), version)
+        page = self.page()
+        self.assertEqual([mechanic.name for mechanic in page], ['Shop 1', 'Shop 2'])
+        self.assertEqual(page.paginator.count, 2)
+
+    def test_bulk_update_invalidates_the_page(self):
+        self.page()
+        version = mechanics_version()
+        Mechanic.objects.filter(name='Shop 0').update(name='Zulu')
+        mechanics_bulk_updated()
+
+        self.assertGreater(mechanics_version(), version)
+        self.assertEqual([mechanic.name for mechanic in self.page()], ['Shop 1', 'Shop 2'])
+
+
+class SpatialIndexSignalTests(TestCase):
+    """Saves and deletes must reach the built index without a rebuild."""
+
+    def setUp(self):
+        reset_search_state()
+        self.mechanic = Mechanic.objects.create(
+            name='Shop', address='1 Main St', contact='555', latitude=1, longitude=10,
+            rating=4, working_hours='9-5',
+        )
+        mechanic_index.build()
+        self.addCleanup(mechanic_index.invalidate)
+        patcher = mock.patch.object(mechanic_index, 'build', side_effect=AssertionError('index was rebuilt'))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def ids_near(self, lat, lng, radius=1):
+        return [mechanic_id for mechanic_id, _ in mechanic_index.query_radius(lat, lng, radius)]
+
+    def test_new_shop_is_indexed(self):
+        other = Mechanic.objects.create(
+            name='Other', address='2 Main St', contact='555', latitude=1.001, longitude=10,
+            rating=4, working_hours='9-5',
+        )
+
+        self.assertEqual(self.ids_near(1, 10), [self.mechanic.id, other.id])
+
+    def test_moved_shop_is_only_found_at_its_new_location(self):
+        self.mechanic.latitude, self.mechanic.longitude = 2, 11
+        self.mechanic.save()
+
+        self.assertEqual(self.ids_near(1, 10), [])
+        self.assertEqual(self.ids_near(2, 11), [self.mechanic.id])
+
+    def test_rating_change_is_indexed(self):
+        self.mechanic.rating = 2
+        self.mechanic.save()
+
+        self.assertEqual(mechanic_index.query_radius(1, 10, 1, min_rating=3), [])
+
+    def test_deactivated_shop_is_dropped(self):
+        self.mechanic.is_active = False
+        self.mechanic.save()
+
+        self.assertEqual(self.ids_near(1, 10), [])
+
+    def test_deleted_shop_is_dropped(self):
+        self.mechanic.delete()
+
+        self.assertEqual(self.ids_near(1, 10), [])
+        self.assertEqual(mechanic_index.query_nearest(1, 10, 1), [])
+
+
+class DashboardStatsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        patcher = mock.patch.object(dashboard_stats, 'background', False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        now = timezone.now()
+        shops = [
+            (0.5, True, 0), (1.0, True, 5), (2.5, False, 40), (3.9, True, 75), (4.0, True, 120),
+            (4.7, False, 200), (5.0, True, 300), (5.0, True, 330),
+        ]
+        for n, (rating, active, days_ago) in enumerate(shops):
+            mechanic = Mechanic.objects.create(
+                name=f'Shop {n}', address=f'{n} Main St', contact='555', latitude=1, longitude=1,
+                rating=rating, working_hours='9-5', is_active=active,
+            )
+            Mechanic.objects.filter(id=mechanic.id).update(created_at=now - timedelta(days=days_ago))
+
+    def test_snapshot_matches_the_orm_counts(self):
+        stats = compute_stats()
+
+        self.assertEqual(stats['total_mechanics'], Mechanic.objects.count())
+        self.assertEqual(stats['active_mechanics'], Mechanic.objects.filter(is_active=True).count())
+        self.assertEqual(stats['inactive_mechanics'], Mechanic.objects.filter(is_active=False).count())
+        ratings = {stars: Mechanic.objects.filter(rating__gte=stars, rating__lt=stars + 1).count() for stars in range(6)}
+        self.assertEqual(
+            stats['rating_stats'], [{'rating': stars, 'count': count} for stars, count in ratings.items() if count]
+        )
+        months = Mechanic.objects.annotate(month=TruncMonth('created_at')).values('month').annotate(count=Count('id'))
+        expected_growth = {row['month'].date().isoformat(): row['count'] for row in months}
+        growth = {row['month']: row['count'] for row in stats['monthly_growth'] if row['count']}
+        self.assertEqual(growth, expected_growth)
+        self.assertEqual(
+            [mechanic['name'] for mechanic in stats['recent_mechanics']],
+            list(Mechanic.objects.order_by('-created_at').values_list('name', flat=True)[:5]),
+        )
+
+    def test_snapshot_is_served_until_it_expires(self):
+        snapshot = StatsSnapshot(ttl=60, background=False)
+        self.assertEqual(snapshot.get()['total_mechanics'], 8)
+        # bulk_create sends no post_save, so only the expiry refreshes the snapshot
+        Mechanic.objects.bulk_create([Mechanic(
+            name='Unsignalled', address='9 Main St', contact='555', latitude=1, longitude=1,
+            rating=3, working_hours='9-5',
+        )])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(snapshot.get()['total_mechanics'], 8)
+        with mock.patch('mechanics.stats.time.time', return_value=time.time() + 61):
+            snapshot.get()
+        self.assertEqual(snapshot.get()['total_mechanics'], 9)
+
+    def test_mechanic_save_refreshes_a_taken_snapshot(self):
+        self.assertEqual(dashboard_stats.get()['active_mechanics'], 6)
+
+        Mechanic.objects.filter(name='Shop 2').get().delete()
+        mechanic = Mechanic.objects.get(name='Shop 5')
+        mechanic.is_active = True
+        mechanic.save()
+
+        stats = dashboard_stats.get()
+        self.assertEqual((stats['total_mechanics'], stats['active_mechanics']), (7, 7))
+
+
+class RollupTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def log(self, count, action=ActivityLog.Action.SEARCH, timestamp=None):
+        ActivityLog.objects.bulk_create([
+            ActivityLog(action=action, description='test', timestamp=timestamp or timezone.now())
+            for _ in range(count)
+        ])
+
+    def rolled_up(self):
+        return sum(ActivityRollup.objects.values_list('count', flat=True))
+
+    def test_refresh_picks_up_rows_logged_since_the_last_run(self):
+        self.log(3)
+        refresh_rollups(max_age=0)
+        self.log(2)
+        refresh_rollups(max_age=0)
+
+        self.assertEqual(self.rolled_up(), 5)
+
+    def test_refresh_is_throttled(self):
+        self.log(1)
+        self.assertIsNotNone(refresh_rollups(max_age=300))
+        self.log(1)
+
+        self.assertIsNone(refresh_rollups(max_age=300))
+        self.assertEqual(self.rolled_up(), 1)
+
+    def test_rows_flushed_late_are_still_counted(self):
+        now = timezone.now()
+        self.log(1, timestamp=now - timedelta(hours=2))
+        update_rollups(now)
+        latest = ActivityRollup.objects.latest('bucket').bucket
+
+        # Stamped before the latest bucket, but only written after the previous run
+        self.log(1, timestamp=latest - timedelta(seconds=5))
+        update_rollups(now)
+
+        self.assertEqual(self.rolled_up(), 2)
+
+    def test_rebuild_keeps_rollups_whose_logs_were_purged(self):
+        now = timezone.now()
+        days = next(policy.days for policy in POLICIES if policy.model_label == 'mechanics.ActivityLog')
+        self.log(3, timestamp=now - timedelta(days=days + 5))
+        self.log(2, timestamp=now - timedelta(days=1))
+        update_rollups(now)
+        ActivityLog.objects.filter(timestamp__lt=now - timedelta(days=days)).delete()
+
+        rebuild_rollups(now)
+
+        self.assertEqual(self.rolled_up(), 5)
+        self.assertEqual(sum(ActivityUserRollup.objects.values_list('count', flat=True)), 5)
+
+    def test_rebuild_without_older_rollups_starts_from_the_earliest_log(self):
+        now = timezone.now()
+        self.log(3, timestamp=now - timedelta(days=400))
+        self.log(2, timestamp=now - timedelta(days=1))
+
+        call_command('update_rollups', rebuild=True, stdout=io.StringIO())
+
+        self.assertEqual(self.rolled_up(), 5)
+
+    def test_analytics_page_refreshes_the_rollups(self):
+        self.log(4)
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'secret-pass-123'))
+
+        response = self.client.get(reverse('admin:mechanics_activitylog_summary'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.rolled_up(), 4)
+
+
+class BufferedWriterTests(TestCase):
+    def test_rows_keep_the_time_they_were_queued(self):
+        writer = BufferedWriter('mechanics.ActivityLog', flush_interval=3600)
+        writer.add(**activity_fields(RequestFactory().get('/'), None, 'search', 'queued'))
+        queued_at = timezone.now()
+        time.sleep(0.01)
+        writer.flush()
+
+        self.assertLess(ActivityLog.objects.get().timestamp, queued_at)
+
+
+class BootTests(TestCase):
+    credentials = {
+        'DJANGO_SUPERUSER_USERNAME': 'admin',
+        'DJANGO_SUPERUSER_EMAIL': 'admin@example.com',
+        'DJANGO_SUPERUSER_PASSWORD': 'secret-pass-123',
+    }
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.state_file = os.path.join(directory.name, 'boot.json')
+
+    def boot(self, *steps):
+        skip = [step for step in ('makemigrations', 'migrate', 'superuser', 'sample_data', 'collectstatic')
+                if step not in steps]
+        stderr = io.StringIO()
+        call_command('boot', skip=skip, state_file=self.state_file, stdout=io.StringIO(), stderr=stderr)
+        return stderr.getvalue()
+
+    def test_superuser_is_only_created_with_full_credentials(self):
+        with mock.patch.dict(os.environ, {'DJANGO_SUPERUSER_PASSWORD': 'secret-pass-123'}, clear=True):
+            self.assertIsNone(BootCommand().fingerprint_superuser())
+        with mock.patch.dict(os.environ, self.credentials):
+            self.assertEqual(BootCommand().fingerprint_superuser(), 'missing')
+
+    def test_existing_superuser_needs_no_credentials(self):
+        User.objects.create_superuser('root', 'root@example.com', 'secret-pass-123')
+        with mock.patch.dict(os.environ, self.credentials):
+            self.assertIsNone(BootCommand().fingerprint_superuser())
+
+    def test_unchanged_step_is_skipped(self):
+        with mock.patch.object(BootCommand, 'run_sample_data') as run_sample_data:
+            self.boot('sample_data')
+            self.boot('sample_data')
+        self.assertEqual(run_sample_data.call_count, 1)
+
+    def test_optional_step_failure_does_not_abort_boot(self):
+        with mock.patch.object(BootCommand, 'run_sample_data', side_effect=RuntimeError('no fixtures')):
+            self.assertIn('sample_data failed', self.boot('sample_data'))
+        with mock.patch.object(BootCommand, 'run_sample_data') as run_sample_data:
+            self.boot('sample_data')
+        run_sample_data.assert_called_once()
+
+
+class ImportMechanicsTests(TestCase):
+    header = 'name,address,lat,lng,rating,phone,hours,status\n'
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.checkpoint = os.path.join(directory.name, 'import.json')
+
+    def write_csv(self, *rows):
+        path = os.path.join(self.directory, 'mechanics.csv')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.header + ''.join(f'{row}\n' for row in rows))
+        return path
+
+    def run_import(self, path, **options):
+        call_command('import_mechanics', path, stdout=io.StringIO(), stderr=io.StringIO(), **options)
+
+    def test_rows_are_upserted_on_name_and_address(self):
+        Mechanic.objects.create(
+            name='Alpha', address='1 Main St', contact='111', latitude=1, longitude=1,
+            rating=3, working_hours='9-5',
+        )
+        path = self.write_csv(
+            'Alpha,1 Main St,2.5,3.5,4.5,222,8-6,active',
+            'Beta,2 Main St,1,1,4,333,9-5,inactive',
+            'Broken,3 Main St,north,1,4,444,9-5,active',
+        )
+
+        self.run_import(path, batch_size=1)
+
+        self.assertEqual(Mechanic.objects.count(), 2)
+        alpha = Mechanic.objects.get(name='Alpha')
+        self.assertEqual((float(alpha.latitude), float(alpha.rating), alpha.contact), (2.5, 4.5, '222'))
+        self.assertFalse(Mechanic.objects.get(name='Beta').is_active)
+
+    def test_resume_skips_rows_before_the_checkpoint(self):
+        path = self.write_csv(*[f'Shop {n},{n} Main St,1,1,4,555,9-5,active' for n in range(1, 6)])
+        with open(self.checkpoint, 'w', encoding='utf-8') as f:
+            json.dump({'source': os.path.abspath(path), 'row': 3}, f)
+
+        self.run_import(path, batch_size=2, checkpoint=self.checkpoint, resume=True)
+
+        self.assertEqual(sorted(Mechanic.objects.values_list('name', flat=True)), ['Shop 4', 'Shop 5'])
+        with open(self.checkpoint, encoding='utf-8') as f:
+            self.assertEqual(json.load(f)['row'], 5)
+
+    def test_checkpoint_of_another_file_is_rejected(self):
+        path = self.write_csv('Shop,1 Main St,1,1,4,555,9-5,active')
+        with open(self.checkpoint, 'w', encoding='utf-8') as f:
+            json.dump({'source': '/elsewhere.csv', 'row': 1}, f)
+
+        with self.assertRaises(CommandError):
+            self.run_import(path, checkpoint=self.checkpoint, resume=True)
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        # Few distinct ratings, so most rows tie on the first sort key
+        for n in range(7):
+            Mechanic.objects.create(
+                name=f'Shop {n}', address=f'{n} Main St', contact='555', latitude=1, longitude=1,
+                rating=[4, 5, 4, 3][n % 4], working_hours='9-5',
+            )
+        self.ordered = list(Mechanic.objects.order_by('-rating', 'id').values_list('id', flat=True))
+
+    def paginator(self, scope='list'):
+        return KeysetPaginator(Mechanic.objects.all(), 3, ['-rating', 'id'], scope=scope)
+
+    def test_pages_cover_every_row_once_despite_ties(self):
+        seen, cursor = [], None
+        while True:
+            page = self.paginator().page(cursor)
+            seen.extend(mechanic.id for mechanic in page)
+            if not page.has_next():
+                break
+            cursor = page.next_cursor
+
+        self.assertEqual(seen, self.ordered)
+
+    def test_previous_cursor_returns_the_page_before(self):
+        first = self.paginator().page()
+        second = self.paginator().page(first.next_cursor)
+
+        self.assertFalse(first.has_previous())
+        back = self.paginator().page(second.previous_cursor)
+        self.assertEqual([mechanic.id for mechanic in back], [mechanic.id for mechanic in first])
+
+    def test_tampered_or_foreign_cursor_is_rejected(self):
+        cursor = self.paginator().page().next_cursor
+
+        with self.assertRaises(InvalidCursor):
+            self.paginator().page(cursor[:-2] + 'xx')
+        with self.assertRaises(InvalidCursor):
+            self.paginator(scope='other').page(cursor)
+
+    def test_sorted_list_paging_breaks_ties_by_id(self):
+        matches = [(1, 2.0), (4, 2.0), (7, 2.0), (2, 3.5), (9, 3.5)]
+        key = lambda match: (match[1], match[0])
+
+        first = paginate_sorted(matches, key, 2)
+        second = paginate_sorted(matches, key, 2, first.next_cursor)
+        back = paginate_sorted(matches, key, 2, second.previous_cursor)
+
+        self.assertEqual(second.object_list, [(7, 2.0), (2, 3.5)])
+        self.assertEqual(back.object_list, first.object_list)
+
+    def test_home_cursor_pages_show_six_shops_with_links(self):
+        write_synchronously(self)
+        cache.clear()
+
+        response = self.client.get(reverse('mechanics:home'), {'paginate': 'cursor'})
+        page = response.context['mechanics']
+        self.assertEqual(len(page), 6)
+        self.assertEqual(response.content.count(b'class="card h-100 mechanic-card'), 6)
+        self.assertEqual(page[0].id, self.ordered[0])
+        self.assertContains(response, 'cursor=' + quote(page.next_cursor, safe=''))
+
+        response = self.client.get(reverse('mechanics:home'), {'cursor': page.next_cursor})
+        self.assertEqual([mechanic.id for mechanic in response.context['mechanics']], self.ordered[6:])
+        self.assertContains(response, '>Previous</a>')
+        self.assertNotContains(response, '>Next</a>')
+
+
+class TextSearchTests(TestCase):
+    def setUp(self):
+        self.create_mechanic('Speedy Brakes', '12 Garage Road', '555-0101')
+        self.create_mechanic('Garage Masters', '9 High Street', '555-0202')
+        self.create_mechanic('Tyre World', '3 Speedway Lane', '555-0303')
+
+    def create_mechanic(self, name, address, contact):
+        return Mechanic.objects.create(
+            name=name, address=address, contact=contact, latitude=1, longitude=1, rating=4, working_hours='9-5',
+        )
+
+    def names(self, query):
+        queryset = text_search(Mechanic.objects.all(), query).order_by(*rank_ordering())
+        return list(queryset.values_list('name', flat=True))
+
+    def test_fts_index_is_used_on_sqlite(self):
+        self.assertTrue(fts_available())
+
+    def test_terms_match_as_prefixes_and_name_matches_rank_first(self):
+        self.assertEqual(self.names('garag'), ['Garage Masters', 'Speedy Brakes'])
+        self.assertEqual(self.names('speed'), ['Speedy Brakes', 'Tyre World'])
+        self.assertEqual(self.names('speedy garage'), ['Speedy Brakes'])
+
+    def test_index_follows_saves_and_deletes(self):
+        mechanic = Mechanic.objects.get(name='Tyre World')
+        mechanic.name = 'Wheel World'
+        mechanic.save()
+        Mechanic.objects.get(name='Garage Masters').delete()
+
+        self.assertEqual(self.names('wheel'), ['Wheel World'])
+        self.assertEqual(self.names('masters'), [])
+
+    def test_fallback_without_the_index(self):
+        with mock.patch('mechanics.search.fts_available', return_value=False):
+            self.assertEqual(sorted(self.names('garage')), ['Garage Masters', 'Speedy Brakes'])
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        for n, active in enumerate([True, True, False]):
+            Mechanic.objects.create(
+                name=f'Shop {n}', address=f'{n} Main St', contact='555', latitude=1.5, longitude=2.5,
+                rating=4, working_hours='9-5', is_active=active,
+            )
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'secret-pass-123'))
+
+    def export(self, **params):
+        response = self.client.get(reverse('admin:mechanics_mechanic_export'), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content)
+
+    def test_export_follows_the_changelist_filters(self):
+        rows = list(csv.reader(io.StringIO(self.export(is_active__exact='1').decode('utf-8'))))
+
+        self.assertEqual(rows[0][:2], ['Name', 'Address'])
+        self.assertEqual([row[0] for row in rows[1:]], ['Shop 0', 'Shop 1'])
+        self.assertEqual({row[6] for row in rows[1:]}, {'Active'})
+
+    def test_invalid_filter_redirects_to_the_changelist(self):
+        response = self.client.get(reverse('admin:mechanics_mechanic_export'), {'no_such_field': '1'})
+
+        self.assertRedirects(
+            response, reverse('admin:mechanics_mechanic_changelist') + '?e=1', fetch_redirect_response=False
+        )
+
+    def test_export_leaves_the_request_unchanged(self):
+        request = RequestFactory().get(reverse('admin:mechanics_mechanic_export'), {'format': 'gzip'})
+        request.user = User.objects.get(username='admin')
+
+        response = admin.site._registry[Mechanic].export_filtered(request)
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(request.GET['format'], 'gzip')
+
+    def test_gzip_export_matches_the_plain_one(self):
+        self.assertEqual(gzip.decompress(self.export(format='gzip')), self.export())
+
+    def test_export_can_be_imported_again(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'export.csv')
+        with open(path, 'wb') as f:
+            f.write(self.export())
+        Mechanic.objects.update(rating=1)
+
+        call_command('import_mechanics', path, stdout=io.StringIO(), stderr=io.StringIO())
+
+        self.assertEqual(Mechanic.objects.count(), 3)
+        self.assertEqual(set(Mechanic.objects.values_list('rating', flat=True)), {4})
+        self.assertFalse(Mechanic.objects.get(name='Shop 2').is_active)
+
+
+class MapTileTests(TestCase):
+    def setUp(self):
+        reset_search_state()
+        write_synchronously(self)
+
+    def create_mechanic(self, name, lat, lng, **fields):
+        return Mechanic.objects.create(
+            name=name, address=f'{name} street', contact='555-0100', latitude=round(lat, 6),
+            longitude=round(lng, 6), rating=fields.pop('rating', 4), working_hours='9-5', **fields,
+        )
+
+    def tile(self, zoom, x, y, url_name='mechanics:map_tiles_api', **params):
+        response = self.client.get(reverse(url_name, args=(zoom, x, y)), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def tile_of(self, zoom, lat, lng):
+        scale = 2 ** zoom
+        rad = math.radians(lat)
+        y = (1 - math.log(math.tan(rad) + 1 / math.cos(rad)) / math.pi) / 2 * scale
+        return int((lng + 180) / 360 * scale), int(y)
+
+    def test_low_zoom_tile_is_clustered(self):
+        rng = random.Random(7)
+        for n in range(40):
+            self.create_mechanic(f'Shop {n}', 5 + rng.uniform(-2, 2), 10 + rng.uniform(-2, 2))
+
+        tile = self.tile(0, 0, 0)
+
+        self.assertEqual(tile['count'], 40)
+        self.assertEqual(tile['markers'], [])
+        self.assertGreater(len(tile['clusters']), 0)
+        self.assertEqual(sum(cluster['count'] for cluster in tile['clusters']), 40)
+
+    def test_high_zoom_tile_lists_markers_with_contact_details(self):
+        mechanic = self.create_mechanic('Corner', 5.001, 10.001, rating=4.5)
+
+        tile = self.tile(14, *self.tile_of(14, 5.001, 10.001))
+
+        self.assertEqual(tile['clusters'], [])
+        self.assertEqual(tile['markers'], [{
+            'id': mechanic.id, 'name': 'Corner', 'address': 'Corner street', 'contact': '555-0100',
+            'rating': 4.5, 'latitude': 5.001, 'longitude': 10.001, 'is_active': True,
+        }])
+
+    def test_invalid_tiles_are_rejected(self):
+        for zoom, x, y in ((23, 0, 0), (2, 4, 0), (2, 0, 4)):
+            response = self.client.get(reverse('mechanics:map_tiles_api', args=(zoom, x, y)))
+            self.assertEqual(response.status_code, 400, (zoom, x, y))
+        response = self.client.get(reverse('mechanics:map_tiles_api', args=(0, 0, 0)), {'rating': 'high'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_shop_on_a_tile_edge_belongs_to_one_tile(self):
+        # At zoom 1 the equator and the prime meridian are tile edges
+        self.create_mechanic('Null Island', 0, 0)
+
+        counts = {(x, y): self.tile(1, x, y)['count'] for x in (0, 1) for y in (0, 1)}
+
+        self.assertEqual(counts, {(0, 0): 0, (1, 0): 0, (0, 1): 0, (1, 1): 1})
+
+    def test_admin_tiles_filter_by_status(self):
+        self.create_mechanic('Open', 5, 10)
+        self.create_mechanic('Closed', 5.5, 10.5, is_active=False)
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'secret-pass-123'))
+        admin_tiles = 'admin:mechanics_mechanic_map_tiles'
+
+        self.assertEqual(self.tile(0, 0, 0)['count'], 1)
+        self.assertEqual(self.tile(0, 0, 0, admin_tiles)['count'], 2)
+        self.assertEqual(self.tile(0, 0, 0, admin_tiles, status='active')['count'], 1)
+        markers = self.tile(14, *self.tile_of(14, 5.5, 10.5), admin_tiles, status='inactive')['markers']
+        self.assertEqual([(marker['name'], marker['is_active']) for marker in markers], [('Closed', False)])
+        response = self.client.get(reverse(admin_tiles, args=(0, 0, 0)), {'status': 'closed'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_admin_tiles_require_staff(self):
+        self.client.force_login(User.objects.create_user('driver', 'driver@example.com', 'secret-pass-123'))
+
+        response = self.client.get(reverse('admin:mechanics_mechanic_map_tiles', args=(0, 0, 0)))
+
+        self.assertEqual(response.status_code, 302)
+
+
+class RetentionTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.archive_dir = directory.name
+        self.policy = next(policy for policy in POLICIES if policy.model_label == 'mechanics.ActivityLog')
+
+    def log(self, count, days_ago):
+        timestamp = timezone.now() - timedelta(days=days_ago)
+        ActivityLog.objects.bulk_create([
+            ActivityLog(action=ActivityLog.Action.VIEW, description=f'row {n}', timestamp=timestamp)
+            for n in range(count)
+        ])
+
+    def test_expired_rows_are_archived_and_deleted_in_batches(self):
+        self.log(5, days_ago=self.policy.days + 1)
+        self.log(2, days_ago=1)
+
+        deleted, path = purge(self.policy, archive_dir=self.archive_dir, batch_size=2)
+
+        self.assertEqual(deleted, 5)
+        self.assertEqual(ActivityLog.objects.count(), 2)
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            archived = [json.loads(line) for line in f]
+        self.assertEqual(sorted(row['description'] for row in archived), [f'row {n}' for n in range(5)])
+
+    def test_nothing_expired_leaves_no_archive(self):
+        self.log(2, days_ago=1)
+
+        self.assertEqual(purge(self.policy, archive_dir=self.archive_dir), (0, None))
+        self.assertEqual(os.listdir(self.archive_dir), [])
+
+    def test_purge_logs_rolls_rows_up_before_deleting_them(self):
+        self.log(3, days_ago=self.policy.days + 1)
+
+        call_command('purge_logs', models=['mechanics.ActivityLog'], no_archive=True, stdout=io.StringIO())
+
+        self.assertFalse(ActivityLog.objects.exists())
+        self.assertEqual(sum(ActivityRollup.objects.values_list('count', flat=True)), 3)
+
+
+class AsyncApiViewTests(TestCase):
+    def setUp(self):
+        reset_search_state()
+        write_synchronously(self)
+        for name, km in (('Near', 2), ('Mid', 5), ('Far', 30)):
+            lat, lng = point_at((1, 10), km, 90)
+            Mechanic.objects.create(
+                name=name, address=f'{name} street', contact='555', latitude=round(lat, 6),
+                longitude=round(lng, 6), rating=4, working_hours='9-5',
+            )
+
+    def post(self, path, body, factory=AsyncRequestFactory):
+        request = factory().post(path, json.dumps(body), content_type='application/json')
+        request.user = AnonymousUser()
+        return request
+
+    async def test_search_matches_the_sync_view(self):
+        body = {'latitude': 1, 'longitude': 10, 'radius': 10, 'limit': 1}
+        response = await async_views.search_mechanics(self.post('/api/search/', body))
+        expected = await sync_to_async(views.search_mechanics)(self.post('/api/search/', body, RequestFactory))
+
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.content)
+        self.assertEqual([mechanic['name'] for mechanic in data['mechanics']], ['Near'])
+        self.assertEqual(data['mechanics'], json.loads(expected.content)['mechanics'])
+
+        body['cursor'] = data['next']
+        response = await async_views.search_mechanics(self.post('/api/search/', body))
+        self.assertEqual([mechanic['name'] for mechanic in json.loads(response.content)['mechanics']], ['Mid'])
+
+    async def test_nearest_returns_k_shops_nearest_first(self):
+        response = await async_views.nearest_mechanics(self.post('/api/nearest/', {
+            'latitude': 1, 'longitude': 10, 'k': 2,
+        }))
+
+        self.assertEqual([mechanic['name'] for mechanic in json.loads(response.content)['mechanics']], ['Near', 'Mid'])
+
+    async def test_log_call_writes_an_activity_row(self):
+        response = await async_views.log_call_api(self.post('/api/log-call/', {
+            'mechanic_id': 1, 'mechanic_name': 'Near',
+        }))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(await ActivityLog.objects.filter(description__contains='Near').acount(), 1)
+
+    async def test_invalid_requests_are_rejected(self):
+        request = AsyncRequestFactory().get('/api/search/')
+        request.user = AnonymousUser()
+        response = await async_views.search_mechanics(request)
+        self.assertEqual(response.status_code, 405)
+        response = await async_views.search_mechanics(self.post('/api/search/', {'radius': 10}))
+        self.assertEqual(response.status_code, 400)
+        response = await async_views.nearest_mechanics(self.post('/api/nearest/', {'latitude': -90.5, 'longitude': 0}))
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,137 @@
+import math
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+from .cache import make_key, record
+from .spatial_index import mechanic_index
+
+# Web Mercator stops short of the poles
+MAX_LATITUDE = 85.05112878
+MAX_ZOOM = 22
+
+# Which shops a tile holds: the public maps only ever show active ones
+TILE_STATUSES = ('active', 'inactive', 'all')
+
+
+def is_valid_tile(zoom, x, y):
+    """Whether ``zoom/x/y`` names a tile of the slippy-map pyramid."""
+    return 0 <= zoom <= MAX_ZOOM and 0 <= x < 2 ** zoom and 0 <= y < 2 ** zoom
+
+
+def tile_bounds(zoom, x, y):
+    """Return ``(min_lat, max_lat, min_lng, max_lng)`` of a slippy-map tile."""
+    scale = 2 ** zoom
+    min_lng = x / scale * 360 - 180
+    max_lng = (x + 1) / scale * 360 - 180
+    max_lat = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / scale))))
+    min_lat = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * (y + 1) / scale))))
+    return min_lat, max_lat, min_lng, max_lng
+
+
+def _mercator_y(lats):
+    """Web Mercator y in tile units (0 at the top of the world, 1 at the bottom)."""
+    lats = np.radians(np.clip(lats, -MAX_LATITUDE, MAX_LATITUDE))
+    return (1 - np.log(np.tan(lats) + 1 / np.cos(lats)) / math.pi) / 2
+
+
+def tile_points(min_lat, max_lat, min_lng, max_lng, min_rating=0, status='active'):
+    """Return ``(ids, lats, lngs)`` arrays of the shops in a box with the given status.
+
+    Active shops come from the spatial index; inactive ones are not in it,
+    so the admin's other statuses read the latitude/longitude index instead.
+    """
+    from .models import Mechanic
+
+    if status == 'active':
+        return mechanic_index.query_bbox(min_lat, max_lat, min_lng, max_lng, min_rating)
+
+    queryset = Mechanic.objects.filter(
+        latitude__gte=min_lat, latitude__lte=max_lat, longitude__gte=min_lng, longitude__lte=max_lng,
+    )
+    if status == 'inactive':
+        queryset = queryset.filter(is_active=False)
+    if min_rating:
+        queryset = queryset.filter(rating__gte=min_rating)
+    rows = list(queryset.values_list('id', 'latitude', 'longitude'))
+    ids, lats, lngs = zip(*rows) if rows else ((), (), ())
+    return (
+        np.array(ids, dtype=np.int64),
+        np.array(lats, dtype=np.float64),
+        np.array(lngs, dtype=np.float64),
+    )
+
+
+def cluster_tile(zoom, x, y, min_rating=0, status='active'):
+    """Build the marker payload of one tile.
+
+    The tile is split into a ``MAP_CLUSTER_GRID`` square grid and each
+    occupied grid cell becomes one cluster with its shop count and centroid,
+    so the payload size is bounded regardless of how many shops the tile
+    holds. From ``MAP_MARKER_ZOOM`` on, individual markers are returned
+    instead, as long as the tile holds no more than ``MAP_MAX_TILE_MARKERS``.
+    ``status`` is one of ``TILE_STATUSES``.
+    """
+    from .models import Mechanic
+
+    min_lat, max_lat, min_lng, max_lng = tile_bounds(zoom, x, y)
+    ids, lats, lngs = tile_points(min_lat, max_lat, min_lng, max_lng, min_rating, status)
+    # Shops on a shared tile edge belong to the tile to their south-east
+    keep = (lngs < max_lng) | (x == 2 ** zoom - 1)
+    keep &= (lats > min_lat) | (y == 2 ** zoom - 1)
+    ids, lats, lngs = ids[keep], lats[keep], lngs[keep]
+
+    tile = {'zoom': zoom, 'x': x, 'y': y, 'count': int(ids.size), 'clusters': [], 'markers': []}
+    if not ids.size:
+        return tile
+
+    marker_zoom = getattr(settings, 'MAP_MARKER_ZOOM', 14)
+    max_markers = getattr(settings, 'MAP_MAX_TILE_MARKERS', 200)
+    if zoom >= marker_zoom and ids.size <= max_markers:
+        mechanics = Mechanic.objects.only(
+            'id', 'name', 'address', 'contact', 'rating', 'latitude', 'longitude', 'is_active'
+        ).in_bulk(ids.tolist())
+        tile['markers'] = [
+            {
+                'id': mechanic.id,
+                'name': mechanic.name,
+                'address': mechanic.address,
+                'contact': mechanic.contact,
+                'rating': float(mechanic.rating),
+                'latitude': float(mechanic.latitude),
+                'longitude': float(mechanic.longitude),
+                'is_active': mechanic.is_active,
+            }
+            for mechanic in (mechanics[mechanic_id] for mechanic_id in sorted(mechanics))
+        ]
+        return tile
+
+    grid = getattr(settings, 'MAP_CLUSTER_GRID', 8)
+    scale = 2 ** zoom
+    columns = np.clip(((lngs + 180) / 360 * scale - x) * grid, 0, grid - 1).astype(np.int64)
+    rows = np.clip((_mercator_y(lats) * scale - y) * grid, 0, grid - 1).astype(np.int64)
+    buckets = rows * grid + columns
+
+    counts = np.bincount(buckets, minlength=grid * grid)
+    lat_sums = np.bincount(buckets, weights=lats, minlength=grid * grid)
+    lng_sums = np.bincount(buckets, weights=lngs, minlength=grid * grid)
+    for bucket in np.flatnonzero(counts).tolist():
+        count = int(counts[bucket])
+        tile['clusters'].append({
+            'latitude': round(lat_sums[bucket] / count, 6),
+            'longitude': round(lng_sums[bucket] / count, 6),
+            'count': count,
+        })
+    return tile
+
+
+def get_tile(zoom, x, y, min_rating=0, status='active'):
+    """Return the payload of one tile through the versioned cache."""
+    key = make_key('tiles', zoom, x, y, min_rating, status)
+    tile = cache.get(key)
+    record('tiles', hit=tile is not None)
+    if tile is None:
+        tile = cluster_tile(zoom, x, y, min_rating, status)
+        cache.set(key, tile, getattr(settings, 'MAP_TILE_CACHE_TIMEOUT', 600))
+    return tile
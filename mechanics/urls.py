@@ -1,16 +1,22 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
 
 app_name = 'mechanics'
 
+# JSON API views: async ones under ASGI workers, sync ones under gunicorn's sync workers
+api = async_views if settings.ASYNC_API_VIEWS else views
+
 urlpatterns = [
     path('', views.home, name='home'),
     path('register/', views.register, name='register'),
     path('mechanics/', views.mechanic_list, name='mechanic_list'),
     path('mechanic/<int:mechanic_id>/', views.mechanic_detail, name='mechanic_detail'),
-    path('search/', views.search_mechanics, name='search_mechanics'),
-    path('api/search/', views.search_mechanics, name='search_mechanics_api'),
-    path('api/log-call/', views.log_call_api, name='log_call_api'),
+    path('search/', api.search_mechanics, name='search_mechanics'),
+    path('api/search/', api.search_mechanics, name='search_mechanics_api'),
+    path('api/nearest/', api.nearest_mechanics, name='nearest_mechanics_api'),
+    path('api/tiles/<int:zoom>/<int:x>/<int:y>/', api.map_tiles, name='map_tiles_api'),
+    path('api/log-call/', api.log_call_api, name='log_call_api'),
     path('profile/', views.user_profile, name='user_profile'),
     path('about/', views.about, name='about'),
     path('contact/', views.contact, name='contact'),
@@ -1,16 +1,23 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.conf import settings
 from django.http import JsonResponse
-from django.core.paginator import Paginator
-from django.db.models import Q
 from django.utils import timezone
+from django.utils.http import urlencode
 from django.contrib.auth import login
-from geopy.distance import geodesic
 from .models import Mechanic, ActivityLog
+from .cache import cached_radius_search, get_cached_page
+from .geo import is_valid_location, quantize_location
 from .forms import UserRegistrationForm
+from .pagination import InvalidCursor, KeysetPaginator, paginate_sorted
+from .search import rank_ordering, text_search
+from .spatial_index import get_spatial_backend
+from .tiles import get_tile, is_valid_tile
+from .writers import activity_log_writer, search_query_writer
 import json
 import logging
+import random
 
 logger = logging.getLogger(__name__)
 
@@ -40,15 +47,13 @@ def mechanic_list(request):
     # Get search parameters
     search_query = request.GET.get('search', '')
     rating_filter = request.GET.get('rating', '')
-    sort_by = request.GET.get('sort', 'name')
+    sort_by = request.GET.get('sort', 'relevance' if search_query else 'name')
     
-    # Apply search filter
+    # Apply search filter through the full-text index
     if search_query:
-        mechanics = mechanics.filter(
-            Q(name__icontains=search_query) |
-            Q(address__icontains=search_query) |
-            Q(contact__icontains=search_query)
-        )
+        mechanics = text_search(mechanics, search_query)
+    elif sort_by == 'relevance':
+        sort_by = 'name'
     
     # Apply rating filter
     if rating_filter:
@@ -59,24 +64,54 @@ def mechanic_list(request):
             pass
     
     # Apply sorting
-    if sort_by == 'rating':
+    if sort_by == 'relevance':
+        mechanics = mechanics.order_by(*rank_ordering())
+    elif sort_by == 'rating':
         mechanics = mechanics.order_by('-rating', 'name')
     elif sort_by == 'name':
         mechanics = mechanics.order_by('name')
     else:
         mechanics = mechanics.order_by('name')
     
-    # Pagination
-    paginator = Paginator(mechanics, 12)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    cursor = request.GET.get('cursor')
+    cursor_mode = bool(cursor) or request.GET.get('paginate') == 'cursor'
+    
+    if cursor_mode:
+        # Keyset pagination: seeks past the last row instead of OFFSET and skips the COUNT
+        if sort_by == 'relevance':
+            ordering = rank_ordering()
+        elif sort_by == 'rating':
+            ordering = ('-rating', 'name', 'id')
+        else:
+            ordering = ('name', 'id')
+        paginator = KeysetPaginator(
+            mechanics, 12, ordering, scope=f'list:{search_query}:{rating_filter}:{sort_by}'
+        )
+        try:
+            page_obj = paginator.page(cursor)
+        except InvalidCursor:
+            page_obj = paginator.page()
+        total_mechanics = None
+    else:
+        # Pagination, served from the list cache when possible
+        page_obj = get_cached_page(
+            'list', mechanics, request.GET.get('page'), 12,
+            key_parts=(search_query, rating_filter, sort_by),
+        )
+        total_mechanics = page_obj.paginator.count
     
     context = {
         'mechanics': page_obj,
-        'total_mechanics': mechanics.count(),
+        'total_mechanics': total_mechanics,
         'search_query': search_query,
         'rating_filter': rating_filter,
         'sort_by': sort_by,
+        'cursor_mode': cursor_mode,
+        'filter_query': urlencode({
+            'search': search_query,
+            'rating': rating_filter,
+            'sort': sort_by,
+        }),
     }
     
     log_activity(request, 'view', 'Mechanic list page visited')
@@ -92,21 +127,53 @@ def home(request):
     rating = request.GET.get('rating', 0)
     sort_by = request.GET.get('sort_by', 'distance')
     
+    user_lat = request.GET.get('lat')
+    user_lng = request.GET.get('lng')
+    
     # Apply filters
     if rating and float(rating) > 0:
         mechanics = mechanics.filter(rating__gte=float(rating))
     
-    # Pagination
-    paginator = Paginator(mechanics, 12)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Narrow to the bounding box around the user's location when one is given
+    if user_lat and user_lng:
+        try:
+            mechanics = mechanics.within_bbox(user_lat, user_lng, float(radius))
+        except (ValueError, TypeError):
+            pass
+    
+    cursor = request.GET.get('cursor')
+    cursor_mode = bool(cursor) or request.GET.get('paginate') == 'cursor'
+    if cursor_mode:
+        # The top-rated section shows six shops, so each cursor page holds six
+        paginator = KeysetPaginator(
+            mechanics, 6, ('-rating', 'name', 'id'),
+            scope=f'home:{rating}:{user_lat}:{user_lng}:{radius}',
+        )
+        try:
+            page_obj = paginator.page(cursor)
+        except InvalidCursor:
+            page_obj = paginator.page()
+        total_mechanics = None
+    else:
+        # Pagination, served from the list cache when possible
+        page_obj = get_cached_page(
+            'home', mechanics, request.GET.get('page'), 12,
+            key_parts=(rating, user_lat, user_lng, radius),
+        )
+        total_mechanics = page_obj.paginator.count
     
     context = {
         'mechanics': page_obj,
-        'total_mechanics': mechanics.count(),
+        'total_mechanics': total_mechanics,
         'radius': radius,
         'rating': rating,
         'sort_by': sort_by,
+        'cursor_mode': cursor_mode,
+        'filter_query': urlencode({
+            key: value for key, value in
+            (('rating', rating), ('radius', radius), ('lat', user_lat), ('lng', user_lng))
+            if value is not None
+        }),
     }
     
     log_activity(request, 'view', 'Home page visited')
@@ -123,9 +190,7 @@ def mechanic_detail(request, mechanic_id):
     
     if user_lat and user_lng:
         try:
-            user_location = (float(user_lat), float(user_lng))
-            mechanic_location = (mechanic.latitude, mechanic.longitude)
-            distance = geodesic(user_location, mechanic_location).kilometers
+            distance = mechanic.get_distance_from(float(user_lat), float(user_lng))
             mechanic.distance_from_user = round(distance, 1)
         except (ValueError, TypeError):
             mechanic.distance_from_user = None
@@ -140,6 +205,54 @@ def mechanic_detail(request, mechanic_id):
     return render(request, 'mechanics/mechanic_detail.html', context)
 
 
+def mechanic_payload(mechanic, distance):
+    """JSON representation of a mechanic in the search APIs."""
+    mechanic.distance = round(distance, 1)
+    return {
+        'id': mechanic.id,
+        'name': mechanic.name,
+        'address': mechanic.address,
+        'contact': mechanic.contact,
+        'rating': mechanic.rating,
+        'distance': mechanic.distance,
+        'latitude': mechanic.latitude,
+        'longitude': mechanic.longitude,
+    }
+
+
+def radius_matches(lat, lng, radius, rating):
+    """``(mechanic_id, distance)`` pairs within the radius, from the cell cache or spatial index."""
+    if settings.SEARCH_CACHE_TIMEOUT:
+        return cached_radius_search(lat, lng, radius, min_rating=rating)
+    return get_spatial_backend().query_radius(lat, lng, radius, min_rating=rating)
+
+
+def paginate_matches(matches, data, scope):
+    """Optional keyset paging over the (distance, id) ordering; returns ``(page, page_matches)``."""
+    limit = data.get('limit')
+    cursor = data.get('cursor')
+    if not limit and not cursor:
+        return None, matches
+    limit = min(max(int(limit or 20), 1), 100)
+    page = paginate_sorted(matches, lambda match: (match[1], match[0]), limit, cursor, scope=scope)
+    return page, page.object_list
+
+
+def search_response(nearby_mechanics, matches, page):
+    """JSON body of the search API, with cursors when the results are paged."""
+    response = {
+        'mechanics': nearby_mechanics,
+        'count': len(nearby_mechanics)
+    }
+    if page is not None:
+        response.update({
+            'count': len(matches),
+            'next': page.next_cursor,
+            'previous': page.previous_cursor,
+        })
+    return response
+
+
 def search_mechanics(request):
     """API endpoint for searching mechanics."""
     if request.method == 'POST':
@@ -150,46 +263,36 @@ def search_mechanics(request):
             radius = float(data.get('radius', 10))
             rating = float(data.get('rating', 0))
             
-            if not user_lat or not user_lng:
+            if user_lat is None or user_lng is None:
                 return JsonResponse({'error': 'Location required'}, status=400)
+            user_lat, user_lng = float(user_lat), float(user_lng)
+            if not is_valid_location(user_lat, user_lng):
+                return JsonResponse({'error': 'Location out of range'}, status=400)
             
-            # Get mechanics within radius
-            mechanics = Mechanic.objects.filter(is_active=True)
-            
-            if rating > 0:
-                mechanics = mechanics.filter(rating__gte=rating)
+            # Look up candidates in the cell cache or spatial index, then load only the matches
+            matches = radius_matches(user_lat, user_lng, radius, rating)
+            page, page_matches = paginate_matches(
+                matches, data, scope=f'search:{user_lat}:{user_lng}:{radius}:{rating}'
+            )
             
-            # Calculate distances and filter by radius
-            user_location = (float(user_lat), float(user_lng))
+            mechanics = Mechanic.objects.filter(is_active=True).in_bulk(
+                [mechanic_id for mechanic_id, _ in page_matches]
+            )
             nearby_mechanics = []
             
-            for mechanic in mechanics:
-                mechanic_location = (mechanic.latitude, mechanic.longitude)
-                distance = geodesic(user_location, mechanic_location).kilometers
-                
-                if distance <= radius:
-                    mechanic.distance = round(distance, 1)
-                    nearby_mechanics.append({
-                        'id': mechanic.id,
-                        'name': mechanic.name,
-                        'address': mechanic.address,
-                        'contact': mechanic.contact,
-                        'rating': mechanic.rating,
-                        'distance': mechanic.distance,
-                        'latitude': mechanic.latitude,
-                        'longitude': mechanic.longitude,
-                    })
-            
-            # Sort by distance
-            nearby_mechanics.sort(key=lambda x: x['distance'])
+            for mechanic_id, distance in page_matches:
+                mechanic = mechanics.get(mechanic_id)
+                if mechanic is None:
+                    continue
+                nearby_mechanics.append(mechanic_payload(mechanic, distance))
             
             log_activity(request, 'search', f'Mechanic search: {len(nearby_mechanics)} results')
+            log_search(request, 'rating' if rating else 'distance', user_lat, user_lng, radius, len(matches))
             
-            return JsonResponse({
-                'mechanics': nearby_mechanics,
-                'count': len(nearby_mechanics)
-            })
+            return JsonResponse(search_response(nearby_mechanics, matches, page))
             
+        except InvalidCursor as e:
+            return JsonResponse({'error': str(e)}, status=400)
         except (json.JSONDecodeError, ValueError, TypeError) as e:
             logger.error(f"Search mechanics error: {str(e)}")
             return JsonResponse({'error': 'Invalid request data'}, status=400)
@@ -197,6 +300,63 @@ def search_mechanics(request):
     return JsonResponse({'error': 'Method not allowed'}, status=405)
 
 
+def nearest_mechanics(request):
+    """API endpoint returning the k nearest mechanics, however far away they are."""
+    if request.method == 'POST':
+        try:
+            data = json.loads(request.body)
+            user_lat = data.get('latitude')
+            user_lng = data.get('longitude')
+            k = min(max(int(data.get('k', 10)), 1), 50)
+            rating = float(data.get('rating', 0))
+            max_radius = data.get('max_radius')
+            max_radius = float(max_radius) if max_radius else None
+
+            if user_lat is None or user_lng is None:
+                return JsonResponse({'error': 'Location required'}, status=400)
+            user_lat, user_lng = float(user_lat), float(user_lng)
+            if not is_valid_location(user_lat, user_lng):
+                return JsonResponse({'error': 'Location out of range'}, status=400)
+
+            matches = get_spatial_backend().query_nearest(
+                user_lat, user_lng, k, min_rating=rating, max_radius_km=max_radius
+            )
+            mechanics = Mechanic.objects.filter(is_active=True).in_bulk(
+                [mechanic_id for mechanic_id, _ in matches]
+            )
+            nearest = [
+                mechanic_payload(mechanics[mechanic_id], distance)
+                for mechanic_id, distance in matches
+                if mechanic_id in mechanics
+            ]
+
+            log_activity(request, 'search', f'Nearest mechanics search: {len(nearest)} results')
+            log_search(request, 'nearest', user_lat, user_lng, max_radius or 0, len(nearest))
+
+            return JsonResponse({
+                'mechanics': nearest,
+                'count': len(nearest)
+            })
+
+        except (json.JSONDecodeError, ValueError, TypeError) as e:
+            logger.error(f"Nearest mechanics error: {str(e)}")
+            return JsonResponse({'error': 'Invalid request data'}, status=400)
+
+    return JsonResponse({'error': 'Method not allowed'}, status=405)
+
+
+def map_tiles(request, zoom, x, y):
+    """API endpoint returning the clustered markers of one map tile."""
+    if not is_valid_tile(zoom, x, y):
+        return JsonResponse({'error': 'Invalid tile'}, status=400)
+    try:
+        rating = float(request.GET.get('rating') or 0)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid rating'}, status=400)
+
+    return JsonResponse(get_tile(zoom, x, y, rating))
+
+
 @login_required
 def user_profile(request):
     """User profile page."""
@@ -261,20 +421,56 @@ def contact(request):
     return render(request, 'mechanics/contact.html')
 
 
+def request_user_id(request):
+    """Primary key of the logged-in user, or ``None``."""
+    return request.user.pk if request.user.is_authenticated else None
+
+
+def activity_fields(request, user_id, action, description):
+    """Column values of an ``ActivityLog`` row for this request."""
+    return {
+        'user_id': user_id,
+        'action': ActivityLog.action_code(action),
+        'description': description,
+        'ip_address': get_client_ip(request),
+        'user_agent': request.META.get('HTTP_USER_AGENT', '')[:255],
+        # Set here, not by the field default, so buffered rows keep the request time
+        'timestamp': timezone.now(),
+    }
+
+
+def search_fields(user_id, query_type, lat, lng, radius, results_count):
+    """Column values of a ``SearchQuery`` row, with the location snapped to a grid cell."""
+    return {
+        'user_id': user_id,
+        'query_type': query_type,
+        'user_location': quantize_location(float(lat), float(lng), settings.SEARCH_LOG_CELL_SIZE),
+        'radius': round(float(radius)),
+        'results_count': results_count,
+        'timestamp': timezone.now(),
+    }
+
+
 def log_activity(request, action, description):
-    """Log user activity."""
+    """Queue a user activity log entry for the buffered writer."""
     try:
-        ActivityLog.objects.create(
-            user=request.user if request.user.is_authenticated else None,
-            action=action,
-            description=description,
-            ip_address=get_client_ip(request),
-            user_agent=request.META.get('HTTP_USER_AGENT', ''),
-        )
+        activity_log_writer.add(**activity_fields(request, request_user_id(request), action, description))
     except Exception as e:
         logger.error(f"Failed to log activity: {str(e)}")
 
 
+def log_search(request, query_type, lat, lng, radius, results_count):
+    """Queue a sampled search query record, with the location snapped to a grid cell."""
+    if random.random() >= settings.SEARCH_LOG_SAMPLE_RATE:
+        return
+    try:
+        search_query_writer.add(
+            **search_fields(request_user_id(request), query_type, lat, lng, radius, results_count)
+        )
+    except Exception as e:
+        logger.error(f"Failed to log search: {str(e)}")
+
+
 def get_client_ip(request):
     """Get client IP address."""
     x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
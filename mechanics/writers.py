@@ -0,0 +1,208 @@
+import atexit
+import logging
+import os
+import threading
+from collections import deque
+
+from django.apps import apps
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Case, DateTimeField, Q, Value, When
+
+logger = logging.getLogger(__name__)
+
+
+class BufferedWriter:
+    """Queue rows in-process and insert them with ``bulk_create`` in batches.
+
+    Rows are flushed from a background thread once ``batch_size`` rows are
+    pending or ``flush_interval`` seconds have passed, whichever comes first.
+    When ``enabled`` is false every row is written immediately, which keeps
+    tests and management commands on the calling thread's connection.
+    """
+
+    def __init__(self, model_label, batch_size=100, flush_interval=5.0, max_pending=10000, enabled=True):
+        self.model_label = model_label
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.enabled = enabled
+        self.dropped = 0
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    @property
+    def model(self):
+        return apps.get_model(self.model_label)
+
+    def add(self, **fields):
+        """Queue one row; never blocks on the database when buffering is enabled."""
+        if not self.enabled:
+            self._write([fields])
+            return
+
+        with self._lock:
+            if len(self._pending) >= self.max_pending:
+                self.dropped += 1
+                return
+            self._pending.append(fields)
+            pending = len(self._pending)
+
+        self._ensure_thread()
+        if pending >= self.batch_size:
+            self._wakeup.set()
+
+    def flush(self):
+        """Write every pending row; safe to call from any thread."""
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+                if not batch:
+                    return
+                self._write(batch)
+
+    def _write(self, rows):
+        model = self.model
+        try:
+            model.objects.bulk_create([model(**fields) for fields in rows])
+        except Exception as e:
+            logger.error(f"Failed to write {len(rows)} {model.__name__} rows: {str(e)}")
+
+    def _ensure_thread(self):
+        # A worker forked from a preloaded master inherits no running thread
+        if self._pid == os.getpid() and self._thread is not None:
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None:
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(
+                target=self._run, name=f'{self.model_label}-writer', daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            close_old_connections()
+            self.flush()
+
+
+class UserSessionCloser(BufferedWriter):
+    """Queue ``UserSession`` logouts and apply each batch as one UPDATE.
+
+    Rows are ``session_key``/``logout_time`` pairs. Pending session inserts
+    are flushed first, so a login and logout in the same interval still
+    close the row.
+    """
+
+    def _write(self, rows):
+        user_session_writer.flush()
+        model = self.model
+        logout_times = {row['session_key']: row['logout_time'] for row in rows}
+        try:
+            model.objects.filter(session_key__in=list(logout_times), is_active=True).update(
+                is_active=False,
+                logout_time=Case(
+                    *[When(session_key=key, then=Value(time)) for key, time in logout_times.items()],
+                    output_field=DateTimeField(),
+                ),
+            )
+        except Exception as e:
+            logger.error(f"Failed to close {len(rows)} {model.__name__} rows: {str(e)}")
+
+
+class OTPCodeMarker(BufferedWriter):
+    """Queue ``OTPCode`` audit rows to mark used and apply each batch as one UPDATE.
+
+    Rows are ``user_id``/``purpose``/``expires_at`` triples, which identify
+    the audit row written when the code was issued. Pending audit rows are
+    flushed first, so a code issued and used in the same interval is marked.
+    """
+
+    def _write(self, rows):
+        otp_code_writer.flush()
+        model = self.model
+        used = Q()
+        for row in rows:
+            used |= Q(**row)
+        try:
+            model.objects.filter(used, is_used=False).update(is_used=True)
+        except Exception as e:
+            logger.error(f"Failed to mark {len(rows)} {model.__name__} rows used: {str(e)}")
+
+
+activity_log_writer = BufferedWriter(
+    'mechanics.ActivityLog',
+    batch_size=getattr(settings, 'ACTIVITY_LOG_BATCH_SIZE', 100),
+    flush_interval=getattr(settings, 'ACTIVITY_LOG_FLUSH_INTERVAL', 5.0),
+    enabled=getattr(settings, 'ACTIVITY_LOG_BUFFERED', True),
+)
+
+search_query_writer = BufferedWriter(
+    'mechanics.SearchQuery',
+    batch_size=getattr(settings, 'ACTIVITY_LOG_BATCH_SIZE', 100),
+    flush_interval=getattr(settings, 'ACTIVITY_LOG_FLUSH_INTERVAL', 5.0),
+    enabled=getattr(settings, 'ACTIVITY_LOG_BUFFERED', True),
+)
+
+# Login audit rows, so the login and OTP views do not write on the request thread
+login_attempt_writer = BufferedWriter(
+    'otp_auth.LoginAttempt',
+    batch_size=getattr(settings, 'ACTIVITY_LOG_BATCH_SIZE', 100),
+    flush_interval=getattr(settings, 'ACTIVITY_LOG_FLUSH_INTERVAL', 5.0),
+    enabled=getattr(settings, 'ACTIVITY_LOG_BUFFERED', True),
+)
+
+otp_code_writer = BufferedWriter(
+    'otp_auth.OTPCode',
+    batch_size=getattr(settings, 'ACTIVITY_LOG_BATCH_SIZE', 100),
+    flush_interval=getattr(settings, 'ACTIVITY_LOG_FLUSH_INTERVAL', 5.0),
+    enabled=getattr(settings, 'ACTIVITY_LOG_BUFFERED', True),
+)
+
+otp_code_marker = OTPCodeMarker(
+    'otp_auth.OTPCode',
+    batch_size=getattr(settings, 'ACTIVITY_LOG_BATCH_SIZE', 100),
+    flush_interval=getattr(settings, 'ACTIVITY_LOG_FLUSH_INTERVAL', 5.0),
+    enabled=getattr(settings, 'ACTIVITY_LOG_BUFFERED', True),
+)
+
+user_session_writer = BufferedWriter(
+    'otp_auth.UserSession',
+    batch_size=getattr(settings, 'ACTIVITY_LOG_BATCH_SIZE', 100),
+    flush_interval=getattr(settings, 'ACTIVITY_LOG_FLUSH_INTERVAL', 5.0),
+    enabled=getattr(settings, 'ACTIVITY_LOG_BUFFERED', True),
+)
+
+user_session_closer = UserSessionCloser(
+    'otp_auth.UserSession',
+    batch_size=getattr(settings, 'ACTIVITY_LOG_BATCH_SIZE', 100),
+    flush_interval=getattr(settings, 'ACTIVITY_LOG_FLUSH_INTERVAL', 5.0),
+    enabled=getattr(settings, 'ACTIVITY_LOG_BUFFERED', True),
+)
+
+WRITERS = [
+    activity_log_writer,
+    search_query_writer,
+    login_attempt_writer,
+    otp_code_writer,
+    otp_code_marker,
+    user_session_writer,
+    user_session_closer,
+]
+
+
+def flush_all():
+    """Flush every buffered writer, e.g. when a worker shuts down."""
+    for writer in WRITERS:
+        writer.flush()
+
+
+atexit.register(flush_all)
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class MechanicsGeoConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'mechanics_geo'
+    verbose_name = 'Mechanic Locations (GeoDjango)'
+
+    def ready(self):
+        from . import signals  # noqa: F401
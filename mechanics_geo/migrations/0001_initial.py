@@ -0,0 +1,27 @@
+import django.contrib.gis.db.models.fields
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('mechanics', '0005_mechanic_unique_name_address'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MechanicLocation',
+            fields=[
+                ('mechanic', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='location', serialize=False, to='mechanics.mechanic')),
+                ('point', django.contrib.gis.db.models.fields.PointField(geography=getattr(settings, 'GEO_BACKEND', '') == 'postgis', srid=4326)),
+            ],
+            options={
+                'verbose_name': 'Mechanic Location',
+                'verbose_name_plural': 'Mechanic Locations',
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+
+def populate_locations(apps, schema_editor):
+    from django.contrib.gis.geos import Point
+
+    Mechanic = apps.get_model('mechanics', 'Mechanic')
+    MechanicLocation = apps.get_model('mechanics_geo', 'MechanicLocation')
+
+    batch = []
+    rows = Mechanic.objects.values_list('id', 'latitude', 'longitude').iterator(chunk_size=BATCH_SIZE)
+    for mechanic_id, latitude, longitude in rows:
+        batch.append(MechanicLocation(
+            mechanic_id=mechanic_id,
+            point=Point(float(longitude), float(latitude), srid=4326),
+        ))
+        if len(batch) >= BATCH_SIZE:
+            MechanicLocation.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        MechanicLocation.objects.bulk_create(batch)
+
+
+def clear_locations(apps, schema_editor):
+    apps.get_model('mechanics_geo', 'MechanicLocation').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mechanics_geo', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_locations, clear_locations),
+    ]
@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.contrib.gis.db import models
+
+
+class MechanicLocation(models.Model):
+    """Geometry of a mechanic shop, kept in sync with its latitude/longitude.
+
+    Lives in its own table so the ``mechanics`` app keeps working on
+    databases without spatial support.
+    """
+    mechanic = models.OneToOneField(
+        'mechanics.Mechanic', on_delete=models.CASCADE, primary_key=True, related_name='location'
+    )
+    # geography makes PostGIS measure in metres on the spheroid. Other spatial
+    # backends only support geometry columns, which they already measure
+    # geodetically in SRID 4326; the migration reads the same setting
+    point = models.PointField(
+        srid=4326, geography=getattr(settings, 'GEO_BACKEND', '') == 'postgis', spatial_index=True
+    )
+
+    class Meta:
+        verbose_name = 'Mechanic Location'
+        verbose_name_plural = 'Mechanic Locations'
+
+    def __str__(self):
+        return f"{self.mechanic_id}: {self.point.y}, {self.point.x}"
@@ -0,0 +1,82 @@
+import numpy as np
+from django.contrib.gis.db.models.functions import Distance, GeometryDistance
+from django.contrib.gis.geos import Point
+from django.contrib.gis.measure import D
+from django.db import connection
+
+from mechanics.models import Mechanic
+
+# Half the earth's circumference: no two points are further apart
+MAX_DISTANCE_KM = 20038
+
+
+class DatabaseIndex:
+    """Radius and nearest-neighbour queries answered by the spatial database.
+
+    Mirrors the query methods of ``mechanics.spatial_index.MechanicIndex``
+    so the views can use either. PostGIS filters with ``ST_DWithin`` and
+    orders by the KNN ``<->`` operator, both backed by the GiST index.
+    SpatiaLite has neither for geographic coordinates, so it narrows rows
+    with the latitude/longitude B-tree index and measures the remainder.
+    """
+
+    def _queryset(self, min_rating):
+        queryset = Mechanic.objects.filter(is_active=True)
+        if min_rating:
+            queryset = queryset.filter(rating__gte=min_rating)
+        return queryset
+
+    def _within(self, queryset, origin, lat, lng, radius_km):
+        if connection.vendor == 'postgresql':
+            return queryset.filter(location__point__dwithin=(origin, D(km=radius_km)))
+        return queryset.within_bbox(lat, lng, radius_km).filter(
+            location__point__distance_lte=(origin, D(km=radius_km))
+        )
+
+    def _results(self, queryset):
+        return [(mechanic_id, distance.km) for mechanic_id, distance in queryset.values_list('id', 'distance')]
+
+    def query_radius(self, lat, lng, radius_km, min_rating=0, mode=None):
+        """Return ``(mechanic_id, distance_km)`` pairs within the radius, nearest first."""
+        origin = Point(lng, lat, srid=4326)
+        queryset = self._within(self._queryset(min_rating), origin, lat, lng, radius_km)
+        queryset = queryset.annotate(distance=Distance('location__point', origin)).order_by('distance', 'id')
+        return self._results(queryset)
+
+    def coordinates(self, mechanic_ids):
+        """Return ``(ids, lats, lngs)`` arrays for those of ``mechanic_ids`` that are active."""
+        rows = list(self._queryset(0).filter(id__in=mechanic_ids).values_list('id', 'latitude', 'longitude'))
+        ids, lats, lngs = zip(*rows) if rows else ((), (), ())
+        return (
+            np.array(ids, dtype=np.int64),
+            np.array(lats, dtype=np.float64),
+            np.array(lngs, dtype=np.float64),
+        )
+
+    def query_nearest(self, lat, lng, k, min_rating=0, max_radius_km=None, mode=None):
+        """Return the ``k`` nearest ``(mechanic_id, distance_km)`` pairs, nearest first."""
+        if k < 1:
+            return []
+        origin = Point(lng, lat, srid=4326)
+        queryset = self._queryset(min_rating)
+
+        if connection.vendor == 'postgresql':
+            if max_radius_km is not None:
+                queryset = self._within(queryset, origin, lat, lng, max_radius_km)
+            queryset = queryset.annotate(distance=Distance('location__point', origin)).order_by(
+                GeometryDistance('location__point', origin), 'id'
+            )
+            return self._results(queryset[:k])
+
+        # Without KNN, widen the search circle until it holds k shops
+        radius_km = 10.0
+        while True:
+            if max_radius_km is not None:
+                radius_km = min(radius_km, max_radius_km)
+            matches = self.query_radius(lat, lng, radius_km, min_rating)
+            if len(matches) >= k or radius_km >= (max_radius_km or MAX_DISTANCE_KM):
+                return matches[:k]
+            radius_km *= 4
+
+
+database_index = DatabaseIndex()
@@ -0,0 +1,48 @@
+from django.contrib.gis.geos import Point
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from mechanics.models import Mechanic
+from mechanics.signals import mechanics_changed
+
+from .models import MechanicLocation
+
+BATCH_SIZE = 1000
+
+
+def sync_locations():
+    """Upsert the location of every mechanic from its latitude/longitude."""
+    batch = []
+    rows = Mechanic.objects.values_list('id', 'latitude', 'longitude').iterator(chunk_size=BATCH_SIZE)
+    for mechanic_id, latitude, longitude in rows:
+        batch.append(MechanicLocation(
+            mechanic_id=mechanic_id,
+            point=Point(float(longitude), float(latitude), srid=4326),
+        ))
+        if len(batch) >= BATCH_SIZE:
+            _upsert(batch)
+            batch = []
+    if batch:
+        _upsert(batch)
+
+
+def _upsert(batch):
+    MechanicLocation.objects.bulk_create(
+        batch, update_conflicts=True, unique_fields=['mechanic'], update_fields=['point']
+    )
+
+
+@receiver(post_save, sender=Mechanic)
+def sync_location_on_save(sender, instance, **kwargs):
+    """Keep the geometry of a saved mechanic in sync with its coordinates."""
+    MechanicLocation.objects.update_or_create(
+        mechanic=instance,
+        defaults={'point': Point(float(instance.longitude), float(instance.latitude), srid=4326)},
+    )
+
+
+@receiver(mechanics_changed)
+def sync_locations_on_bulk_change(sender, coordinates=False, **kwargs):
+    """Resync every geometry after a bulk write that may have moved shops."""
+    if coordinates:
+        sync_locations()
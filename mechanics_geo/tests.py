@@ -0,0 +1,74 @@
+from unittest import skipUnless
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, skipUnlessDBFeature
+
+from mechanics.models import Mechanic
+from mechanics.spatial_index import mechanic_index
+from mechanics.tests import point_at, reset_search_state, write_synchronously
+
+try:
+    from django.contrib.gis.gdal import GDAL_VERSION  # noqa: F401
+    HAS_GDAL = True
+except (ImportError, ImproperlyConfigured, OSError):
+    HAS_GDAL = False
+
+ORIGIN = (1, 10)
+
+
+@skipUnless(HAS_GDAL and getattr(settings, 'GEO_BACKEND', '') == 'spatialite', 'Needs GDAL and GEO_BACKEND=spatialite')
+@skipUnlessDBFeature('gis_enabled')
+class DatabaseIndexTests(TestCase):
+    """The database queries must agree with the in-process spatial index."""
+
+    def setUp(self):
+        from .queries import database_index
+
+        self.database_index = database_index
+        reset_search_state()
+        write_synchronously(self)
+        for n, km in enumerate((0.5, 2, 4.5, 9.9, 10.2, 30, 120)):
+            lat, lng = point_at(ORIGIN, km, n * 50)
+            Mechanic.objects.create(
+                name=f'Shop {km}', address=f'{n} Main St', contact='555', latitude=round(lat, 6),
+                longitude=round(lng, 6), rating=[3, 4, 5][n % 3], working_hours='9-5',
+            )
+        Mechanic.objects.create(
+            name='Closed', address='Back St', contact='555', latitude=1, longitude=10,
+            rating=5, working_hours='9-5', is_active=False,
+        )
+
+    def assert_same_matches(self, actual, expected):
+        self.assertEqual([mechanic_id for mechanic_id, _ in actual], [mechanic_id for mechanic_id, _ in expected])
+        for (_, distance), (_, expected_distance) in zip(actual, expected):
+            self.assertAlmostEqual(distance, expected_distance, delta=expected_distance * 1e-3 + 1e-3)
+
+    def test_locations_follow_the_mechanics(self):
+        from .models import MechanicLocation
+
+        mechanic = Mechanic.objects.get(name='Shop 2')
+        mechanic.latitude, mechanic.longitude = 2, 11
+        mechanic.save()
+
+        point = MechanicLocation.objects.get(mechanic=mechanic).point
+        self.assertEqual((point.y, point.x), (2, 11))
+
+    def test_radius_query_matches_the_index(self):
+        for radius in (1, 5, 10, 50, 500):
+            for rating in (0, 4):
+                self.assert_same_matches(
+                    self.database_index.query_radius(*ORIGIN, radius, rating),
+                    mechanic_index.query_radius(*ORIGIN, radius, rating),
+                )
+
+    def test_nearest_query_matches_the_index(self):
+        for k in (1, 3, 7, 20):
+            self.assert_same_matches(
+                self.database_index.query_nearest(*ORIGIN, k),
+                mechanic_index.query_nearest(*ORIGIN, k),
+            )
+        self.assert_same_matches(
+            self.database_index.query_nearest(*ORIGIN, 5, min_rating=4, max_radius_km=20),
+            mechanic_index.query_nearest(*ORIGIN, 5, min_rating=4, max_radius_km=20),
+        )
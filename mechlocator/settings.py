@@ -85,6 +85,24 @@ DATABASES = {
     }
 }
 
+# Optional GeoDjango mode: '' (off), 'spatialite' or 'postgis'. Radius and
+# nearest queries then run in the database instead of the in-process index
+GEO_BACKEND = config('GEO_BACKEND', default='')
+if GEO_BACKEND:
+    INSTALLED_APPS += ['django.contrib.gis', 'mechanics_geo']
+if GEO_BACKEND == 'spatialite':
+    DATABASES['default']['ENGINE'] = 'django.contrib.gis.db.backends.spatialite'
+    SPATIALITE_LIBRARY_PATH = config('SPATIALITE_LIBRARY_PATH', default='mod_spatialite')
+elif GEO_BACKEND == 'postgis':
+    DATABASES['default'] = {
+        'ENGINE': 'django.contrib.gis.db.backends.postgis',
+        'NAME': config('DB_NAME', default='mechlocator'),
+        'USER': config('DB_USER', default='postgres'),
+        'PASSWORD': config('DB_PASSWORD', default=''),
+        'HOST': config('DB_HOST', default='localhost'),
+        'PORT': config('DB_PORT', default='5432'),
+    }
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -114,6 +132,9 @@ STATICFILES_DIRS = [
 ]
 STATIC_ROOT = config('STATIC_ROOT', default='staticfiles')
 
+# Fingerprints of the steps `manage.py boot` has completed, so unchanged steps are skipped
+BOOT_STATE_FILE = config('BOOT_STATE_FILE', default=str(BASE_DIR / '.boot_state.json'))
+
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = config('MEDIA_ROOT', default='media')
@@ -144,6 +165,67 @@ if not DEBUG and GOOGLE_MAPS_API_KEY == 'your-google-maps-api-key-here':
         "Please configure your Google Maps API key in the .env file."
     )
 
+# Cache: locmem by default; point CACHE_BACKEND/CACHE_LOCATION at
+# django.core.cache.backends.filebased.FileBasedCache (a directory) or
+# django.core.cache.backends.redis.RedisCache (a redis:// URL) to share it between workers
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='mechlocator'),
+    }
+}
+
+# Seconds a cached mechanic list page stays valid; writes invalidate it sooner
+LIST_CACHE_TIMEOUT = config('LIST_CACHE_TIMEOUT', default=300, cast=int)
+
+# Admin dashboard statistics snapshot, recomputed in the background after writes
+DASHBOARD_STATS_TTL = config('DASHBOARD_STATS_TTL', default=60, cast=int)  # seconds
+DASHBOARD_STATS_BACKGROUND = config('DASHBOARD_STATS_BACKGROUND', default=True, cast=bool)
+
+# Spatial index used by the mechanic search API
+SPATIAL_INDEX_CELL_SIZE = config('SPATIAL_INDEX_CELL_SIZE', default=0.1, cast=float)  # degrees
+SPATIAL_INDEX_TTL = config('SPATIAL_INDEX_TTL', default=300, cast=int)  # seconds before a full rebuild
+
+# /api/search/ caches candidates per location cell; 0 disables the cache
+SEARCH_CACHE_CELL_SIZE = config('SEARCH_CACHE_CELL_SIZE', default=0.01, cast=float)  # degrees
+SEARCH_CACHE_TIMEOUT = config('SEARCH_CACHE_TIMEOUT', default=300, cast=int)
+
+# Map tiles: shops are clustered on a grid per tile until MAP_MARKER_ZOOM
+MAP_CLUSTER_GRID = config('MAP_CLUSTER_GRID', default=8, cast=int)  # grid cells per tile side
+MAP_MARKER_ZOOM = config('MAP_MARKER_ZOOM', default=14, cast=int)
+MAP_MAX_TILE_MARKERS = config('MAP_MAX_TILE_MARKERS', default=200, cast=int)
+MAP_TILE_CACHE_TIMEOUT = config('MAP_TILE_CACHE_TIMEOUT', default=600, cast=int)
+
+# Serve the JSON APIs from async views (mechanics/async_views.py); enable when running
+# under ASGI, e.g. gunicorn -c gunicorn_asgi_config.py mechlocator.asgi:application
+ASYNC_API_VIEWS = config('ASYNC_API_VIEWS', default=False, cast=bool)
+
+# Distance engine: 'lambert' (ellipsoidal, within metres of geopy) or 'haversine' (spherical, faster)
+DISTANCE_MODE = config('DISTANCE_MODE', default='lambert')
+
+# Activity and search logging: rows are queued in-process and bulk inserted by a background thread
+ACTIVITY_LOG_BUFFERED = config('ACTIVITY_LOG_BUFFERED', default=True, cast=bool)
+ACTIVITY_LOG_BATCH_SIZE = config('ACTIVITY_LOG_BATCH_SIZE', default=100, cast=int)
+ACTIVITY_LOG_FLUSH_INTERVAL = config('ACTIVITY_LOG_FLUSH_INTERVAL', default=5.0, cast=float)  # seconds
+
+# Fraction of API searches recorded as SearchQuery rows, and the grid their locations snap to
+SEARCH_LOG_SAMPLE_RATE = config('SEARCH_LOG_SAMPLE_RATE', default=1.0, cast=float)
+SEARCH_LOG_CELL_SIZE = config('SEARCH_LOG_CELL_SIZE', default=0.01, cast=float)  # degrees
+
+# Analytics rollups: the admin pages bring them up to date at most this often (seconds);
+# a scheduled `manage.py update_rollups` keeps them fresh between visits
+ROLLUP_REFRESH_SECONDS = config('ROLLUP_REFRESH_SECONDS', default=300, cast=int)
+
+# Retention: days before log rows are archived and purged by `manage.py purge_logs`
+RETENTION_ACTIVITY_LOG_DAYS = config('RETENTION_ACTIVITY_LOG_DAYS', default=90, cast=int)
+RETENTION_SEARCH_QUERY_DAYS = config('RETENTION_SEARCH_QUERY_DAYS', default=180, cast=int)
+RETENTION_LOGIN_ATTEMPT_DAYS = config('RETENTION_LOGIN_ATTEMPT_DAYS', default=90, cast=int)
+RETENTION_USER_SESSION_DAYS = config('RETENTION_USER_SESSION_DAYS', default=90, cast=int)
+RETENTION_OTP_CODE_DAYS = config('RETENTION_OTP_CODE_DAYS', default=1, cast=int)
+RETENTION_OUTBOUND_EMAIL_DAYS = config('RETENTION_OUTBOUND_EMAIL_DAYS', default=7, cast=int)
+RETENTION_ARCHIVE_DIR = config('RETENTION_ARCHIVE_DIR', default=str(BASE_DIR / 'archives'))
+RETENTION_BATCH_SIZE = config('RETENTION_BATCH_SIZE', default=1000, cast=int)
+
 # Login/Logout URLs
 LOGIN_REDIRECT_URL = '/'
 LOGOUT_REDIRECT_URL = '/'
@@ -152,19 +234,59 @@ LOGOUT_REDIRECT_URL = '/'
 SESSION_COOKIE_AGE = 3600  # 1 hour
 SESSION_EXPIRE_AT_BROWSER_CLOSE = True
 
+# Session storage: cached_db reads sessions from the cache and is only the default
+# with a shared cache, since a per-process cache would keep logged-out sessions
+# alive in other workers. signed_cookies stores nothing on the server, but a
+# copied cookie stays valid until it expires even after logout.
+SESSION_ENGINE = config(
+    'SESSION_ENGINE',
+    default=(
+        'django.contrib.sessions.backends.db'
+        if CACHES['default']['BACKEND'].endswith('LocMemCache')
+        else 'django.contrib.sessions.backends.cached_db'
+    ),
+)
+
 # Email Configuration
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
-EMAIL_HOST = 'smtp.gmail.com'
-EMAIL_PORT = 587
-EMAIL_USE_TLS = True
+EMAIL_HOST = config('EMAIL_HOST', default='smtp.gmail.com')
+EMAIL_PORT = config('EMAIL_PORT', default=587, cast=int)
+EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=True, cast=bool)
 EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='your-email@gmail.com')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='your-app-password')
 DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='MechLocator <noreply@mechlocator.com>')
 
+# Email outbox: views queue mail and `manage.py send_queued_mail` delivers it.
+# The sender runs as its own process (the Procfile and render.yaml worker);
+# disable the outbox where no sender runs so mail is sent directly
+EMAIL_OUTBOX_ENABLED = config('EMAIL_OUTBOX_ENABLED', default=True, cast=bool)
+EMAIL_OUTBOX_BATCH_SIZE = config('EMAIL_OUTBOX_BATCH_SIZE', default=50, cast=int)
+EMAIL_OUTBOX_POLL_INTERVAL = config('EMAIL_OUTBOX_POLL_INTERVAL', default=1.0, cast=float)  # seconds
+EMAIL_OUTBOX_IDLE_TIMEOUT = config('EMAIL_OUTBOX_IDLE_TIMEOUT', default=60, cast=int)  # seconds before hanging up SMTP
+EMAIL_OUTBOX_MAX_ATTEMPTS = config('EMAIL_OUTBOX_MAX_ATTEMPTS', default=6, cast=int)
+EMAIL_OUTBOX_BACKOFF_SECONDS = config('EMAIL_OUTBOX_BACKOFF_SECONDS', default=30, cast=int)
+EMAIL_OUTBOX_MAX_BACKOFF_SECONDS = config('EMAIL_OUTBOX_MAX_BACKOFF_SECONDS', default=3600, cast=int)
+
 # OTP Settings
 OTP_EXPIRY_MINUTES = 10
 OTP_LENGTH = 6
 
+# Where pending OTP codes live: 'cache' keeps them hashed in the cache and writes
+# OTPCode rows in the background, 'database' writes them on the request. The cache
+# store needs a cache shared by all workers, so it is only the default with one.
+OTP_STORE = config(
+    'OTP_STORE',
+    default='database' if CACHES['default']['BACKEND'].endswith('LocMemCache') else 'cache',
+)
+
+# Login rate limits, counted in the cache: every attempt per IP, and failed
+# passwords or wrong OTP codes per account before further attempts are refused
+LOGIN_IP_RATE_LIMIT = config('LOGIN_IP_RATE_LIMIT', default=20, cast=int)
+LOGIN_IP_RATE_WINDOW = config('LOGIN_IP_RATE_WINDOW', default=300, cast=int)  # seconds
+MAX_LOGIN_ATTEMPTS = config('MAX_LOGIN_ATTEMPTS', default=5, cast=int)
+LOCKOUT_DURATION_MINUTES = config('LOCKOUT_DURATION_MINUTES', default=30, cast=int)
+OTP_MAX_ATTEMPTS = config('OTP_MAX_ATTEMPTS', default=5, cast=int)
+
 # Production Security Settings
 if not DEBUG:
     # HTTPS Settings
@@ -0,0 +1,69 @@
+import gc
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+
+from mechanics.models import Mechanic
+from mechanics.spatial_index import mechanic_index
+
+from . import warmup
+
+SMAPS_ROLLUP = """55d4f6a9c000-7ffd1b3f1000 ---p 00000000 00:00 0                          [rollup]
+Rss:               10240 kB
+Pss:                5120 kB
+Pss_Anon:           4096 kB
+Shared_Clean:       2048 kB
+Shared_Dirty:       1024 kB
+Private_Clean:       512 kB
+Private_Dirty:      6656 kB
+Swap:                  0 kB
+"""
+
+
+class WarmUpTests(TestCase):
+    def setUp(self):
+        Mechanic.objects.create(
+            name='Shop', address='1 Main St', contact='555', latitude=1, longitude=10,
+            rating=4, working_hours='9-5',
+        )
+        self.addCleanup(mechanic_index.invalidate)
+        # warm_up() freezes the GC for the forked workers; give the objects back to the collector
+        self.addCleanup(gc.unfreeze)
+
+    def test_every_step_runs_and_the_gc_is_frozen(self):
+        with mock.patch('django.db.connections.close_all') as close_all:
+            timings = warmup.warm_up()
+
+        results = {name: result for name, result, _ in timings}
+        self.assertEqual(list(results), ['spatial index', 'templates', 'urls'])
+        self.assertEqual(results['spatial index'], 1)
+        self.assertGreater(results['templates'], 0)
+        self.assertGreater(results['urls'], 0)
+        self.assertTrue(all(seconds >= 0 for _, _, seconds in timings))
+        close_all.assert_called_once_with()
+        self.assertGreater(gc.get_freeze_count(), 0)
+
+    def test_failing_step_does_not_stop_the_others(self):
+        steps = [('broken', mock.Mock(side_effect=RuntimeError('boom'))), ('urls', warmup.resolve_urls)]
+
+        with mock.patch.object(warmup, 'WARMUP_STEPS', steps), self.assertLogs('mechlocator.warmup', 'ERROR'):
+            timings = warmup.warm_up()
+
+        self.assertEqual([(name, result is None) for name, result, _ in timings], [('broken', True), ('urls', False)])
+
+
+class MemoryUsageTests(SimpleTestCase):
+    def test_smaps_rollup_is_summed_by_kind(self):
+        with mock.patch('builtins.open', mock.mock_open(read_data=SMAPS_ROLLUP)) as smaps:
+            usage = warmup.memory_usage(1234)
+
+        smaps.assert_called_once_with('/proc/1234/smaps_rollup')
+        self.assertEqual(usage, {'rss': 10240, 'pss': 5120, 'shared': 3072, 'private': 7168})
+        self.assertEqual(warmup.format_memory(usage), 'rss 10.0 MB, pss 5.0 MB, shared 3.0 MB, private 7.0 MB')
+
+    def test_usage_is_unavailable_without_smaps(self):
+        with mock.patch('builtins.open', side_effect=OSError('no /proc')):
+            usage = warmup.memory_usage()
+
+        self.assertIsNone(usage)
+        self.assertEqual(warmup.format_memory(usage), 'memory usage unavailable')
@@ -0,0 +1,106 @@
+import gc
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def load_spatial_index():
+    from mechanics.spatial_index import mechanic_index
+
+    mechanic_index.build()
+    return len(mechanic_index)
+
+
+def compile_templates():
+    """Load every template so the cached loader holds them compiled."""
+    from django.template import TemplateSyntaxError, engines
+
+    count = 0
+    for engine in engines.all():
+        for directory in engine.template_dirs:
+            for root, _, files in os.walk(directory):
+                for name in files:
+                    if not name.endswith(('.html', '.txt')):
+                        continue
+                    try:
+                        engine.get_template(os.path.relpath(os.path.join(root, name), directory))
+                        count += 1
+                    except TemplateSyntaxError as e:
+                        logger.error(f"Failed to compile template {name}: {str(e)}")
+    return count
+
+
+def resolve_urls():
+    """Populate the URL resolver, which also imports every view module."""
+    from django.urls import get_resolver
+
+    resolver = get_resolver()
+    return len(resolver.reverse_dict)
+
+
+WARMUP_STEPS = [
+    ('spatial index', load_spatial_index),
+    ('templates', compile_templates),
+    ('urls', resolve_urls),
+]
+
+
+def warm_up():
+    """Build per-process state once before gunicorn forks, then freeze the GC.
+
+    Workers forked from a preloaded master share its memory copy-on-write.
+    Loading the index, templates and URL resolver here puts them in those
+    shared pages instead of every worker building its own. ``gc.freeze()``
+    moves everything alive into a generation the collector never scans, so
+    the workers' collections do not write to (and unshare) those pages.
+    Returns ``(step, result, seconds)`` tuples.
+    """
+    from django.db import connections
+
+    timings = []
+    for name, step in WARMUP_STEPS:
+        started = time.monotonic()
+        try:
+            result = step()
+        except Exception as e:
+            logger.error(f"Warm-up step {name} failed: {str(e)}")
+            result = None
+        timings.append((name, result, time.monotonic() - started))
+
+    # Connections must not be shared with the forked workers
+    connections.close_all()
+    gc.collect()
+    gc.freeze()
+    return timings
+
+
+def memory_usage(pid='self'):
+    """RSS, PSS, shared and private memory of a process in kB, or ``None`` off Linux.
+
+    PSS splits shared pages between the processes mapping them, so the PSS
+    of the workers adds up to what they really cost together.
+    """
+    fields = {
+        'Rss': 'rss', 'Pss': 'pss',
+        'Shared_Clean': 'shared', 'Shared_Dirty': 'shared',
+        'Private_Clean': 'private', 'Private_Dirty': 'private',
+    }
+    usage = {'rss': 0, 'pss': 0, 'shared': 0, 'private': 0}
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            for line in f:
+                parts = line.split()
+                key = parts[0].rstrip(':')
+                if key in fields:
+                    usage[fields[key]] += int(parts[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return usage
+
+
+def format_memory(usage):
+    if usage is None:
+        return 'memory usage unavailable'
+    return ', '.join(f'{key} {value / 1024:.1f} MB' for key, value in usage.items())
@@ -0,0 +1,76 @@
+import time
+from datetime import timedelta
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.sessions.backends.db import SessionStore as DatabaseSessionStore
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from otp_auth.models import UserSession
+
+
+class Command(BaseCommand):
+    help = 'Delete expired sessions in small batches and close stale UserSession rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=getattr(settings, 'RETENTION_BATCH_SIZE', 1000),
+            help='Rows deleted or updated per statement'
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0.0,
+            help='Seconds to sleep between batches to let other writers in'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        now = timezone.now()
+        engine = import_module(settings.SESSION_ENGINE)
+        if issubclass(engine.SessionStore, DatabaseSessionStore):
+            deleted = self.purge_sessions(now, batch_size, options['pause'])
+            self.stdout.write(f'Deleted {deleted} expired sessions')
+        else:
+            # Cache and signed-cookie sessions expire on their own
+            try:
+                engine.SessionStore.clear_expired()
+            except NotImplementedError:
+                pass
+            self.stdout.write(f'{settings.SESSION_ENGINE} keeps no session rows to purge')
+
+        closed = self.close_user_sessions(now, batch_size, options['pause'])
+        self.stdout.write(self.style.SUCCESS(f'Closed {closed} UserSession rows whose session expired'))
+
+    def purge_sessions(self, now, batch_size, pause):
+        deleted = 0
+        while True:
+            keys = list(
+                Session.objects.filter(expire_date__lt=now).values_list('session_key', flat=True)[:batch_size]
+            )
+            if not keys:
+                return deleted
+            deleted += Session.objects.filter(session_key__in=keys).delete()[0]
+            if pause:
+                time.sleep(pause)
+
+    def close_user_sessions(self, now, batch_size, pause):
+        """Mark rows inactive once their session can no longer be alive; logout_time stays empty."""
+        cutoff = now - timedelta(seconds=settings.SESSION_COOKIE_AGE)
+        closed = 0
+        while True:
+            ids = list(
+                UserSession.objects.filter(is_active=True, login_time__lt=cutoff).values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                return closed
+            closed += UserSession.objects.filter(id__in=ids).update(is_active=False)
+            if pause:
+                time.sleep(pause)
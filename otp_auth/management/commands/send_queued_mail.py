@@ -0,0 +1,62 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from otp_auth.outbox import OutboxSender, claim_batch
+
+
+class Command(BaseCommand):
+    help = (
+        'Deliver queued outbound emails over a reused SMTP connection. Point EMAIL_HOST/EMAIL_PORT '
+        'at a local stand-in (e.g. python -m aiosmtpd -n -l localhost:8025) to test without Gmail.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Drain the outbox and exit instead of polling'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=getattr(settings, 'EMAIL_OUTBOX_BATCH_SIZE', 50),
+            help='Emails claimed per batch'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=getattr(settings, 'EMAIL_OUTBOX_POLL_INTERVAL', 1.0),
+            help='Seconds between polls when the outbox is empty'
+        )
+
+    def handle(self, *args, **options):
+        sender = OutboxSender()
+        idle_timeout = getattr(settings, 'EMAIL_OUTBOX_IDLE_TIMEOUT', 60)
+        last_sent = time.monotonic()
+        total = 0
+
+        try:
+            while True:
+                close_old_connections()
+                batch = claim_batch(options['batch_size'])
+                if batch:
+                    sent = sender.deliver(batch)
+                    total += sent
+                    last_sent = time.monotonic()
+                    self.stdout.write(f'Sent {sent} of {len(batch)} emails')
+                    continue
+                if options['once']:
+                    break
+                # SMTP servers drop idle clients; hang up first and reconnect on demand
+                if time.monotonic() - last_sent > idle_timeout:
+                    sender.close()
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            sender.close()
+
+        self.stdout.write(self.style.SUCCESS(f'Delivered {total} emails'))
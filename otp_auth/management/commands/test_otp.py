@@ -1,6 +1,6 @@
 from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User
-from otp_auth.models import OTPCode
+from otp_auth.otp_store import get_otp_store
 from otp_auth.utils import send_otp_email
 
 
@@ -18,7 +18,7 @@ class Command(BaseCommand):
             self.stdout.write(f"Testing OTP for user: {user.username} ({user.email})")
             
             # Generate OTP
-            otp = OTPCode.generate_otp(user, purpose='login')
+            otp = get_otp_store().issue(user, purpose='login')
             self.stdout.write(f"Generated OTP: {otp.code}")
             self.stdout.write(f"Expires at: {otp.expires_at}")
             
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('otp_auth', '0004_otp_lookup_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='usersession',
+            index=models.Index(fields=['session_key'], name='usersession_key_idx'),
+        ),
+    ]
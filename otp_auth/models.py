@@ -9,7 +9,7 @@ class OTPCode(models.Model):
     """Model for storing OTP codes for user authentication."""
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     code = models.CharField(max_length=6)
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(default=timezone.now)
     expires_at = models.DateTimeField()
     is_used = models.BooleanField(default=False)
     purpose = models.CharField(max_length=20, choices=[
@@ -20,6 +20,10 @@ class OTPCode(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at'], name='otpcode_created_at_idx'),
+            models.Index(fields=['user', 'purpose', 'is_used'], name='otpcode_lookup_idx'),
+        ]
     
     def __str__(self):
         return f"OTP for {self.user.username} - {self.purpose}"
@@ -62,12 +66,16 @@ class UserSession(models.Model):
     session_key = models.CharField(max_length=40)
     ip_address = models.GenericIPAddressField()
     user_agent = models.TextField()
-    login_time = models.DateTimeField(auto_now_add=True)
+    login_time = models.DateTimeField(default=timezone.now)
     logout_time = models.DateTimeField(null=True, blank=True)
     is_active = models.BooleanField(default=True)
     
     class Meta:
         ordering = ['-login_time']
+        indexes = [
+            models.Index(fields=['login_time'], name='usersession_login_time_idx'),
+            models.Index(fields=['session_key'], name='usersession_key_idx'),
+        ]
     
     def __str__(self):
         return f"Session for {self.user.username} - {self.login_time}"
@@ -85,13 +93,52 @@ class LoginAttempt(models.Model):
     username = models.CharField(max_length=150)
     ip_address = models.GenericIPAddressField()
     user_agent = models.TextField()
-    attempt_time = models.DateTimeField(auto_now_add=True)
+    attempt_time = models.DateTimeField(default=timezone.now)
     success = models.BooleanField(default=False)
     failure_reason = models.CharField(max_length=100, blank=True)
     
     class Meta:
         ordering = ['-attempt_time']
+        indexes = [
+            models.Index(fields=['attempt_time'], name='loginattempt_time_idx'),
+        ]
     
     def __str__(self):
         status = "Success" if self.success else "Failed"
         return f"Login attempt for {self.username} - {status}"
+
+
+class OutboundEmail(models.Model):
+    """Email waiting in the outbox for the delivery worker."""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    from_email = models.CharField(max_length=254)
+    recipients = models.TextField(help_text="Comma-separated recipient addresses")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True, help_text="Give up delivery after this time")
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outboundemail_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} to {self.recipients} ({self.status})"
+
+    @property
+    def recipient_list(self):
+        return [address for address in self.recipients.split(',') if address]
@@ -0,0 +1,125 @@
+import hashlib
+import hmac
+import secrets
+import string
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from mechanics.writers import otp_code_marker, otp_code_writer
+
+from .models import OTPCode
+
+
+class DatabaseOTPStore:
+    """Pending codes as ``OTPCode`` rows, written and checked synchronously."""
+
+    def __init__(self, expiry_minutes=10):
+        self.expiry_minutes = expiry_minutes
+
+    def issue(self, user, purpose='login'):
+        """Create a code for ``user``, replacing any unused one; returns an ``OTPCode``."""
+        return OTPCode.generate_otp(user, purpose=purpose, expiry_minutes=self.expiry_minutes)
+
+    def verify(self, user, code, purpose='login'):
+        """Consume ``code`` if it is the user's current, unexpired code."""
+        otp = OTPCode.objects.filter(user=user, code=code, purpose=purpose, is_used=False).first()
+        if otp and otp.is_valid():
+            otp.is_used = True
+            otp.save(update_fields=['is_used'])
+            return True
+        return False
+
+
+class CacheOTPStore:
+    """Pending codes kept hashed in the cache, expiring with the code.
+
+    Each user and purpose has at most one pending code, stored as an HMAC
+    of the code under a key that lives ``expiry_minutes``. Wrong guesses are
+    counted per code, and the code is discarded after ``max_attempts`` of
+    them. Issued codes are recorded as ``OTPCode`` rows for auditing through
+    a buffered writer, and marked used once verified, so neither issuing nor
+    verifying writes to the database on the request thread. The audit rows
+    leave ``code`` empty: the cache only holds a digest, and a readable code
+    in the database would undo that.
+
+    Needs a cache shared by every worker, such as Redis.
+    """
+
+    def __init__(self, expiry_minutes=10, max_attempts=5, length=6):
+        self.expiry_minutes = expiry_minutes
+        self.max_attempts = max_attempts
+        self.length = length
+
+    def _key(self, user_id, purpose):
+        return f'otp_auth:otp:{purpose}:{user_id}'
+
+    def _digest(self, user_id, purpose, code):
+        message = f'{user_id}:{purpose}:{code}'.encode('utf-8')
+        return hmac.new(settings.SECRET_KEY.encode('utf-8'), message, hashlib.sha256).hexdigest()
+
+    def issue(self, user, purpose='login'):
+        """Create a code for ``user``, replacing any pending one; returns an unsaved ``OTPCode``."""
+        code = ''.join(secrets.choice(string.digits) for _ in range(self.length))
+        now = timezone.now()
+        otp = OTPCode(
+            user=user,
+            code=code,
+            purpose=purpose,
+            created_at=now,
+            expires_at=now + timedelta(minutes=self.expiry_minutes),
+        )
+        cache.set(
+            self._key(user.id, purpose),
+            {
+                'digest': self._digest(user.id, purpose, code),
+                'nonce': secrets.token_hex(8),
+                'expires_at': otp.expires_at,
+            },
+            self.expiry_minutes * 60,
+        )
+        otp_code_writer.add(
+            user_id=user.id, code='', purpose=purpose, created_at=otp.created_at, expires_at=otp.expires_at
+        )
+        return otp
+
+    def verify(self, user, code, purpose='login'):
+        """Consume ``code`` if it is the user's pending code; count a wrong guess otherwise."""
+        key = self._key(user.id, purpose)
+        pending = cache.get(key)
+        if pending is None:
+            return False
+
+        if hmac.compare_digest(pending['digest'], self._digest(user.id, purpose, code)):
+            # Only the request that removes the entry gets to use the code
+            if not cache.delete(key):
+                return False
+            if pending.get('expires_at'):
+                otp_code_marker.add(user_id=user.id, purpose=purpose, expires_at=pending['expires_at'])
+            return True
+
+        attempts_key = f"{key}:{pending['nonce']}:attempts"
+        if cache.add(attempts_key, 1, self.expiry_minutes * 60):
+            attempts = 1
+        else:
+            try:
+                attempts = cache.incr(attempts_key)
+            except ValueError:
+                attempts = 1
+        if attempts >= self.max_attempts:
+            cache.delete(key)
+        return False
+
+
+def get_otp_store():
+    """The store selected by ``OTP_STORE``: 'cache' or 'database'."""
+    expiry_minutes = getattr(settings, 'OTP_EXPIRY_MINUTES', 10)
+    if getattr(settings, 'OTP_STORE', 'database') == 'cache':
+        return CacheOTPStore(
+            expiry_minutes=expiry_minutes,
+            max_attempts=getattr(settings, 'OTP_MAX_ATTEMPTS', 5),
+            length=getattr(settings, 'OTP_LENGTH', 6),
+        )
+    return DatabaseOTPStore(expiry_minutes=expiry_minutes)
@@ -0,0 +1,126 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+
+def queue_mail(subject, message, from_email, recipient_list, html_message=None, expires_at=None):
+    """Store an email in the outbox; mirrors ``django.core.mail.send_mail``.
+
+    Mail that is useless once stale, such as a one-time code, passes
+    ``expires_at`` so it is dropped instead of retried past that time.
+    """
+    return OutboundEmail.objects.create(
+        subject=subject[:255],
+        body=message,
+        html_body=html_message or '',
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipients=','.join(recipient_list),
+        expires_at=expires_at,
+    )
+
+
+def claim_batch(batch_size=50, lease_seconds=300):
+    """Mark up to ``batch_size`` due emails as sending and return them.
+
+    A claim is a lease: if the worker dies mid-batch, the rows become due
+    again once ``lease_seconds`` have passed. Each row is claimed with its
+    own conditional UPDATE, so concurrent workers never send the same email.
+    """
+    now = timezone.now()
+    due = Q(status__in=['pending', 'sending'], next_attempt_at__lte=now)
+    OutboundEmail.objects.filter(due, expires_at__lte=now).update(
+        status='failed', last_error='Expired before delivery'
+    )
+    candidates = OutboundEmail.objects.filter(due).order_by('next_attempt_at', 'id').values_list(
+        'id', flat=True
+    )[:batch_size]
+
+    lease = now + timedelta(seconds=lease_seconds)
+    claimed = [
+        email_id for email_id in list(candidates)
+        if OutboundEmail.objects.filter(due, id=email_id).update(status='sending', next_attempt_at=lease)
+    ]
+    return list(OutboundEmail.objects.filter(id__in=claimed).order_by('id'))
+
+
+def backoff_delay(attempts):
+    """Seconds to wait before the next attempt: doubling, capped."""
+    base = getattr(settings, 'EMAIL_OUTBOX_BACKOFF_SECONDS', 30)
+    cap = getattr(settings, 'EMAIL_OUTBOX_MAX_BACKOFF_SECONDS', 3600)
+    return min(base * 2 ** max(attempts - 1, 0), cap)
+
+
+class OutboxSender:
+    """Deliver outbox emails over one SMTP connection kept open between batches."""
+
+    def __init__(self, connection=None, max_attempts=None):
+        self.connection = connection or get_connection(fail_silently=False)
+        self.max_attempts = max_attempts or getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 6)
+        self.is_open = False
+
+    def open(self):
+        # Opening explicitly stops send_messages() from closing the connection after each call
+        if not self.is_open:
+            self.connection.open()
+            self.is_open = True
+
+    def close(self):
+        if self.is_open:
+            try:
+                self.connection.close()
+            finally:
+                self.is_open = False
+
+    def send(self, email):
+        message = EmailMultiAlternatives(
+            subject=email.subject,
+            body=email.body,
+            from_email=email.from_email,
+            to=email.recipient_list,
+            connection=self.connection,
+        )
+        if email.html_body:
+            message.attach_alternative(email.html_body, 'text/html')
+        self.open()
+        message.send()
+
+    def deliver(self, emails):
+        """Send a claimed batch and record the outcome of every email; returns the number sent."""
+        sent = 0
+        for email in emails:
+            try:
+                self.send(email)
+            except Exception as e:
+                # The connection may be broken; reconnect for the next email
+                self.close()
+                self.record_failure(email, e)
+                continue
+            # The body is no longer needed, and may hold a one-time code
+            OutboundEmail.objects.filter(id=email.id).update(
+                status='sent', sent_at=timezone.now(), attempts=F('attempts') + 1, last_error='',
+                body='', html_body='',
+            )
+            sent += 1
+        return sent
+
+    def record_failure(self, email, error):
+        attempts = email.attempts + 1
+        now = timezone.now()
+        next_attempt_at = now + timedelta(seconds=backoff_delay(attempts))
+        if attempts >= self.max_attempts or (email.expires_at and next_attempt_at >= email.expires_at):
+            status, next_attempt_at = 'failed', now
+            logger.error(f"Giving up on email {email.id} to {email.recipients}: {str(error)}")
+        else:
+            status = 'pending'
+            logger.warning(f"Email {email.id} failed (attempt {attempts}), retrying: {str(error)}")
+        OutboundEmail.objects.filter(id=email.id).update(
+            status=status, attempts=attempts, next_attempt_at=next_attempt_at, last_error=str(error)[:1000]
+        )
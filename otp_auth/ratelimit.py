@@ -0,0 +1,92 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+class SlidingWindowLimiter:
+    """Approximate sliding-window counter kept in the Django cache.
+
+    Hits are counted per fixed window of ``window`` seconds. The rate over
+    the last ``window`` seconds is estimated as the current window's count
+    plus the previous window's count, weighted by how much of it still
+    overlaps the sliding window. A check is one ``get_many`` and a hit one
+    ``add``/``incr``, so rejecting a flood costs no database work.
+
+    Counters live in the default cache, so workers only share limits when
+    it points at a shared backend such as Redis.
+    """
+
+    def __init__(self, scope, limit, window):
+        self.scope = scope
+        self.limit = limit
+        self.window = window
+
+    def _key(self, identity, bucket):
+        digest = hashlib.md5(str(identity).lower().encode('utf-8')).hexdigest()
+        return f'otp_auth:ratelimit:{self.scope}:{digest}:{bucket}'
+
+    def count(self, identity, now=None):
+        """Estimated number of hits for ``identity`` over the last window."""
+        now = time.time() if now is None else now
+        bucket = int(now // self.window)
+        current, previous = self._key(identity, bucket), self._key(identity, bucket - 1)
+        values = cache.get_many([current, previous])
+        overlap = 1 - (now % self.window) / self.window
+        return values.get(current, 0) + values.get(previous, 0) * overlap
+
+    def is_limited(self, identity, now=None):
+        """Whether ``identity`` has used up its allowance."""
+        if not identity or self.limit <= 0:
+            return False
+        return self.count(identity, now) >= self.limit
+
+    def hit(self, identity, now=None):
+        """Count one attempt for ``identity``."""
+        if not identity:
+            return
+        now = time.time() if now is None else now
+        key = self._key(identity, int(now // self.window))
+        # Two windows, so the previous count is still there for the estimate
+        timeout = self.window * 2
+        if not cache.add(key, 1, timeout):
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.set(key, 1, timeout)
+
+    def reset(self, identity, now=None):
+        """Forget the attempts counted for ``identity``."""
+        now = time.time() if now is None else now
+        bucket = int(now // self.window)
+        cache.delete_many([self._key(identity, bucket), self._key(identity, bucket - 1)])
+
+
+# Every login POST per IP, counted before the password is checked
+login_ip_limiter = SlidingWindowLimiter(
+    'login-ip',
+    getattr(settings, 'LOGIN_IP_RATE_LIMIT', 20),
+    getattr(settings, 'LOGIN_IP_RATE_WINDOW', 300),
+)
+
+# Failed passwords per username
+login_user_limiter = SlidingWindowLimiter(
+    'login-user',
+    getattr(settings, 'MAX_LOGIN_ATTEMPTS', 5),
+    getattr(settings, 'LOCKOUT_DURATION_MINUTES', 30) * 60,
+)
+
+# Every OTP verification POST per IP
+verify_ip_limiter = SlidingWindowLimiter(
+    'verify-ip',
+    getattr(settings, 'LOGIN_IP_RATE_LIMIT', 20),
+    getattr(settings, 'LOGIN_IP_RATE_WINDOW', 300),
+)
+
+# Wrong OTP codes per pending user, over the lifetime of a code
+verify_user_limiter = SlidingWindowLimiter(
+    'verify-user',
+    getattr(settings, 'OTP_MAX_ATTEMPTS', 5),
+    getattr(settings, 'OTP_EXPIRY_MINUTES', 10) * 60,
+)
@@ -1,3 +1,249 @@
-from django.test import TestCase
+import io
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from mechanics.retention import POLICIES
+from mechanics.tests import write_synchronously
+
+from .models import OTPCode, OutboundEmail, UserSession
+from .otp_store import CacheOTPStore, DatabaseOTPStore
+from .outbox import OutboxSender, claim_batch, queue_mail
+from .ratelimit import SlidingWindowLimiter, login_user_limiter
+from .utils import send_otp_email, track_login_attempt
+
+
+def outbound_email(**fields):
+    defaults = {
+        'subject': 'Hello',
+        'message': 'Body',
+        'from_email': 'noreply@example.com',
+        'recipient_list': ['driver@example.com'],
+    }
+    defaults.update(fields)
+    return queue_mail(**defaults)
+
+
+class OutboxTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('driver', 'driver@example.com', 'secret-pass-123')
+
+    @override_settings(EMAIL_OUTBOX_ENABLED=True)
+    def test_otp_email_is_queued_with_the_code_expiry(self):
+        otp = OTPCode.generate_otp(self.user, expiry_minutes=10)
+        self.assertTrue(send_otp_email(self.user, otp))
+
+        email = OutboundEmail.objects.get()
+        self.assertEqual(email.expires_at, otp.expires_at)
+        self.assertEqual(len(mail.outbox), 0)
+
+    @override_settings(EMAIL_OUTBOX_ENABLED=False)
+    def test_otp_email_is_sent_directly_when_the_outbox_is_disabled(self):
+        otp = OTPCode.generate_otp(self.user)
+        self.assertTrue(send_otp_email(self.user, otp))
+
+        self.assertFalse(OutboundEmail.objects.exists())
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_sent_email_has_its_body_cleared(self):
+        email = outbound_email(html_message='<p>Body</p>')
+
+        sent = OutboxSender().deliver(claim_batch())
+
+        self.assertEqual(sent, 1)
+        self.assertEqual(mail.outbox[0].body, 'Body')
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.body, email.html_body), ('sent', '', ''))
+
+    def test_expired_email_is_not_claimed(self):
+        email = outbound_email(expires_at=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(claim_batch(), [])
+        email.refresh_from_db()
+        self.assertEqual(email.status, 'failed')
+
+    def test_failure_is_not_retried_past_the_expiry(self):
+        outbound_email(expires_at=timezone.now() + timedelta(seconds=10))
+        sender = OutboxSender()
+
+        with mock.patch.object(sender, 'send', side_effect=OSError('connection refused')):
+            self.assertEqual(sender.deliver(claim_batch()), 0)
+
+        email = OutboundEmail.objects.get()
+        self.assertEqual((email.status, email.attempts), ('failed', 1))
+
+    def test_failure_is_retried_with_backoff(self):
+        outbound_email()
+        sender = OutboxSender()
+
+        with mock.patch.object(sender, 'send', side_effect=OSError('connection refused')):
+            sender.deliver(claim_batch())
+
+        email = OutboundEmail.objects.get()
+        self.assertEqual((email.status, email.attempts), ('pending', 1))
+        self.assertGreater(email.next_attempt_at, timezone.now())
+        self.assertEqual(claim_batch(), [])
+
+    def test_retention_keeps_pending_email(self):
+        policy = next(policy for policy in POLICIES if policy.model_label == 'otp_auth.OutboundEmail')
+        pending = outbound_email()
+        sent = outbound_email()
+        OutboundEmail.objects.filter(id=sent.id).update(status='sent')
+
+        later = timezone.now() + timedelta(days=policy.days + 1)
+        self.assertEqual(list(policy.expired(later)), [OutboundEmail.objects.get(id=sent.id)])
+        self.assertNotIn(pending, policy.expired(later))
+
+
+class LoginAttemptTests(TestCase):
+    def test_attempt_time_is_taken_when_the_attempt_is_tracked(self):
+        with mock.patch('otp_auth.utils.login_attempt_writer') as writer:
+            before = timezone.now()
+            track_login_attempt(RequestFactory().post('/accounts/login/'), 'driver', success=False)
+
+        attempt_time = writer.add.call_args.kwargs['attempt_time']
+        self.assertGreaterEqual(attempt_time, before)
+        self.assertLessEqual(attempt_time, timezone.now())
+
+
+class OTPStoreTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        write_synchronously(self)
+        self.user = User.objects.create_user('driver', 'driver@example.com', 'secret-pass-123')
+
+    def test_cache_store_code_is_used_once(self):
+        store = CacheOTPStore()
+        otp = store.issue(self.user)
+
+        self.assertTrue(store.verify(self.user, otp.code))
+        self.assertFalse(store.verify(self.user, otp.code))
+
+    def test_cache_store_audit_row_is_marked_used(self):
+        store = CacheOTPStore()
+        otp = store.issue(self.user)
+        audit = OTPCode.objects.get(user=self.user)
+        self.assertEqual((audit.code, audit.is_used), ('', False))
+
+        store.verify(self.user, otp.code)
+
+        audit.refresh_from_db()
+        self.assertTrue(audit.is_used)
+
+    def test_cache_store_discards_the_code_after_too_many_guesses(self):
+        store = CacheOTPStore(max_attempts=3)
+        otp = store.issue(self.user)
+        wrong = '0' * 6 if otp.code != '0' * 6 else '1' * 6
+
+        for _ in range(3):
+            self.assertFalse(store.verify(self.user, wrong))
+        self.assertFalse(store.verify(self.user, otp.code))
+
+    def test_cache_store_codes_are_per_purpose(self):
+        store = CacheOTPStore()
+        otp = store.issue(self.user, purpose='password_reset')
+
+        self.assertFalse(store.verify(self.user, otp.code, purpose='login'))
+        self.assertTrue(store.verify(self.user, otp.code, purpose='password_reset'))
+
+    def test_database_store_rejects_expired_codes(self):
+        store = DatabaseOTPStore()
+        otp = store.issue(self.user)
+        OTPCode.objects.filter(id=otp.id).update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        self.assertFalse(store.verify(self.user, otp.code))
+
+
+class SlidingWindowLimiterTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.limiter = SlidingWindowLimiter('test', limit=3, window=60)
+
+    def test_limit_is_reached_after_the_allowed_hits(self):
+        for _ in range(3):
+            self.assertFalse(self.limiter.is_limited('10.0.0.1', now=1000))
+            self.limiter.hit('10.0.0.1', now=1000)
+
+        self.assertTrue(self.limiter.is_limited('10.0.0.1', now=1000))
+        self.assertFalse(self.limiter.is_limited('10.0.0.2', now=1000))
+
+    def test_previous_window_counts_by_its_overlap(self):
+        for _ in range(3):
+            self.limiter.hit('driver', now=1199)
+
+        # 15s into the next window, three quarters of the previous one still overlap
+        self.assertAlmostEqual(self.limiter.count('driver', now=1215), 2.25)
+        self.assertFalse(self.limiter.is_limited('driver', now=1215))
+        # Right at the window boundary the previous window still counts in full, whatever the case
+        self.assertTrue(self.limiter.is_limited('Driver', now=1200))
+
+    def test_reset_forgets_the_hits(self):
+        for _ in range(3):
+            self.limiter.hit('driver', now=1000)
+        self.limiter.reset('driver', now=1000)
+
+        self.assertEqual(self.limiter.count('driver', now=1000), 0)
+
+
+class LoginRateLimitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        write_synchronously(self)
+        User.objects.create_user('driver', 'driver@example.com', 'secret-pass-123')
+
+    def test_login_is_refused_after_too_many_wrong_passwords(self):
+        for _ in range(login_user_limiter.limit):
+            response = self.client.post(reverse('otp_auth:login'), {'username': 'driver', 'password': 'wrong'})
+            self.assertEqual(response.status_code, 200)
+
+        response = self.client.post(reverse('otp_auth:login'), {'username': 'driver', 'password': 'secret-pass-123'})
+        self.assertEqual(response.status_code, 429)
+        self.assertFalse(OTPCode.objects.exists())
+
+
+class PurgeSessionsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('driver', 'driver@example.com', 'secret-pass-123')
+
+    def create_user_session(self, key, hours_ago):
+        return UserSession.objects.create(
+            user=self.user, session_key=key, ip_address='10.0.0.1', user_agent='test',
+            login_time=timezone.now() - timedelta(hours=hours_ago),
+        )
+
+    def purge(self, **options):
+        call_command('purge_sessions', stdout=io.StringIO(), **options)
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.db')
+    def test_expired_sessions_are_deleted_in_batches(self):
+        now = timezone.now()
+        for n in range(5):
+            Session.objects.create(session_key=f'expired{n}', session_data='', expire_date=now - timedelta(minutes=1))
+        Session.objects.create(session_key='alive', session_data='', expire_date=now + timedelta(hours=1))
+
+        self.purge(batch_size=2)
+
+        self.assertEqual(list(Session.objects.values_list('session_key', flat=True)), ['alive'])
+
+    def test_user_sessions_are_closed_once_their_session_has_expired(self):
+        stale = self.create_user_session('stale', hours_ago=2)
+        current = self.create_user_session('current', hours_ago=0)
+
+        self.purge()
+
+        stale.refresh_from_db()
+        current.refresh_from_db()
+        self.assertEqual((stale.is_active, stale.logout_time), (False, None))
+        self.assertTrue(current.is_active)
+
+    def test_batch_size_must_be_positive(self):
+        with self.assertRaises(CommandError):
+            self.purge(batch_size=0)
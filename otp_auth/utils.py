@@ -3,13 +3,27 @@ from django.core.mail import send_mail
 from django.conf import settings
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
-from django.contrib.auth.models import User
-from .models import OTPCode, UserSession, LoginAttempt
+from .models import LoginAttempt
+from .outbox import queue_mail
+from .ratelimit import login_user_limiter
+from mechanics.writers import login_attempt_writer, user_session_closer, user_session_writer
 from django.utils import timezone
+from django.utils.crypto import get_random_string
 from datetime import timedelta
 
 logger = logging.getLogger(__name__)
 
+# Session entry holding the UserSession.session_key of the current login
+SESSION_TRACKING_KEY = 'user_session_key'
+
+
+def deliver_mail(expires_at=None, **kwargs):
+    """Queue an email in the outbox, or send it right away when the outbox is disabled."""
+    if getattr(settings, 'EMAIL_OUTBOX_ENABLED', False):
+        queue_mail(expires_at=expires_at, **kwargs)
+    else:
+        send_mail(fail_silently=False, **kwargs)
+
 
 def send_otp_email(user, otp_code, purpose='login'):
     """Send OTP code to user's email."""
@@ -18,17 +32,17 @@ def send_otp_email(user, otp_code, purpose='login'):
         html_message = render_otp_email_template(user, otp_code, purpose)
         plain_message = strip_tags(html_message)
         
-        # Send email
-        send_mail(
+        # Queue email; the outbox worker delivers it
+        deliver_mail(
             subject=subject,
             message=plain_message,
             from_email=settings.DEFAULT_FROM_EMAIL,
             recipient_list=[user.email],
             html_message=html_message,
-            fail_silently=False,
+            expires_at=otp_code.expires_at,
         )
         
-        logger.info(f"OTP email sent to {user.email} for {purpose}")
+        logger.info(f"OTP email queued for {user.email} for {purpose}")
         return True
         
     except Exception as e:
@@ -68,16 +82,15 @@ def send_login_alert_email(user, session_info):
         html_message = render_login_alert_template(user, session_info)
         plain_message = strip_tags(html_message)
         
-        send_mail(
+        deliver_mail(
             subject=subject,
             message=plain_message,
             from_email=settings.DEFAULT_FROM_EMAIL,
             recipient_list=[user.email],
             html_message=html_message,
-            fail_silently=False,
         )
         
-        logger.info(f"Login alert email sent to {user.email}")
+        logger.info(f"Login alert email queued for {user.email}")
         return True
         
     except Exception as e:
@@ -107,20 +120,24 @@ def get_client_ip(request):
     return ip
 
 
-def track_login_attempt(request, username, success, failure_reason=''):
-    """Track login attempt for security monitoring."""
+def track_login_attempt(request, username, success, failure_reason='', user=None):
+    """Track login attempt for security monitoring.
+
+    ``user`` is only known once the password checked out; failed attempts
+    are recorded by username alone, without looking the account up.
+    """
     try:
-        user = User.objects.filter(username=username).first()
         ip_address = get_client_ip(request)
         user_agent = request.META.get('HTTP_USER_AGENT', '')
         
-        LoginAttempt.objects.create(
+        login_attempt_writer.add(
             user=user,
             username=username,
             ip_address=ip_address,
             user_agent=user_agent,
             success=success,
-            failure_reason=failure_reason
+            failure_reason=failure_reason,
+            attempt_time=timezone.now(),
         )
         
     except Exception as e:
@@ -128,17 +145,23 @@ def track_login_attempt(request, username, success, failure_reason=''):
 
 
 def create_user_session(request, user):
-    """Create a new user session record."""
+    """Record a new user session; the row is written in the background.
+
+    The row is keyed by a random id kept in the session rather than the
+    session key, which signed-cookie sessions do not have in a stable form.
+    """
     try:
         ip_address = get_client_ip(request)
         user_agent = request.META.get('HTTP_USER_AGENT', '')
-        session_key = request.session.session_key
+        session_key = get_random_string(32)
+        request.session[SESSION_TRACKING_KEY] = session_key
         
-        UserSession.objects.create(
-            user=user,
+        user_session_writer.add(
+            user_id=user.id,
             session_key=session_key,
             ip_address=ip_address,
             user_agent=user_agent,
+            login_time=timezone.now(),
         )
         
     except Exception as e:
@@ -146,17 +169,11 @@ def create_user_session(request, user):
 
 
 def end_user_session(request, user):
-    """End user session."""
+    """End user session; the row is closed in the background."""
     try:
-        session_key = request.session.session_key
-        UserSession.objects.filter(
-            user=user,
-            session_key=session_key,
-            is_active=True
-        ).update(
-            logout_time=timezone.now(),
-            is_active=False
-        )
+        # Sessions started before tracking ids were introduced use the session key
+        session_key = request.session.get(SESSION_TRACKING_KEY) or request.session.session_key
+        user_session_closer.add(session_key=session_key, logout_time=timezone.now())
         
     except Exception as e:
         logger.error(f"Failed to end user session: {str(e)}")
@@ -171,9 +188,6 @@ def get_recent_login_attempts(username, hours=24):
     ).order_by('-attempt_time')
 
 
-def is_account_locked(username, max_attempts=5, lockout_hours=1):
+def is_account_locked(username):
     """Check if account is locked due to too many failed attempts."""
-    recent_attempts = get_recent_login_attempts(username, lockout_hours)
-    failed_attempts = recent_attempts.filter(success=False)
-    
-    return failed_attempts.count() >= max_attempts
+    return login_user_limiter.is_limited(username)
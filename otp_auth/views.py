@@ -7,8 +7,11 @@ from django.contrib.auth.models import User
 from django.utils import timezone
 import logging
 
-from .models import OTPCode
-from .utils import send_otp_email, track_login_attempt, create_user_session, end_user_session
+from .otp_store import get_otp_store
+from .ratelimit import login_ip_limiter, login_user_limiter, verify_ip_limiter, verify_user_limiter
+from .utils import (
+    send_otp_email, track_login_attempt, create_user_session, end_user_session, get_client_ip
+)
 
 logger = logging.getLogger(__name__)
 
@@ -18,21 +21,30 @@ def login_with_otp(request):
     if request.method == 'POST':
         username = request.POST.get('username', '').strip()
         password = request.POST.get('password', '')
+        ip_address = get_client_ip(request)
+        
+        # Refuse floods before hashing the password or touching the database
+        if login_ip_limiter.is_limited(ip_address) or login_user_limiter.is_limited(username):
+            logger.warning(f"Login rate limit reached for {username} from {ip_address}")
+            messages.error(request, 'Too many login attempts. Please try again later.')
+            return render(request, 'otp_auth/login.html', status=429)
+        login_ip_limiter.hit(ip_address)
         
         user = authenticate(request, username=username, password=password)
         
         if user is not None:
-            otp = OTPCode.generate_otp(user, purpose='login')
+            otp = get_otp_store().issue(user, purpose='login')
             
             if send_otp_email(user, otp, 'login'):
                 request.session['pending_login_user_id'] = user.id
                 messages.success(request, f'OTP sent to {user.email}')
-                track_login_attempt(request, username, True)
+                track_login_attempt(request, username, True, user=user)
                 return redirect('otp_auth:verify_otp')
             else:
                 messages.error(request, 'Failed to send OTP.')
-                track_login_attempt(request, username, False, 'OTP send failed')
+                track_login_attempt(request, username, False, 'OTP send failed', user=user)
         else:
+            login_user_limiter.hit(username)
             messages.error(request, 'Invalid credentials.')
             track_login_attempt(request, username, False, 'Invalid credentials')
     
@@ -49,25 +61,27 @@ def verify_otp(request):
             messages.error(request, 'Invalid session.')
             return redirect('otp_auth:login')
         
+        ip_address = get_client_ip(request)
+        if verify_ip_limiter.is_limited(ip_address) or verify_user_limiter.is_limited(user_id):
+            logger.warning(f"OTP rate limit reached for user {user_id} from {ip_address}")
+            messages.error(request, 'Too many incorrect codes. Please try again later.')
+            return render(request, 'otp_auth/verify_otp.html', status=429)
+        verify_ip_limiter.hit(ip_address)
+        
         try:
             user = User.objects.get(id=user_id)
-            otp = OTPCode.objects.filter(
-                user=user,
-                code=otp_code,
-                purpose='login',
-                is_used=False
-            ).first()
             
-            if otp and otp.is_valid():
-                otp.is_used = True
-                otp.save()
+            if get_otp_store().verify(user, otp_code, purpose='login'):
                 login(request, user)
                 create_user_session(request, user)
+                verify_user_limiter.reset(user_id)
+                login_user_limiter.reset(user.username)
                 
                 del request.session['pending_login_user_id']
                 messages.success(request, f'Welcome back, {user.first_name or user.username}!')
                 return redirect('mechanics:home')
             else:
+                verify_user_limiter.hit(user_id)
                 messages.error(request, 'Invalid or expired OTP.')
                 
         except User.DoesNotExist:
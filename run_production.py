@@ -7,7 +7,7 @@ Binds to 0.0.0.0:10000 for public internet access
 import os
 import sys
 import django
-from django.core.management import execute_from_command_line
+from django.core.management import call_command, execute_from_command_line
 from django.core.wsgi import get_wsgi_application
 
 def main():
@@ -23,14 +23,9 @@ def main():
     # Initialize Django
     django.setup()
     
-    # Collect static files if needed
-    if not os.path.exists('staticfiles'):
-        print("Collecting static files...")
-        execute_from_command_line(['manage.py', 'collectstatic', '--noinput'])
-    
-    # Run migrations if needed
-    print("Running migrations...")
-    execute_from_command_line(['manage.py', 'migrate'])
+    # Run migrations and collect static files, skipping unchanged steps
+    print("Preparing database and static files...")
+    call_command('boot', skip=['makemigrations', 'sample_data'])
     
     # Start the server
     print("Starting MechLocator on 0.0.0.0:10000...")
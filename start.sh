@@ -13,13 +13,9 @@ PORT=${PORT:-10000}
 
 echo "🌐 Using port: $PORT"
 
-# Run migrations
-echo "🔄 Running migrations..."
-python manage.py migrate
-
-# Collect static files
-echo "📁 Collecting static files..."
-python manage.py collectstatic --noinput
+# Migrations and static files in one process, skipping unchanged steps
+echo "🔄 Preparing database and static files..."
+python manage.py boot --skip makemigrations --skip sample_data
 
 # Start Gunicorn
 echo "🚀 Starting Gunicorn server..."
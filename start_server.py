@@ -8,6 +8,7 @@ import os
 import sys
 import django
 import subprocess
+from django.core.management import CommandError, call_command
 from pathlib import Path
 
 def setup_environment():
@@ -20,60 +21,16 @@ def setup_environment():
     port = os.environ.get('PORT', '10000')
     os.environ['PORT'] = port
 
-def run_command(command, description):
-    """Run a Django management command"""
-    print(f"🔄 {description}...")
+def prepare():
+    """Run migrations, sample data and collectstatic in this process, skipping unchanged steps"""
+    print("🗄️ Preparing database and static files...")
     try:
-        result = subprocess.run(command, check=True, capture_output=True, text=True)
-        print(f"✅ {description} completed successfully")
+        call_command('boot')
         return True
-    except subprocess.CalledProcessError as e:
-        print(f"❌ {description} failed:")
-        print(f"Error: {e.stderr}")
+    except CommandError as e:
+        print(f"❌ {e}")
         return False
 
-def setup_database():
-    """Set up the database with migrations and sample data"""
-    print("🗄️ Setting up database...")
-    
-    # Run makemigrations
-    if not run_command(['python', 'manage.py', 'makemigrations'], "Creating migrations"):
-        return False
-    
-    # Run migrate
-    if not run_command(['python', 'manage.py', 'migrate'], "Applying migrations"):
-        return False
-    
-    # Create superuser if it doesn't exist
-    print("👤 Checking for superuser...")
-    try:
-        from django.contrib.auth import get_user_model
-        User = get_user_model()
-        if not User.objects.filter(is_superuser=True).exists():
-            print("👤 Creating superuser...")
-            # Create a default superuser
-            User.objects.create_superuser(
-                username='admin',
-                email='mechlocator.org@gmail.com',
-                password='admin123456'
-            )
-            print("✅ Superuser created: admin/admin123456")
-        else:
-            print("✅ Superuser already exists")
-    except Exception as e:
-        print(f"⚠️ Could not create superuser: {e}")
-    
-    # Populate sample data
-    if not run_command(['python', 'manage.py', 'populate_sample_data'], "Populating sample data"):
-        print("⚠️ Sample data population failed, continuing...")
-    
-    return True
-
-def collect_static_files():
-    """Collect static files"""
-    print("📁 Collecting static files...")
-    return run_command(['python', 'manage.py', 'collectstatic', '--noinput'], "Collecting static files")
-
 def start_server():
     """Start the Django development server"""
     port = os.environ.get('PORT', '10000')
@@ -109,15 +66,11 @@ def main():
     # Initialize Django
     django.setup()
     
-    # Setup database
-    if not setup_database():
+    # Setup database and static files
+    if not prepare():
         print("❌ Database setup failed. Exiting...")
         sys.exit(1)
     
-    # Collect static files
-    if not collect_static_files():
-        print("⚠️ Static file collection failed, continuing...")
-    
     # Start server
     if not start_server():
         print("❌ Server failed to start. Exiting...")
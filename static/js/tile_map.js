@@ -0,0 +1,157 @@
+/**
+ * MechLocator - Clustered mechanic layer for Google Maps
+ * Loads /api/tiles/<zoom>/<x>/<y>/ for the visible tiles and draws clusters,
+ * or individual markers once the server sends them at high zoom.
+ */
+
+class MechanicTileLayer {
+    /**
+     * @param {google.maps.Map} map - Map to draw on
+     * @param {Object} options - tileUrl (with {z}, {x}, {y} placeholders),
+     *     rating, status (admin tiles only), an optional markerIcon(mechanic)
+     *     returning an icon URL and an optional onMarkerClick(marker, mechanic) callback
+     */
+    constructor(map, options) {
+        this.map = map;
+        this.tileUrl = options.tileUrl;
+        this.rating = options.rating || 0;
+        this.status = options.status || '';
+        this.markerIcon = options.markerIcon || null;
+        this.onMarkerClick = options.onMarkerClick || null;
+        this.onUpdate = options.onUpdate || null;
+        this.tiles = new Map();
+        this.overlays = [];
+        this.listener = map.addListener('idle', () => this.refresh());
+    }
+
+    setRating(rating) {
+        this.rating = rating || 0;
+        this.tiles.clear();
+        this.refresh();
+    }
+
+    setStatus(status) {
+        this.status = status || '';
+        this.tiles.clear();
+        this.refresh();
+    }
+
+    visibleTiles() {
+        const bounds = this.map.getBounds();
+        if (!bounds) return [];
+
+        const zoom = Math.round(this.map.getZoom());
+        const scale = Math.pow(2, zoom);
+        const toX = lng => Math.floor((lng + 180) / 360 * scale);
+        const toY = lat => {
+            const rad = Math.max(Math.min(lat, 85.0511), -85.0511) * Math.PI / 180;
+            return Math.floor((1 - Math.log(Math.tan(rad) + 1 / Math.cos(rad)) / Math.PI) / 2 * scale);
+        };
+
+        const ne = bounds.getNorthEast();
+        const sw = bounds.getSouthWest();
+        const minY = Math.max(toY(ne.lat()), 0);
+        const maxY = Math.min(toY(sw.lat()), scale - 1);
+        let minX = toX(sw.lng());
+        let maxX = toX(ne.lng());
+        if (maxX < minX) maxX += scale;  // viewport crosses the antimeridian
+
+        const tiles = [];
+        for (let x = minX; x <= Math.min(maxX, minX + scale - 1); x++) {
+            for (let y = minY; y <= maxY; y++) {
+                tiles.push({ z: zoom, x: ((x % scale) + scale) % scale, y: y });
+            }
+        }
+        return tiles;
+    }
+
+    loadTile(tile) {
+        const key = `${tile.z}/${tile.x}/${tile.y}/${this.rating}/${this.status}`;
+        if (!this.tiles.has(key)) {
+            const params = new URLSearchParams();
+            if (this.rating) params.set('rating', this.rating);
+            if (this.status) params.set('status', this.status);
+            const query = params.toString();
+            const url = this.tileUrl
+                .replace('{z}', tile.z)
+                .replace('{x}', tile.x)
+                .replace('{y}', tile.y) + (query ? `?${query}` : '');
+            this.tiles.set(key, fetch(url).then(response => response.json()).catch(error => {
+                console.error('Tile error:', error);
+                this.tiles.delete(key);
+                return null;
+            }));
+        }
+        return this.tiles.get(key);
+    }
+
+    refresh() {
+        const requested = this.map.getZoom();
+        Promise.all(this.visibleTiles().map(tile => this.loadTile(tile))).then(tiles => {
+            // Ignore responses that arrive after the user zoomed again
+            if (this.map.getZoom() !== requested) return;
+            this.render(tiles.filter(tile => tile));
+        });
+    }
+
+    clear() {
+        this.overlays.forEach(overlay => overlay.setMap(null));
+        this.overlays = [];
+    }
+
+    render(tiles) {
+        this.clear();
+        let total = 0;
+        const mechanics = [];
+
+        tiles.forEach(tile => {
+            total += tile.count;
+            tile.clusters.forEach(cluster => this.overlays.push(this.clusterMarker(cluster)));
+            tile.markers.forEach(mechanic => {
+                mechanics.push(mechanic);
+                this.overlays.push(this.mechanicMarker(mechanic));
+            });
+        });
+
+        if (this.onUpdate) this.onUpdate(total, mechanics);
+    }
+
+    clusterMarker(cluster) {
+        const size = Math.min(24 + Math.log10(cluster.count) * 10, 56);
+        const marker = new google.maps.Marker({
+            position: { lat: cluster.latitude, lng: cluster.longitude },
+            map: this.map,
+            title: `${cluster.count} mechanics`,
+            label: { text: String(cluster.count), color: 'white', fontSize: '11px', fontWeight: 'bold' },
+            icon: {
+                url: 'data:image/svg+xml;charset=UTF-8,' + encodeURIComponent(
+                    '<svg xmlns="http://www.w3.org/2000/svg" width="40" height="40">' +
+                    '<circle cx="20" cy="20" r="18" fill="#007cba" fill-opacity="0.85" stroke="white" stroke-width="2"/></svg>'
+                ),
+                scaledSize: new google.maps.Size(size, size),
+                anchor: new google.maps.Point(size / 2, size / 2)
+            }
+        });
+        marker.addListener('click', () => {
+            this.map.setCenter(marker.getPosition());
+            this.map.setZoom(this.map.getZoom() + 2);
+        });
+        return marker;
+    }
+
+    mechanicMarker(mechanic) {
+        const marker = new google.maps.Marker({
+            position: { lat: mechanic.latitude, lng: mechanic.longitude },
+            map: this.map,
+            title: mechanic.name,
+            icon: {
+                url: this.markerIcon ? this.markerIcon(mechanic) : 'https://maps.google.com/mapfiles/ms/icons/red-dot.png',
+                scaledSize: new google.maps.Size(32, 32)
+            }
+        });
+        if (this.onMarkerClick) {
+            marker.addListener('click', () => this.onMarkerClick(marker, mechanic));
+        }
+        return marker;
+    }
+}